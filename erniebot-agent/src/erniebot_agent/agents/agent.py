@@ -1,8 +1,12 @@
 import abc
+import asyncio
+import contextvars
+import copy
 import json
 import logging
 from typing import (
     Any,
+    AsyncIterator,
     Dict,
     Final,
     Iterable,
@@ -11,16 +15,29 @@ from typing import (
     Optional,
     Sequence,
     Tuple,
+    TypeVar,
     Union,
     final,
 )
 
+import erniebot
+
 from erniebot_agent.agents.base import BaseAgent
 from erniebot_agent.agents.callback.callback_manager import CallbackManager
 from erniebot_agent.agents.callback.default import get_default_callbacks
 from erniebot_agent.agents.callback.handlers.base import CallbackHandler
 from erniebot_agent.agents.mixins import GradioMixin
-from erniebot_agent.agents.schema import AgentResponse, LLMResponse, ToolResponse
+from erniebot_agent.agents.schema import (
+    AgentEvent,
+    AgentResponse,
+    LLMResponse,
+    LLMTokenEvent,
+    RunEndEvent,
+    ToolEndEvent,
+    ToolResponse,
+    ToolStartEvent,
+)
+from erniebot_agent.chat_models.base import ChatModel
 from erniebot_agent.chat_models.erniebot import BaseERNIEBot
 from erniebot_agent.file import (
     File,
@@ -29,8 +46,15 @@ from erniebot_agent.file import (
     get_default_file_manager,
 )
 from erniebot_agent.memory import Memory, WholeMemory
-from erniebot_agent.memory.messages import Message, SystemMessage
+from erniebot_agent.memory.messages import (
+    AIMessage,
+    AIMessageChunk,
+    Message,
+    SystemMessage,
+    TokenUsage,
+)
 from erniebot_agent.tools.base import BaseTool
+from erniebot_agent.tools.result_cache import create_tool_result_cache_key
 from erniebot_agent.tools.tool_manager import ToolManager
 from erniebot_agent.utils.exceptions import FileError
 
@@ -38,6 +62,29 @@ _PLUGINS_WO_FILE_IO: Final[Tuple[str]] = ("eChart",)
 
 _logger = logging.getLogger(__name__)
 
+# The queue of events of the current streaming run, if any.
+_event_queue: "contextvars.ContextVar[Optional[asyncio.Queue[Optional[AgentEvent]]]]" = (
+    contextvars.ContextVar("_event_queue", default=None)
+)
+
+
+class _StreamingCallbackHandler(CallbackHandler):
+    """Forwards callback events to the stream of the current run."""
+
+    async def on_llm_token(self, agent: BaseAgent, llm: ChatModel, token: str) -> None:
+        _put_event(LLMTokenEvent(token=token))
+
+    async def on_tool_start(self, agent: BaseAgent, tool: BaseTool, input_args: str) -> None:
+        _put_event(ToolStartEvent(tool_name=tool.tool_name, tool_args=input_args))
+
+    async def on_tool_end(self, agent: BaseAgent, tool: BaseTool, response: ToolResponse) -> None:
+        _put_event(ToolEndEvent(tool_name=tool.tool_name, response=response))
+
+
+_AgentT = TypeVar("_AgentT", bound="Agent")
+
+_STREAMING_CALLBACK_HANDLER: Final[_StreamingCallbackHandler] = _StreamingCallbackHandler()
+
 
 class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
     """The base class for agents.
@@ -131,6 +178,54 @@ class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
             await self._callback_manager.on_run_end(agent=self, response=agent_resp)
         return agent_resp
 
+    @final
+    async def run_stream(
+        self, prompt: str, files: Optional[Sequence[File]] = None
+    ) -> AsyncIterator[AgentEvent]:
+        """Run the agent asynchronously, yielding events as they happen.
+
+        The LLM generates its responses in streaming mode, so that its output
+        can be shown as soon as the first token arrives.
+
+        Args:
+            prompt: A natural language text describing the task that the agent
+                should perform.
+            files: A list of files that the agent can use to perform the task.
+
+        Returns:
+            An async iterator of events, which ends with a `RunEndEvent`
+            carrying the response from the agent.
+        """
+        if _STREAMING_CALLBACK_HANDLER not in self._callback_manager.handlers:
+            self._callback_manager.add_handler(_STREAMING_CALLBACK_HANDLER)
+
+        queue: asyncio.Queue[Optional[AgentEvent]] = asyncio.Queue()
+
+        async def _run_and_close_queue() -> AgentResponse:
+            try:
+                return await self.run(prompt, files)
+            finally:
+                queue.put_nowait(None)
+
+        # The task copies the current context, which makes the queue visible
+        # only to this run.
+        token = _event_queue.set(queue)
+        try:
+            task = asyncio.ensure_future(_run_and_close_queue())
+        finally:
+            _event_queue.reset(token)
+
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            yield RunEndEvent(response=await task)
+        finally:
+            if not task.done():
+                task.cancel()
+
     @final
     async def run_llm(
         self,
@@ -208,6 +303,38 @@ class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
         """Clear the chat history."""
         self.memory.clear_chat_history()
 
+    def create_session(
+        self: _AgentT, *, memory: Optional[Memory] = None, file_manager: Optional[FileManager] = None
+    ) -> _AgentT:
+        """Create an agent that shares the definition of this agent but has
+        its own conversation state.
+
+        Creating a session is cheap: the LLM, the tools (including their
+        cached schemas), the callbacks, and the plugins are shared rather than
+        copied, and only the memory and optionally the file manager are new.
+        Sessions can run concurrently on the same event loop. Loading or
+        unloading a tool affects all the sessions.
+
+        Args:
+            memory: The memory of the session. If `None`, an empty memory
+                with the same settings as the memory of this agent (e.g.,
+                the token limit) will be used.
+            file_manager: The file manager of the session. If `None`, the
+                file manager of this agent will be used.
+
+        Returns:
+            The agent of the session.
+        """
+        session = copy.copy(self)
+        if memory is None:
+            memory = self.memory.create_empty()
+        if self.system is not None:
+            memory.set_system_message(self.system)
+        session.memory = memory
+        if file_manager is not None:
+            session._file_manager = file_manager
+        return session
+
     def get_file_manager(self) -> FileManager:
         # Can we create a lazy proxy for the global file manager and simply set
         # and use `self._file_manager`?
@@ -226,8 +353,13 @@ class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
             if reserved_opt in opts:
                 raise TypeError(f"`{reserved_opt}` should not be set.")
 
+        functions: Union[List[dict], erniebot.PreparedFunctions]
         if "functions" not in opts:
-            functions = self._tool_manager.get_tool_schemas()
+            if self.llm.supports_prepared_functions:
+                # Avoid encoding the same schemas in every step.
+                functions = self._tool_manager.get_prepared_tool_schemas()
+            else:
+                functions = self._tool_manager.get_tool_schemas()
         else:
             functions = opts.pop("functions")
 
@@ -238,9 +370,20 @@ class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
             )
         opts["system"] = self.system.content if self.system is not None else None
         opts["plugins"] = self._plugins
-        llm_ret = await self.llm.chat(messages, stream=False, functions=functions, **opts)
+        if _event_queue.get() is not None:
+            llm_ret = await self._run_llm_stream(messages, functions=functions, **opts)
+        else:
+            llm_ret = await self.llm.chat(messages, stream=False, functions=functions, **opts)
         return LLMResponse(message=llm_ret)
 
+    async def _run_llm_stream(self, messages: List[Message], **opts: Any) -> AIMessage:
+        chunks: List[AIMessageChunk] = []
+        async for chunk in await self.llm.chat(messages, stream=True, **opts):
+            chunks.append(chunk)
+            if chunk.content:
+                await self._callback_manager.on_llm_token(agent=self, llm=self.llm, token=chunk.content)
+        return _merge_message_chunks(chunks)
+
     async def _run_tool(self, tool: BaseTool, tool_args: str) -> ToolResponse:
         parsed_tool_args = self._parse_tool_args(tool_args)
         file_manager = self.get_file_manager()
@@ -248,14 +391,30 @@ class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
         # Can we make a protocol to statically recognize file inputs and outputs
         # or can we have the tools introspect about this?
         input_files = file_manager.sniff_and_extract_files_from_dict(parsed_tool_args)
+        result_cache = tool.result_cache
+        if result_cache is not None:
+            cache_key = await create_tool_result_cache_key(tool.tool_name, parsed_tool_args, input_files)
+            tool_ret = result_cache.get(cache_key)
+            if tool_ret is not None:
+                _logger.debug("Reusing the cached result of %s.", tool.tool_name)
+                return ToolResponse(
+                    json=json.dumps(tool_ret, ensure_ascii=False), input_files=input_files, output_files=[]
+                )
         tool_ret = await tool(**parsed_tool_args)
         if isinstance(tool_ret, dict):
             output_files = file_manager.sniff_and_extract_files_from_dict(tool_ret)
         else:
             output_files = []
+        # Results with files are not cached, as the files may be deleted.
+        if result_cache is not None and tool_ret is not None and not output_files:
+            result_cache.set(cache_key, tool_ret)
         tool_ret_json = json.dumps(tool_ret, ensure_ascii=False)
         return ToolResponse(json=tool_ret_json, input_files=input_files, output_files=output_files)
 
+    def _emit_event(self, event: AgentEvent) -> None:
+        """Sends an event to the stream of the current run, if any."""
+        _put_event(event)
+
     def _create_default_memory(self) -> Memory:
         return WholeMemory()
 
@@ -288,3 +447,33 @@ class Agent(GradioMixin, BaseAgent[BaseERNIEBot]):
                 _raise_exception(file)
             if file is not managed_file:
                 _raise_exception(file)
+
+
+def _put_event(event: AgentEvent) -> None:
+    queue = _event_queue.get()
+    if queue is not None:
+        queue.put_nowait(event)
+
+
+def _merge_message_chunks(chunks: List[AIMessageChunk]) -> AIMessage:
+    if not chunks:
+        raise RuntimeError("The LLM returned no message.")
+    last_chunk = chunks[-1]
+    function_call = next((c.function_call for c in chunks if c.function_call is not None), None)
+    plugin_info = next((c.plugin_info for c in reversed(chunks) if c.plugin_info is not None), None)
+    search_info = next((c.search_info for c in reversed(chunks) if c.search_info is not None), None)
+    # ERNIE Bot reports the accumulated token usage in each chunk.
+    if last_chunk.query_tokens_count > 0:
+        token_usage: Optional[TokenUsage] = TokenUsage(
+            prompt_tokens=last_chunk.query_tokens_count, completion_tokens=last_chunk.token_count
+        )
+    else:
+        token_usage = None
+    return AIMessage(
+        content="".join(c.content for c in chunks),
+        function_call=function_call,
+        token_usage=token_usage,
+        plugin_info=plugin_info,
+        search_info=search_info,
+        clarify=any(c.clarify for c in chunks),
+    )
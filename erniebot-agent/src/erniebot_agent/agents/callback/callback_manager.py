@@ -65,6 +65,9 @@ class CallbackManager(object):
     async def on_llm_start(self, agent: BaseAgent, llm: ChatModel, messages: List[Message]) -> None:
         await self._handle_event(EventType.LLM_START, agent=agent, llm=llm, messages=messages)
 
+    async def on_llm_token(self, agent: BaseAgent, llm: ChatModel, token: str) -> None:
+        await self._handle_event(EventType.LLM_TOKEN, agent=agent, llm=llm, token=token)
+
     async def on_llm_end(self, agent: BaseAgent, llm: ChatModel, response: LLMResponse) -> None:
         await self._handle_event(EventType.LLM_END, agent=agent, llm=llm, response=response)
 
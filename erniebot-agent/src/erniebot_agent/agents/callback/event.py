@@ -18,6 +18,7 @@ import enum
 class EventType(enum.Enum):
     RUN_START = "run_start"
     LLM_START = "llm_start"
+    LLM_TOKEN = "llm_token"
     LLM_END = "llm_end"
     LLM_ERROR = "llm_error"
     TOOL_START = "tool_start"
@@ -41,6 +41,15 @@ class CallbackHandler(object):
             messages: The messages that the LLM uses as input.
         """
 
+    async def on_llm_token(self, agent: BaseAgent, llm: ChatModel, token: str) -> None:
+        """Called when the LLM generates new text in a streaming run.
+
+        Args:
+            agent: The agent that is running.
+            llm: The LLM that is running.
+            token: The new text that the LLM generates.
+        """
+
     async def on_llm_end(self, agent: BaseAgent, llm: ChatModel, response: LLMResponse) -> None:
         """Called when the LLM successfully ends running.
 
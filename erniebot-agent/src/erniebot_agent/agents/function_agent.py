@@ -12,8 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import logging
-from typing import Final, Iterable, List, Optional, Sequence, Tuple, Union
+import time
+from typing import (
+    AsyncIterator,
+    Final,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from erniebot_agent.agents.agent import Agent
 from erniebot_agent.agents.callback.callback_manager import CallbackManager
@@ -25,6 +36,7 @@ from erniebot_agent.agents.schema import (
     EndInfo,
     EndStep,
     PluginStep,
+    StepEvent,
     ToolInfo,
     ToolStep,
 )
@@ -53,11 +65,14 @@ class FunctionAgent(Agent):
         llm: The LLM that the agent uses.
         memory: The message storage that keeps the chat history.
         max_steps: The maximum number of steps in each agent run.
+        max_concurrent_tool_calls: The maximum number of tools in
+            `first_tools` that are called at the same time.
     """
 
     llm: BaseERNIEBot
     memory: Memory
     max_steps: int
+    max_concurrent_tool_calls: int
 
     def __init__(
         self,
@@ -71,6 +86,7 @@ class FunctionAgent(Agent):
         plugins: Optional[List[str]] = None,
         max_steps: Optional[int] = None,
         first_tools: Optional[Sequence[BaseTool]] = [],
+        max_concurrent_tool_calls: int = 1,
     ) -> None:
         """Initialize a function agent.
 
@@ -94,9 +110,16 @@ class FunctionAgent(Agent):
                 use a default value.
             first_tools: Tools scheduled to be called sequentially at the
                 beginning of each agent run.
+            max_concurrent_tool_calls: The maximum number of tools in
+                `first_tools` to call at the same time. If greater than 1, the
+                tools are considered independent: the arguments of each tool
+                are generated without the results of the other tools, and the
+                messages are still added to the chat history in the order of
+                `first_tools`.
 
         Raises:
-            ValueError: if `max_steps` is non-positive.
+            ValueError: if `max_steps` or `max_concurrent_tool_calls` is
+                non-positive.
             RuntimeError: if tools in first_tools but not in tools list.
 
         """
@@ -116,6 +139,10 @@ class FunctionAgent(Agent):
         else:
             self.max_steps = _MAX_STEPS
 
+        if max_concurrent_tool_calls <= 0:
+            raise ValueError("Invalid `max_concurrent_tool_calls` value")
+        self.max_concurrent_tool_calls = max_concurrent_tool_calls
+
         if first_tools:
             self._first_tools = first_tools
             for tool in self._first_tools:
@@ -135,12 +162,16 @@ class FunctionAgent(Agent):
         num_steps_taken = 0
         chat_history.append(run_input)
 
-        for tool in self._first_tools:
-            curr_step, new_messages = await self._step(chat_history, selected_tool=tool)
+        if self.max_concurrent_tool_calls > 1 and len(self._first_tools) > 1:
+            first_steps = self._step_concurrently(chat_history, self._first_tools)
+        else:
+            first_steps = self._step_sequentially(chat_history, self._first_tools)
+        async for tool, (curr_step, new_messages) in first_steps:
             if not isinstance(curr_step, EndStep):
                 chat_history.extend(new_messages)
                 num_steps_taken += 1
                 steps_taken.append(curr_step)
+                self._emit_event(StepEvent(step=curr_step))
             else:
                 # If tool choice not work, skip this round
                 _logger.warning(f"Selected tool [{tool.tool_name}] not work")
@@ -150,9 +181,11 @@ class FunctionAgent(Agent):
             chat_history.extend(new_messages)
             if isinstance(curr_step, ToolStep):
                 steps_taken.append(curr_step)
+                self._emit_event(StepEvent(step=curr_step))
 
             elif isinstance(curr_step, PluginStep):
                 steps_taken.append(curr_step)
+                self._emit_event(StepEvent(step=curr_step))
                 # 预留 调用了Plugin之后不结束的接口
 
                 # 此处为调用了Plugin之后直接结束的Plugin
@@ -167,6 +200,36 @@ class FunctionAgent(Agent):
         response = self._create_stopped_response(chat_history, steps_taken)
         return response
 
+    async def _step_sequentially(
+        self, chat_history: List[Message], tools: Sequence[BaseTool]
+    ) -> AsyncIterator[Tuple[BaseTool, Tuple[AgentStep, List[Message]]]]:
+        # Each step sees the messages that the caller adds to `chat_history`
+        # after the previous steps.
+        for tool in tools:
+            yield tool, await self._step(chat_history, selected_tool=tool)
+
+    async def _step_concurrently(
+        self, chat_history: List[Message], tools: Sequence[BaseTool]
+    ) -> AsyncIterator[Tuple[BaseTool, Tuple[AgentStep, List[Message]]]]:
+        semaphore = asyncio.Semaphore(self.max_concurrent_tool_calls)
+        history_snapshot = list(chat_history)
+
+        async def _step_with_limit(tool: BaseTool) -> Tuple[AgentStep, List[Message]]:
+            async with semaphore:
+                return await self._step(history_snapshot, selected_tool=tool)
+
+        tasks = [asyncio.ensure_future(_step_with_limit(tool)) for tool in tools]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        # Yield the results in the order of `tools`, regardless of which tool
+        # finishes first.
+        for tool, result in zip(tools, results):
+            yield tool, result
+
     async def _step(
         self, chat_history: List[Message], selected_tool: Optional[BaseTool] = None
     ) -> Tuple[AgentStep, List[Message]]:
@@ -187,7 +250,9 @@ class FunctionAgent(Agent):
         if output_message.function_call is not None:
             tool_name = output_message.function_call["name"]
             tool_args = output_message.function_call["arguments"]
+            start_time = time.perf_counter()
             tool_resp = await self.run_tool(tool_name=tool_name, tool_args=tool_args)
+            elapsed_time = time.perf_counter() - start_time
             new_messages.append(FunctionMessage(name=tool_name, content=tool_resp.json))
             return (
                 ToolStep(
@@ -195,6 +260,7 @@ class FunctionAgent(Agent):
                     result=tool_resp.json,
                     input_files=tool_resp.input_files,
                     output_files=tool_resp.output_files,
+                    elapsed_time=elapsed_time,
                 ),
                 new_messages,
             )
@@ -12,6 +12,7 @@ from erniebot_agent.agents.schema import (
     EndStep,
     File,
     PluginStep,
+    StepEvent,
     ToolAction,
     ToolInfo,
     ToolResponse,
@@ -121,6 +122,7 @@ class FunctionAgentWithRetrieval(FunctionAgent):
                         output_files=tool_resp.output_files,
                     )
                 )
+                self._emit_event(StepEvent(step=steps_taken[-1]))
                 llm_resp = await self._run_llm(
                     messages=chat_history,
                     functions=None,
@@ -246,6 +248,7 @@ class FunctionAgentWithRetrievalTool(FunctionAgent):
                     output_files=tool_resp.output_files,
                 )
             )
+            self._emit_event(StepEvent(step=steps_taken[-1]))
             await self._callback_manager.on_tool_end(agent=self, tool=self.search_tool, response=tool_resp)
 
             num_steps_taken = 0
@@ -254,9 +257,11 @@ class FunctionAgentWithRetrievalTool(FunctionAgent):
                 chat_history.extend(new_messages)
                 if isinstance(curr_step, ToolStep):
                     steps_taken.append(curr_step)
+                    self._emit_event(StepEvent(step=curr_step))
 
                 elif isinstance(curr_step, PluginStep):
                     steps_taken.append(curr_step)
+                    self._emit_event(StepEvent(step=curr_step))
                     # 预留 调用了Plugin之后不结束的接口
 
                     # 此处为调用了Plugin之后直接结束的Plugin
@@ -357,6 +362,7 @@ class FunctionAgentWithRetrievalScoreTool(FunctionAgent):
                     output_files=tool_resp.output_files,
                 )
             )
+            self._emit_event(StepEvent(step=steps_taken[-1]))
             await self._callback_manager.on_tool_end(agent=self, tool=self.search_tool, response=tool_resp)
             num_steps_taken = 0
             while num_steps_taken < self.max_steps:
@@ -364,9 +370,11 @@ class FunctionAgentWithRetrievalScoreTool(FunctionAgent):
                 chat_history.extend(new_messages)
                 if isinstance(curr_step, ToolStep):
                     steps_taken.append(curr_step)
+                    self._emit_event(StepEvent(step=curr_step))
 
                 elif isinstance(curr_step, PluginStep):
                     steps_taken.append(curr_step)
+                    self._emit_event(StepEvent(step=curr_step))
                     # 预留 调用了Plugin之后不结束的接口
 
                     # 此处为调用了Plugin之后直接结束的Plugin
@@ -14,7 +14,7 @@
 
 import functools
 from dataclasses import dataclass
-from typing import Any, Dict, Generic, List, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, TypeVar, Union
 
 from typing_extensions import Literal
 
@@ -108,6 +108,8 @@ class AgentStepWithFiles(AgentStep[_IT, _RT]):
 class ToolStep(AgentStepWithFiles[ToolInfo, Any]):
     """A step taken by an agent that calls a tool."""
 
+    elapsed_time: Optional[float] = None  # seconds spent running the tool
+
 
 @dataclass
 class PluginStep(AgentStepWithFiles[PluginInfo, str]):
@@ -195,3 +197,43 @@ class AgentResponse(object):
                 annotations["content_parts"].append({"text": file_id})
 
         return annotations
+
+
+@dataclass
+class LLMTokenEvent(object):
+    """An event of an agent stream that carries new text from the LLM."""
+
+    token: str
+
+
+@dataclass
+class ToolStartEvent(object):
+    """An event of an agent stream that is sent when a tool starts running."""
+
+    tool_name: str
+    tool_args: str
+
+
+@dataclass
+class ToolEndEvent(object):
+    """An event of an agent stream that is sent when a tool ends running."""
+
+    tool_name: str
+    response: ToolResponse
+
+
+@dataclass
+class StepEvent(object):
+    """An event of an agent stream that is sent when a step is taken."""
+
+    step: AgentStep
+
+
+@dataclass
+class RunEndEvent(object):
+    """The last event of an agent stream, which carries the final response."""
+
+    response: AgentResponse
+
+
+AgentEvent = Union[LLMTokenEvent, ToolStartEvent, ToolEndEvent, StepEvent, RunEndEvent]
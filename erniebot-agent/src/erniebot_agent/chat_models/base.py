@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from abc import ABCMeta, abstractmethod
-from typing import Any, AsyncIterator, List, Literal, Union, overload
+from typing import Any, AsyncIterator, ClassVar, List, Literal, Union, overload
 
 from erniebot_agent.memory.messages import AIMessage, AIMessageChunk, Message
 
@@ -25,8 +25,12 @@ class ChatModel(metaclass=ABCMeta):
         model (str): The model name.
         default_chat_kwargs (Any): A dict for setting default args for chat model,
             the supported keys include `model`, `_config_`, `top_p`, etc.
+        supports_prepared_functions (bool): Whether `functions` can be passed
+            to `chat` as an `erniebot.PreparedFunctions` object.
     """
 
+    supports_prepared_functions: ClassVar[bool] = False
+
     def __init__(self, model: str, **default_chat_kwargs: Any):
         self.model = model
         self.default_chat_kwargs = default_chat_kwargs
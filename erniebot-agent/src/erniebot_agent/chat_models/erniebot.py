@@ -16,6 +16,7 @@ import json
 from typing import (
     Any,
     AsyncIterator,
+    ClassVar,
     List,
     Literal,
     Optional,
@@ -42,16 +43,19 @@ from erniebot_agent.memory.messages import (
 from erniebot_agent.utils import config_from_environ as C
 
 _T = TypeVar("_T", AIMessage, AIMessageChunk)
+_Functions = Union[List[dict], erniebot.PreparedFunctions]
 
 
 class BaseERNIEBot(ChatModel):
+    supports_prepared_functions: ClassVar[bool] = True
+
     @overload
     async def chat(
         self,
         messages: List[Message],
         *,
         stream: Literal[False] = ...,
-        functions: Optional[List[dict]] = ...,
+        functions: Optional[_Functions] = ...,
         **kwargs: Any,
     ) -> AIMessage:
         ...
@@ -62,14 +66,14 @@ class BaseERNIEBot(ChatModel):
         messages: List[Message],
         *,
         stream: Literal[True],
-        functions: Optional[List[dict]] = ...,
+        functions: Optional[_Functions] = ...,
         **kwargs: Any,
     ) -> AsyncIterator[AIMessageChunk]:
         ...
 
     @overload
     async def chat(
-        self, messages: List[Message], *, stream: bool, functions: Optional[List[dict]] = ..., **kwargs: Any
+        self, messages: List[Message], *, stream: bool, functions: Optional[_Functions] = ..., **kwargs: Any
     ) -> Union[AIMessage, AsyncIterator[AIMessageChunk]]:
         ...
 
@@ -78,7 +82,7 @@ class BaseERNIEBot(ChatModel):
         messages: List[Message],
         *,
         stream: bool = False,
-        functions: Optional[List[dict]] = None,
+        functions: Optional[_Functions] = None,
         **kwargs: Any,
     ) -> Union[AIMessage, AsyncIterator[AIMessageChunk]]:
         raise NotImplementedError
@@ -137,7 +141,7 @@ class ERNIEBot(BaseERNIEBot):
         messages: List[Message],
         *,
         stream: Literal[False] = ...,
-        functions: Optional[List[dict]] = ...,
+        functions: Optional[_Functions] = ...,
         **kwargs: Any,
     ) -> AIMessage:
         ...
@@ -148,14 +152,14 @@ class ERNIEBot(BaseERNIEBot):
         messages: List[Message],
         *,
         stream: Literal[True],
-        functions: Optional[List[dict]] = ...,
+        functions: Optional[_Functions] = ...,
         **kwargs: Any,
     ) -> AsyncIterator[AIMessageChunk]:
         ...
 
     @overload
     async def chat(
-        self, messages: List[Message], *, stream: bool, functions: Optional[List[dict]] = ..., **kwargs: Any
+        self, messages: List[Message], *, stream: bool, functions: Optional[_Functions] = ..., **kwargs: Any
     ) -> Union[AIMessage, AsyncIterator[AIMessageChunk]]:
         ...
 
@@ -164,7 +168,7 @@ class ERNIEBot(BaseERNIEBot):
         messages: List[Message],
         *,
         stream: bool = False,
-        functions: Optional[List[dict]] = None,
+        functions: Optional[_Functions] = None,
         **kwargs: Any,
     ) -> Union[AIMessage, AsyncIterator[AIMessageChunk]]:
         """Asynchronously chats with the ERNIE Bot model.
@@ -172,8 +176,8 @@ class ERNIEBot(BaseERNIEBot):
         Args:
             messages (List[Message]): A list of messages.
             stream (bool): Whether to use streaming generation. Defaults to False.
-            functions (Optional[List[dict]]): The function definitions to be used by the model.
-                Defaults to None.
+            functions (Optional[Union[List[dict], erniebot.PreparedFunctions]]): The function
+                definitions to be used by the model. Defaults to None.
             **kwargs: Keyword arguments, such as `top_p`, `temperature`, `penalty_score`, and `system`.
 
         Returns:
@@ -251,7 +255,7 @@ class ERNIEBot(BaseERNIEBot):
                     self.sk = self.default_chat_kwargs.pop("sk")
 
     async def _generate_response(
-        self, cfg_dict: dict, stream: bool, functions: Optional[List[dict]]
+        self, cfg_dict: dict, stream: bool, functions: Optional[_Functions]
     ) -> Union[ChatCompletionResponse, AsyncIterator[ChatCompletionResponse]]:
         # TODO: Improve this when erniebot typing issue is fixed.
         # Note: If plugins is not None, erniebot will not use Baidu_search.
@@ -23,4 +23,5 @@ from .messages import (
     SystemMessage,
 )
 from .sliding_window_memory import SlidingWindowMemory
+from .summary_memory import SummaryMemory
 from .whole_memory import WholeMemory
@@ -12,10 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import copy
 import logging
-from typing import List, Optional, Union
+from typing import Deque, List, Optional, Union
 
-from erniebot_agent.memory.messages import AIMessage, Message, SystemMessage
+import erniebot.utils.token_helper as token_helper
+
+from erniebot_agent.memory.messages import Message, SystemMessage
 
 _logger = logging.getLogger(__name__)
 
@@ -24,17 +28,29 @@ class MessageManager:
     """
     Messages Manager, manage the messages of a conversation.
 
+    The token count of each message is determined once, when the message is
+    added, and a running total is kept, so that adding, removing, and
+    counting messages at either end take constant time.
+
     Attributes:
-        messages (List[Message]): the messages of a conversation.
+        messages (Deque[Message]): the messages of a conversation.
         system_message (SystemMessage): the system message of a conversation.
+        token_count (int): the total number of tokens of the messages, not
+            including the system message.
 
     Note:
         Each message manager have only one system message.
     """
 
     def __init__(self) -> None:
-        self.messages: List[Message] = []
+        self.messages: Deque[Message] = collections.deque()
         self._system_message: Union[SystemMessage, None] = None
+        # The token counts of `messages`, in the same order.
+        self._token_counts: Deque[int] = collections.deque()
+        self.token_count = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
 
     @property
     def system_message(self) -> Optional[Message]:
@@ -48,28 +64,69 @@ class MessageManager:
         self._system_message = message
 
     def add_messages(self, messages: List[Message]) -> None:
-        self.messages.extend(messages)
+        for message in messages:
+            self.add_message(message)
 
     def add_message(self, message: Message) -> None:
         if isinstance(message, SystemMessage):
             self.system_message = message
         else:
+            token_count = _get_token_count(message)
             self.messages.append(message)
+            self._token_counts.append(token_count)
+            self.token_count += token_count
 
     def pop_message(self, index: int = 0) -> Message:
-        return self.messages.pop(index)
+        if index == 0:
+            message = self.messages.popleft()
+            token_count = self._token_counts.popleft()
+        elif index == -1 or index == len(self.messages) - 1:
+            message = self.messages.pop()
+            token_count = self._token_counts.pop()
+        else:
+            message = self.messages[index]
+            token_count = self._token_counts[index]
+            del self.messages[index]
+            del self._token_counts[index]
+        self.token_count -= token_count
+        return message
+
+    def replace_first_messages(self, num_messages: int, messages: List[Message]) -> None:
+        """Replace the first `num_messages` messages with `messages`."""
+        for _ in range(num_messages):
+            self.pop_message(0)
+        for message in reversed(messages):
+            token_count = _get_token_count(message)
+            self.messages.appendleft(message)
+            self._token_counts.appendleft(token_count)
+            self.token_count += token_count
 
     def clear_messages(self) -> None:
-        self.messages = []
+        self.messages.clear()
+        self._token_counts.clear()
+        self.token_count = 0
 
     def update_last_message_token_count(self, token_count: int):
         if token_count == 0:
-            self.messages[-1].token_count = len(self.messages[-1].content)
-        else:
-            self.messages[-1].token_count = token_count
+            token_count = token_helper.approx_num_tokens(self.messages[-1].content)
+        self.messages[-1].token_count = token_count
+        self.token_count += token_count - self._token_counts[-1]
+        self._token_counts[-1] = token_count
 
     def retrieve_messages(self) -> List[Message]:
-        return self.messages
+        return list(self.messages)
+
+    def retrieve_token_counts(self) -> List[int]:
+        """Get the token counts of the messages, in the same order."""
+        return list(self._token_counts)
+
+
+def _get_token_count(message: Message) -> int:
+    try:
+        return message.token_count
+    except AttributeError:
+        # The token count is not known yet.
+        return token_helper.approx_num_tokens(message.content)
 
 
 class Memory:
@@ -97,14 +154,24 @@ class Memory:
 
     def add_message(self, message: Message):
         """Add a message to memory."""
-        if isinstance(message, AIMessage):
-            self.msg_manager.update_last_message_token_count(message.query_tokens_count)
+        # The prompt tokens reported with an AI message include the whole
+        # history, so they are not attributed to the previous message.
         self.msg_manager.add_message(message)
 
     def get_messages(self) -> List[Message]:
         """Get all the messages in memory."""
         return self.msg_manager.retrieve_messages()
 
+    def create_empty(self) -> "Memory":
+        """Create a memory with the same settings and no messages.
+
+        Subclasses that keep state other than the messages should override
+        this method to reset it.
+        """
+        memory = copy.copy(self)
+        memory.msg_manager = MessageManager()
+        return memory
+
     def clear_chat_history(self):
         """Reset the memory."""
         self.msg_manager.clear_messages()
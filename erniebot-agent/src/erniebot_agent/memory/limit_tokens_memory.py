@@ -13,13 +13,14 @@
 # limitations under the License.
 
 from erniebot_agent.memory import Memory
-from erniebot_agent.memory.messages import AIMessage, Message
+from erniebot_agent.memory.messages import HumanMessage, Message
 
 
 class LimitTokensMemory(Memory):
     """
     The class of memory that limits the number of tokens.
-    If number of tokens in the context >= max_token_limit, it will pop message from msg_manager.
+    If number of tokens in the context >= max_token_limit, it will pop the oldest rounds
+    of messages from msg_manager.
 
     Args:
         max_token_limit (int): The maximum number of tokens in the context.
@@ -40,7 +41,6 @@ class LimitTokensMemory(Memory):
     def __init__(self, max_token_limit=3000):
         super().__init__()
         self.max_token_limit = max_token_limit
-        self.mem_token_count = 0
 
         assert (
             max_token_limit is None
@@ -49,6 +49,11 @@ class LimitTokensMemory(Memory):
             max_token_limit=max_token_limit
         )
 
+    @property
+    def mem_token_count(self) -> int:
+        """The number of tokens in the context."""
+        return self.msg_manager.token_count
+
     def add_message(self, message: Message):
         """
         Add a message to memory. Prune the message if number of tokens in memory >= max_token_limit.
@@ -60,10 +65,7 @@ class LimitTokensMemory(Memory):
             None
         """
         super().add_message(message)
-        # TODO(shiyutang): 仅在添加AIMessage时截断会导致HumanMessage传入到LLM时可能长度超限
-        # 最优方案为每条message产生时确定token_count，从而在每次加入message时都进行prune_message
-        if isinstance(message, AIMessage):
-            self.prune_message()
+        self.prune_message()
 
     def prune_message(self):
         """
@@ -76,17 +78,21 @@ class LimitTokensMemory(Memory):
             None
 
         """
-        self.mem_token_count += self.msg_manager.messages[-1].token_count
-        self.mem_token_count += self.msg_manager.messages[-2].token_count  # add human message token length
-        if self.max_token_limit is not None:
-            while self.mem_token_count > self.max_token_limit:
-                deleted_message = self.msg_manager.pop_message()
-                self.mem_token_count -= deleted_message.token_count
-            else:
-                if len(self.get_messages()) == 0:
-                    raise RuntimeError(
-                        "The messsage is now empty. \
+        if self.max_token_limit is None:
+            return
+        deleted_message = None
+        while self.mem_token_count > self.max_token_limit and len(self.msg_manager) > 0:
+            # Whole rounds are removed, so that the messages still start with
+            # a human message.
+            prev_token_count = self.mem_token_count
+            deleted_message = self.msg_manager.pop_message()
+            while len(self.msg_manager) > 0 and not isinstance(self.msg_manager.messages[0], HumanMessage):
+                self.msg_manager.pop_message()
+            deleted_token_count = prev_token_count - self.mem_token_count
+        if deleted_message is not None and len(self.msg_manager) == 0:
+            raise RuntimeError(
+                "The messsage is now empty. \
 It indicates {} which takes up {} tokens and exeeded tokens limits of {} tokens.".format(
-                            deleted_message, deleted_message.token_count, self.max_token_limit
-                        )
-                    )
+                    deleted_message, deleted_token_count, self.max_token_limit
+                )
+            )
@@ -51,12 +51,12 @@ class SlidingWindowMemory(Memory):
 
     def prune_message(self) -> None:
         """Prune memory to max_round if necessary."""
-        while len(self.get_messages()) > self.max_round * 2:
+        while len(self.msg_manager) > self.max_round * 2:
             self.msg_manager.pop_message(self.retained_round * 2)
 
-            num_message = len(self.get_messages())
+            num_message = len(self.msg_manager)
             if num_message % 2 == 0:
-                if len(self.get_messages()) > self.retained_round * 2:
+                if num_message > self.retained_round * 2:
                     self.msg_manager.pop_message(self.retained_round * 2)
                 else:
                     self.msg_manager.pop_message(num_message - 1)
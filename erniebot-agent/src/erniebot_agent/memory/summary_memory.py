@@ -0,0 +1,183 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, List, Optional
+
+from erniebot_agent.memory.base import Memory
+from erniebot_agent.memory.messages import AIMessage, HumanMessage, Message
+
+if TYPE_CHECKING:
+    from erniebot_agent.chat_models.base import ChatModel
+
+_logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """请将以下对话内容总结为一段简洁的摘要，保留其中的关键事实、用户的需求与偏好以及尚未解决的问题，不要添加对话中没有的信息。
+
+{conversation}
+
+摘要："""
+SUMMARY_MESSAGE_PREFIX = "以下是之前对话的摘要：\n"
+SUMMARY_ACK = "好的，我会参考之前的对话内容。"
+
+
+class SummaryMemory(Memory):
+    """
+    The class of memory that summarizes old messages instead of dropping them.
+
+    When the number of tokens in memory exceeds `token_threshold`, a
+    background task asks a cheap model to summarize the oldest rounds, and
+    then replaces them with the summary, keeping roughly the newest
+    `keep_tokens` tokens verbatim. Adding and getting messages never wait for
+    the summarization. If messages are removed while a summary is being
+    generated, the summary is discarded.
+
+    The summary is stored as a pair of human and AI messages, so that the
+    messages still alternate between the user and the assistant.
+
+    Args:
+        llm (Optional[ChatModel]): The model to generate summaries. If None,
+            an ERNIE Bot model of `ernie-speed` is used.
+        token_threshold (int): The number of tokens in memory that triggers a
+            summarization.
+        keep_tokens (Optional[int]): The number of tokens of the newest
+            messages to keep verbatim. If None, half of `token_threshold` is
+            used.
+
+    Examples:
+
+        .. code-block:: python
+            from erniebot_agent.memory import SummaryMemory
+            memory = SummaryMemory(token_threshold=3000)
+            memory.add_message(HumanMessage("Hello world!"))
+    """
+
+    def __init__(
+        self, llm: Optional[ChatModel] = None, token_threshold: int = 3000, keep_tokens: Optional[int] = None
+    ):
+        super().__init__()
+        if token_threshold <= 0:
+            raise ValueError(f"token_threshold should be positive integer, but got {token_threshold}")
+        if keep_tokens is None:
+            keep_tokens = token_threshold // 2
+        if not 0 <= keep_tokens < token_threshold:
+            raise ValueError("keep_tokens should be non-negative and less than token_threshold.")
+        self._llm = llm
+        self.token_threshold = token_threshold
+        self.keep_tokens = keep_tokens
+        self._summary_task: Optional[asyncio.Task] = None
+        # The messages that hold the current summary, if any.
+        self._summary_messages: List[Message] = []
+
+    @property
+    def llm(self) -> ChatModel:
+        # The default model is created lazily, so that creating the memory
+        # does not require credentials.
+        if self._llm is None:
+            from erniebot_agent.chat_models.erniebot import ERNIEBot
+
+            self._llm = ERNIEBot(model="ernie-speed")
+        return self._llm
+
+    def add_message(self, message: Message):
+        """Add a message to memory, and start summarizing old messages in the
+        background if necessary."""
+        super().add_message(message)
+        self._maybe_schedule_summary()
+
+    def create_empty(self) -> SummaryMemory:
+        memory = super().create_empty()
+        assert isinstance(memory, SummaryMemory)
+        memory._summary_task = None
+        memory._summary_messages = []
+        return memory
+
+    async def wait_for_summary(self) -> None:
+        """Wait until the ongoing summarization, if any, finishes."""
+        while self._summary_task is not None:
+            await asyncio.shield(self._summary_task)
+
+    def _maybe_schedule_summary(self) -> None:
+        if self._summary_task is not None or self.msg_manager.token_count <= self.token_threshold:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _logger.debug("No event loop is running, so the messages are not summarized.")
+            return
+        messages = self._select_messages_to_summarize()
+        if messages:
+            self._summary_task = loop.create_task(self._summarize(messages))
+
+    def _select_messages_to_summarize(self) -> List[Message]:
+        # Select whole rounds from the oldest one until the remaining
+        # messages fit in `keep_tokens`. A round starts with a human message,
+        # and the last round is always kept. Nothing is selected if only the
+        # existing summary would be summarized again.
+        messages = self.msg_manager.retrieve_messages()
+        token_counts = self.msg_manager.retrieve_token_counts()
+        remaining_tokens = self.msg_manager.token_count
+        num_messages = 0
+        for i, message in enumerate(messages):
+            if i > 0 and isinstance(message, HumanMessage):
+                num_messages = i
+                if remaining_tokens <= self.keep_tokens:
+                    break
+            remaining_tokens -= token_counts[i]
+        if _is_same_messages(messages[:num_messages], self._summary_messages):
+            return []
+        return messages[:num_messages]
+
+    async def _summarize(self, messages: List[Message]) -> None:
+        try:
+            conversation = "\n".join(f"{message.role}: {message.content}" for message in messages)
+            prompt = HumanMessage(SUMMARY_PROMPT.format(conversation=conversation))
+            response = await self.llm.chat([prompt])
+        except Exception as e:
+            # The messages are kept, and summarization is retried when the
+            # next message is added.
+            _logger.warning("Failed to summarize the messages: %s", e)
+            self._summary_task = None
+            return
+        except BaseException:
+            self._summary_task = None
+            raise
+        self._summary_task = None
+        prev_token_count = self.msg_manager.token_count
+        if self._swap_in_summary(messages, response.content):
+            # New messages may have been added in the meantime. If the summary
+            # did not reduce the number of tokens, summarizing again would not
+            # help either.
+            if self.msg_manager.token_count < prev_token_count:
+                self._maybe_schedule_summary()
+
+    def _swap_in_summary(self, messages: List[Message], summary: str) -> bool:
+        # This runs without awaiting, so no other coroutine can see the memory
+        # in an intermediate state.
+        current_messages = self.msg_manager.retrieve_messages()
+        if not _is_same_messages(current_messages[: len(messages)], messages):
+            _logger.debug("The messages have changed during summarization, so the summary is discarded.")
+            return False
+        self._summary_messages = [HumanMessage(SUMMARY_MESSAGE_PREFIX + summary), AIMessage(SUMMARY_ACK)]
+        self.msg_manager.replace_first_messages(len(messages), self._summary_messages)
+        return True
+
+
+def _is_same_messages(messages: List[Message], other_messages: List[Message]) -> bool:
+    return len(messages) == len(other_messages) and all(
+        message is other_message for message, other_message in zip(messages, other_messages)
+    )
@@ -16,3 +16,4 @@ from .base import Tool
 from .chat_with_eb import ChatWithEB
 from .image_generation_tool import ImageGenerationTool
 from .remote_toolkit import RemoteToolkit
+from .result_cache import ToolResultCache, cache_results
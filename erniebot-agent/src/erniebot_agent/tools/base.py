@@ -18,10 +18,14 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Type
 
 from erniebot_agent.memory.messages import Message
+from erniebot_agent.tools.result_cache import ToolResultCache
 from erniebot_agent.tools.schema import ToolParameterView, scrub_dict
 
 
 class BaseTool(ABC):
+    # If set, the agent reuses the results of calls with the same arguments.
+    result_cache: Optional[ToolResultCache] = None
+
     @property
     @abstractmethod
     def tool_name(self) -> str:
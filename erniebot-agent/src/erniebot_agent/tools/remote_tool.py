@@ -5,8 +5,6 @@ import logging
 from copy import deepcopy
 from typing import Any, Dict, List, Optional, Type
 
-import requests
-
 from erniebot_agent.file import (
     FileManager,
     GlobalFileManagerHandler,
@@ -14,7 +12,9 @@ from erniebot_agent.file import (
 )
 from erniebot_agent.memory.messages import Message
 from erniebot_agent.tools.base import BaseTool
+from erniebot_agent.tools.result_cache import ToolResultCache
 from erniebot_agent.tools.schema import RemoteToolView
+from erniebot_agent.tools.transport import RemoteToolTransport, get_transport
 from erniebot_agent.tools.utils import (
     get_file_info_from_param_view,
     parse_json_request,
@@ -36,6 +36,10 @@ class RemoteTool(BaseTool):
         file_manager: Optional[FileManager],
         examples: Optional[List[Message]] = None,
         tool_name_prefix: Optional[str] = None,
+        *,
+        timeout: Optional[float] = None,
+        transport: Optional[RemoteToolTransport] = None,
+        result_cache: Optional[ToolResultCache] = None,
     ) -> None:
         self.tool_view = tool_view
         self.server_url = server_url
@@ -51,6 +55,11 @@ class RemoteTool(BaseTool):
             )
 
         self.response_prompt: Optional[str] = None
+        # Timeout of a call in seconds. If None, the default of the transport is used.
+        self.timeout = timeout
+        # The connection pool is shared by the tools of the same server.
+        self.transport = transport or get_transport(server_url)
+        self.result_cache = result_cache
 
     @property
     def examples(self) -> List[Message]:
@@ -118,7 +127,7 @@ class RemoteTool(BaseTool):
         headers = deepcopy(self.headers)
         headers["Content-Type"] = self.tool_view.parameters_content_type
 
-        requests_inputs = {
+        requests_inputs: Dict[str, Any] = {
             "headers": headers,
         }
         if self.tool_view.method == "get":
@@ -142,16 +151,11 @@ class RemoteTool(BaseTool):
                 f"Unsupported content type: {self.tool_view.parameters_content_type}", stage="Executing"
             )
 
-        if self.tool_view.method == "get":
-            response = requests.get(url, **requests_inputs)  # type: ignore
-        elif self.tool_view.method == "post":
-            response = requests.post(url, **requests_inputs)  # type: ignore
-        elif self.tool_view.method == "put":
-            response = requests.put(url, **requests_inputs)  # type: ignore
-        elif self.tool_view.method == "delete":
-            response = requests.delete(url, **requests_inputs)  # type: ignore
-        else:
+        if self.tool_view.method not in ("get", "post", "put", "delete"):
             raise RemoteToolError(f"method<{self.tool_view.method}> is invalid", stage="Executing")
+        response = await self.transport.request(
+            self.tool_view.method, url, timeout=self.timeout, **requests_inputs
+        )
 
         if response.status_code != 200:
             _logger.debug(f"The resource requested returned the following headers: {response.headers}")
@@ -1,13 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
-import tempfile
 from dataclasses import asdict, dataclass, field
-from typing import Any, ClassVar, Dict, List, Optional, Type
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Type
 
-import requests
 from openapi_spec_validator.readers import read_from_filename
 from yaml import safe_dump
 
@@ -26,10 +25,13 @@ from erniebot_agent.tools.schema import (
     ToolParameterView,
     scrub_dict,
 )
+from erniebot_agent.tools.toolkit_cache import (
+    ToolkitSpecCache,
+    get_default_toolkit_cache,
+)
 from erniebot_agent.tools.utils import validate_openapi_yaml
 from erniebot_agent.utils import config_from_environ as C
 from erniebot_agent.utils.exceptions import RemoteToolError
-from erniebot_agent.utils.http import url_file_exists
 
 _logger = logging.getLogger(__name__)
 
@@ -249,6 +251,8 @@ class RemoteToolkit:
         version: Optional[str] = None,
         access_token: Optional[str] = None,
         file_manager: Optional[FileManager] = None,
+        *,
+        use_cache: bool = True,
     ) -> RemoteToolkit:
         from urllib.parse import urlparse
 
@@ -258,7 +262,43 @@ class RemoteToolkit:
         aistudio_base_url = os.getenv("AISTUDIO_HUB_BASE_URL", cls._AISTUDIO_HUB_BASE_URL)
         parsed_url = urlparse(aistudio_base_url)
         tool_url = parsed_url._replace(netloc=f"tool-{tool_id}.{parsed_url.netloc}").geturl()
-        return cls.from_url(tool_url, version=version, access_token=access_token, file_manager=file_manager)
+        return cls.from_url(
+            tool_url,
+            version=version,
+            access_token=access_token,
+            file_manager=file_manager,
+            use_cache=use_cache,
+        )
+
+    @classmethod
+    async def afrom_aistudio(
+        cls,
+        tool_id: str,
+        version: Optional[str] = None,
+        access_token: Optional[str] = None,
+        file_manager: Optional[FileManager] = None,
+        *,
+        use_cache: bool = True,
+    ) -> RemoteToolkit:
+        """Asynchronous version of `from_aistudio`.
+
+        Many toolkits can be loaded concurrently, e.g., with `asyncio.gather`.
+        """
+        from urllib.parse import urlparse
+
+        if access_token is None:
+            access_token = C.get_global_access_token()
+
+        aistudio_base_url = os.getenv("AISTUDIO_HUB_BASE_URL", cls._AISTUDIO_HUB_BASE_URL)
+        parsed_url = urlparse(aistudio_base_url)
+        tool_url = parsed_url._replace(netloc=f"tool-{tool_id}.{parsed_url.netloc}").geturl()
+        return await cls.afrom_url(
+            tool_url,
+            version=version,
+            access_token=access_token,
+            file_manager=file_manager,
+            use_cache=use_cache,
+        )
 
     @classmethod
     def from_url(
@@ -267,49 +307,96 @@ class RemoteToolkit:
         version: Optional[str] = None,
         access_token: Optional[str] = None,
         file_manager: Optional[FileManager] = None,
+        *,
+        use_cache: bool = True,
     ) -> RemoteToolkit:
-        # 1. download openapy.yaml file to temp directory
-        if not url.endswith("/"):
-            url += "/"
-        openapi_yaml_url = url + ".well-known/openapi.yaml"
-
-        if version:
-            openapi_yaml_url = openapi_yaml_url + "?version=" + version
+        """load the remote toolkit from url: url/.well-known/openapi.yaml
 
+        Args:
+            url (str): the base url of the remote toolkit
+            version (Optional[str]): the version of the remote toolkit
+            access_token (Optional[str]): the access token to send requests with
+            file_manager (Optional[FileManager]): the file manager of the tools
+            use_cache (bool): whether to revalidate the files cached by previous loads
+                instead of downloading them again
+        """
         if access_token is None:
             access_token = C.get_global_access_token()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            response = requests.get(openapi_yaml_url, headers=cls._get_authorization_headers(access_token))
-            if response.status_code != 200:
-                _logger.debug(f"The resource requested returned the following headers: {response.headers}")
-                raise RemoteToolError(
-                    f"`{openapi_yaml_url}` returned {response.status_code}: {response.text}", stage="Loading"
-                )
+        cache = cls._get_spec_cache(use_cache)
+        headers = cls._get_authorization_headers(access_token)
+        openapi_yaml_url, examples_yaml_url = cls._get_remote_yaml_urls(url, version)
+        spec_dict = cache.get(openapi_yaml_url, headers)
+        examples_dict = cache.get(examples_yaml_url, headers, missing_ok=True)
+        return cls._from_remote_dicts(
+            url, openapi_yaml_url, spec_dict, examples_dict, access_token, file_manager
+        )
 
-            file_content = response.content.decode("utf-8")
-            if not file_content.strip():
-                raise RemoteToolError(f"the content is empty from: {openapi_yaml_url}", stage="Loading")
+    @classmethod
+    async def afrom_url(
+        cls,
+        url: str,
+        version: Optional[str] = None,
+        access_token: Optional[str] = None,
+        file_manager: Optional[FileManager] = None,
+        *,
+        use_cache: bool = True,
+    ) -> RemoteToolkit:
+        """Asynchronous version of `from_url`."""
+        if access_token is None:
+            access_token = C.get_global_access_token()
 
-            file_path = os.path.join(temp_dir, "openapi.yaml")
-            with open(file_path, "w+", encoding="utf-8") as f:
-                f.write(file_content)
+        cache = cls._get_spec_cache(use_cache)
+        headers = cls._get_authorization_headers(access_token)
+        openapi_yaml_url, examples_yaml_url = cls._get_remote_yaml_urls(url, version)
+        spec_dict, examples_dict = await asyncio.gather(
+            cache.aget(openapi_yaml_url, headers), cache.aget(examples_yaml_url, headers, missing_ok=True)
+        )
+        return cls._from_remote_dicts(
+            url, openapi_yaml_url, spec_dict, examples_dict, access_token, file_manager
+        )
 
-            spec_dict: dict = read_from_filename(file_path)[0]  # type: ignore
+    @classmethod
+    def _get_spec_cache(cls, use_cache: bool) -> ToolkitSpecCache:
+        if use_cache:
+            return get_default_toolkit_cache()
+        # An empty in-memory cache downloads the files unconditionally.
+        return ToolkitSpecCache()
 
-            url = url.strip("/")
+    @classmethod
+    def _get_remote_yaml_urls(cls, url: str, version: Optional[str]) -> Tuple[str, str]:
+        if not url.endswith("/"):
+            url += "/"
+        openapi_yaml_url = url + ".well-known/openapi.yaml"
+        if version:
+            openapi_yaml_url = openapi_yaml_url + "?version=" + version
+        examples_yaml_url = url + ".well-known/examples.yaml"
+        return openapi_yaml_url, examples_yaml_url
 
-            if "servers" not in spec_dict:
-                spec_dict["servers"] = [{"url": url}]
+    @classmethod
+    def _from_remote_dicts(
+        cls,
+        url: str,
+        openapi_yaml_url: str,
+        spec_dict: Optional[Dict[str, Any]],
+        examples_dict: Optional[Dict[str, Any]],
+        access_token: Optional[str],
+        file_manager: Optional[FileManager],
+    ) -> RemoteToolkit:
+        assert spec_dict is not None
+        url = url.strip("/")
 
-            toolkit = RemoteToolkit.from_openapi_dict(
-                spec_dict, access_token=access_token, file_manager=file_manager
-            )
-            for server in toolkit.servers:
-                server.url = url
+        if "servers" not in spec_dict:
+            spec_dict["servers"] = [{"url": url}]
 
-            toolkit.examples = cls.load_remote_examples_yaml(url, access_token)
+        toolkit = RemoteToolkit.from_openapi_dict(
+            spec_dict, access_token=access_token, file_manager=file_manager
+        )
+        for server in toolkit.servers:
+            server.url = url
 
+        if examples_dict is not None:
+            toolkit.examples = cls._load_examples_content(examples_dict)
         return toolkit
 
     @classmethod
@@ -319,36 +406,16 @@ class RemoteToolkit:
         Args:
             url (str): the base url of the remote toolkit
         """
-        if not url.endswith("/"):
-            url += "/"
-        examples_yaml_url = url + ".well-known/examples.yaml"
-        if not url_file_exists(examples_yaml_url, cls._get_authorization_headers(access_token)):
-            return []
-
         if access_token is None:
             access_token = C.get_global_access_token()
 
-        examples = []
-        with tempfile.TemporaryDirectory() as temp_dir:
-            response = requests.get(examples_yaml_url, headers=cls._get_authorization_headers(access_token))
-            if response.status_code != 200:
-                _logger.debug(f"The resource requested returned the following headers: {response.headers}")
-                raise RemoteToolError(
-                    f"`{examples_yaml_url}` returned {response.status_code}: {response.text}",
-                    stage="Loading",
-                )
-
-            file_content = response.content.decode("utf-8")
-            if not file_content.strip():
-                raise RemoteToolError(f"the content is empty from: {examples_yaml_url}", stage="Loading")
-
-            file_path = os.path.join(temp_dir, "examples.yaml")
-            with open(file_path, "w+", encoding="utf-8") as f:
-                f.write(file_content)
-
-            examples = cls.load_examples_yaml(file_path)
-
-        return examples
+        _, examples_yaml_url = cls._get_remote_yaml_urls(url, None)
+        examples_dict = get_default_toolkit_cache().get(
+            examples_yaml_url, cls._get_authorization_headers(access_token), missing_ok=True
+        )
+        if examples_dict is None:
+            return []
+        return cls._load_examples_content(examples_dict)
 
     @classmethod
     def load_examples_dict(cls, examples_dict: Dict[str, Any]) -> List[Message]:
@@ -388,6 +455,10 @@ class RemoteToolkit:
             List[Message]: the list of messages
         """
         content: dict = read_from_filename(file)[0]  # type: ignore
+        return cls._load_examples_content(content)
+
+    @classmethod
+    def _load_examples_content(cls, content: Dict[str, Any]) -> List[Message]:
         if len(content) == 0 or "examples" not in content:
             raise RemoteToolError("invalid examples configuration file", stage="Loading")
         return cls.load_examples_dict(content)
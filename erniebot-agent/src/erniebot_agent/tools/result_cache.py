@@ -0,0 +1,206 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple, TypeVar
+
+from erniebot_agent.file import File
+from erniebot_agent.file.local_file import LocalFile
+
+_logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class ToolResultCache(object):
+    """Cache of the results of a deterministic tool.
+
+    Results are cached in memory as an LRU with bounded size. An entry
+    expires `ttl` seconds after it is added. If `cache_dir` is given, entries
+    are also persisted, so that they can be reused across processes.
+
+    Args:
+        ttl: Time to live of an entry, in seconds. If None, entries never
+            expire.
+        max_size: Maximum number of entries kept in memory.
+        cache_dir: Directory to persist the entries in. If None, entries are
+            only cached in memory.
+    """
+
+    def __init__(
+        self, *, ttl: Optional[float] = None, max_size: int = 1024, cache_dir: Optional[str] = None
+    ) -> None:
+        if ttl is not None and ttl <= 0:
+            raise ValueError("`ttl` must be positive.")
+        if max_size <= 0:
+            raise ValueError("`max_size` must be positive.")
+        self.ttl = ttl
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        # Maps keys to the expiration times and the results encoded as JSON.
+        self._entries: collections.OrderedDict[str, Tuple[Optional[float], str]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Gets a cached result, or None if it is missing or has expired."""
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                entry = self._load_entry(key)
+                if entry is None:
+                    return None
+                self._entries[key] = entry
+            expires_at, encoded = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove_entry(key)
+                return None
+            self._entries.move_to_end(key)
+            self._evict()
+        # Each caller gets a new copy of the result.
+        return json.loads(encoded)
+
+    def set(self, key: str, result: Any) -> None:
+        """Caches a result, which must be serializable as JSON."""
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        entry = (expires_at, json.dumps(result, ensure_ascii=False))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self._save_entry(key, entry)
+
+    def clear(self) -> None:
+        """Removes all results from the cache."""
+        with self._lock:
+            self._entries.clear()
+            if self.cache_dir is not None and os.path.isdir(self.cache_dir):
+                for file_name in os.listdir(self.cache_dir):
+                    if file_name.endswith(".json"):
+                        os.remove(os.path.join(self.cache_dir, file_name))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        # Entries evicted from memory stay on disk.
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _remove_entry(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self.cache_dir is not None:
+            try:
+                os.remove(self._get_entry_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _load_entry(self, key: str) -> Optional[Tuple[Optional[float], str]]:
+        if self.cache_dir is None:
+            return None
+        path = self._get_entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            _logger.warning("Failed to read the cached tool result: %s", e)
+            return None
+        # Different keys can share a path only in the case of a hash collision.
+        if data.get("key", None) != key:
+            return None
+        return data["expires_at"], data["result"]
+
+    def _save_entry(self, key: str, entry: Tuple[Optional[float], str]) -> None:
+        if self.cache_dir is None:
+            return
+        expires_at, encoded = entry
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "expires_at": expires_at, "result": encoded}, f, ensure_ascii=False)
+            os.replace(temp_path, self._get_entry_path(key))
+        except OSError as e:
+            _logger.warning("Failed to persist the tool result: %s", e)
+
+    def _get_entry_path(self, key: str) -> str:
+        assert self.cache_dir is not None
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+
+async def create_tool_result_cache_key(
+    tool_name: str, tool_args: Dict[str, Any], input_files: Sequence[File]
+) -> str:
+    """Creates the key of the result of a tool call.
+
+    The key consists of the tool name and the arguments in canonical JSON
+    form. The IDs of local files in the arguments are replaced by the hashes
+    of the file contents, so that a result is not reused after a file is
+    modified, and can be reused for another file with the same contents.
+    Remote files are identified by their IDs, as their contents never change.
+    """
+    canonical_args = json.dumps(tool_args, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    for file in input_files:
+        if isinstance(file, LocalFile):
+            digest = hashlib.sha256(await file.read_contents()).hexdigest()
+            canonical_args = canonical_args.replace(json.dumps(file.id), json.dumps(f"sha256:{digest}"))
+    return f"{tool_name}:{canonical_args}"
+
+
+def cache_results(
+    tool: Optional[_T] = None,
+    *,
+    ttl: Optional[float] = None,
+    max_size: int = 1024,
+    cache_dir: Optional[str] = None,
+) -> Any:
+    """Enables result caching for a tool class or a tool instance.
+
+    The agent returns the cached result instead of calling the tool again
+    with the same arguments. Only use it for deterministic tools. Results
+    that contain files are never cached.
+
+    Examples:
+        >>> @cache_results(ttl=600)
+        ... class WeatherTool(Tool):
+        ...     ...
+        >>> remote_tool = cache_results(toolkit.get_tool("OCR"), ttl=3600)
+
+    Args:
+        tool: A subclass of `BaseTool` or a tool. If None, a decorator is
+            returned.
+        ttl: Time to live of a result, in seconds. If None, results never
+            expire.
+        max_size: Maximum number of results kept in memory.
+        cache_dir: Directory to persist the results in. If None, results are
+            only cached in memory.
+    """
+
+    def _decorate(tool: _T) -> _T:
+        setattr(tool, "result_cache", ToolResultCache(ttl=ttl, max_size=max_size, cache_dir=cache_dir))
+        return tool
+
+    if tool is None:
+        return _decorate
+    return _decorate(tool)
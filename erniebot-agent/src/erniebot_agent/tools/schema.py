@@ -14,8 +14,12 @@
 
 from __future__ import annotations
 
+import collections
+import hashlib
 import inspect
+import json
 import logging
+import threading
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Dict, List, Optional, Type, Union, get_args
@@ -30,6 +34,11 @@ INVALID_FIELD_NAME = "__invalid_field_name__"
 
 _logger = logging.getLogger(__name__)
 
+# Views compiled from OpenAPI schemas, keyed by the digests of the schemas.
+_COMPILED_VIEWS_CACHE_SIZE = 1024
+_compiled_views: collections.OrderedDict[str, Type[ToolParameterView]] = collections.OrderedDict()
+_compiled_views_lock = threading.Lock()
+
 
 def is_optional_type(type: Optional[Type]):
     args = get_args(type)
@@ -39,6 +48,19 @@ def is_optional_type(type: Optional[Type]):
     return len([arg for arg in args if arg is None.__class__]) > 0
 
 
+def get_schema_digest(schema: Any) -> str:
+    """get the digest of a json schema, which does not depend on the order of keys
+
+    Args:
+        schema (Any): the json schema
+
+    Returns:
+        str: the hex digest
+    """
+    canonical = json.dumps(schema, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=repr)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 def get_typing_list_type(type):
     """get typing.List[T] element type
 
@@ -232,13 +254,34 @@ class ToolParameterView(BaseModel):
     @classmethod
     def from_openapi_dict(cls, schema: dict) -> Type[ToolParameterView]:
         """parse openapi component schemas to ParameterView
+
+        The views are cached by the content of the schemas, so that toolkits
+        with the same schemas share the view classes instead of creating them
+        again. The returned classes should therefore not be modified.
+
         Args:
-            response_or_returns (dict): the content of status code
+            schema (dict): the openapi schema of the parameters
 
         Returns:
-            _type_: _description_
+            Type[ToolParameterView]: the view class
         """
+        digest = get_schema_digest(schema)
+        with _compiled_views_lock:
+            view = _compiled_views.get(digest, None)
+            if view is not None:
+                _compiled_views.move_to_end(digest)
+                return view
+
+        # Sub-schemas are compiled (and cached) recursively, so the lock is not held here.
+        view = cls._compile_openapi_dict(schema)
+        with _compiled_views_lock:
+            _compiled_views[digest] = view
+            if len(_compiled_views) > _COMPILED_VIEWS_CACHE_SIZE:
+                _compiled_views.popitem(last=False)
+        return view
 
+    @classmethod
+    def _compile_openapi_dict(cls, schema: dict) -> Type[ToolParameterView]:
         # TODO(wj-Mcat): to load Optional field
         fields = {}
         for field_name, field_dict in schema.get("properties", {}).items():
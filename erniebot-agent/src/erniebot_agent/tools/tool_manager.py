@@ -16,7 +16,9 @@ from __future__ import annotations
 import functools
 import json
 import types
-from typing import Callable, Dict, Iterable, List, final
+from typing import Callable, Dict, Iterable, List, Optional, final
+
+import erniebot
 
 from erniebot_agent.tools.base import BaseTool, Tool
 from erniebot_agent.tools.utils import get_fastapi_openapi
@@ -28,11 +30,16 @@ class ToolManager(object):
 
     This implementation is based on `ToolsManager` in
     https://github.com/deepset-ai/haystack/blob/main/haystack/agents/base.py
+
+    The function call schemas of the tools are computed once and reused until
+    a tool is added or removed.
     """
 
     def __init__(self, tools: Iterable[BaseTool]) -> None:
         super().__init__()
         self._tools: Dict[str, BaseTool] = {}
+        self._tool_schemas: Optional[List[dict]] = None
+        self._prepared_tool_schemas: Optional[erniebot.PreparedFunctions] = None
         for tool in tools:
             self.add_tool(tool)
 
@@ -44,6 +51,7 @@ class ToolManager(object):
         if tool_name in self._tools:
             raise ValueError(f"Name {repr(tool_name)} is already registered.")
         self._tools[tool_name] = tool
+        self._invalidate_tool_schemas()
 
     def remove_tool(self, tool: BaseTool) -> None:
         tool_name = tool.tool_name
@@ -52,6 +60,7 @@ class ToolManager(object):
         if self._tools[tool_name] is not tool:
             raise RuntimeError(f"The tool with the registered name {repr(tool_name)} is not the given tool.")
         self._tools.pop(tool_name)
+        self._invalidate_tool_schemas()
 
     def get_tool(self, tool_name: str) -> BaseTool:
         if tool_name not in self._tools:
@@ -66,11 +75,31 @@ class ToolManager(object):
 
     def get_tool_names_with_descriptions(self) -> str:
         return "\n".join(
-            f"{name}:{json.dumps(tool.function_call_schema())}" for name, tool in self._tools.items()
+            f"{name}:{json.dumps(schema)}" for name, schema in zip(self._tools, self._get_tool_schemas())
         )
 
-    def get_tool_schemas(self):
-        return [tool.function_call_schema() for tool in self._tools.values()]
+    def get_tool_schemas(self) -> List[dict]:
+        """Get the function call schemas of the tools.
+
+        The schemas are shared between calls and should not be modified.
+        """
+        return list(self._get_tool_schemas())
+
+    def get_prepared_tool_schemas(self) -> erniebot.PreparedFunctions:
+        """Get the function call schemas of the tools, encoded as JSON once
+        for all requests to ERNIE Bot."""
+        if self._prepared_tool_schemas is None:
+            self._prepared_tool_schemas = erniebot.PreparedFunctions(self._get_tool_schemas())
+        return self._prepared_tool_schemas
+
+    def _get_tool_schemas(self) -> List[dict]:
+        if self._tool_schemas is None:
+            self._tool_schemas = [tool.function_call_schema() for tool in self._tools.values()]
+        return self._tool_schemas
+
+    def _invalidate_tool_schemas(self) -> None:
+        self._tool_schemas = None
+        self._prepared_tool_schemas = None
 
     def serve(self, port: int = 5000):
         """start the local server for toolkit
@@ -0,0 +1,252 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from jsonschema_path.handlers import file_handler
+
+from erniebot_agent.tools.transport import get_transport
+from erniebot_agent.utils import config_from_environ as C
+from erniebot_agent.utils.exceptions import RemoteToolError
+
+_logger = logging.getLogger(__name__)
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class ToolkitSpecCache(object):
+    """Cache of the YAML files (e.g., openapi.yaml) of remote toolkits.
+
+    Files are cached by URL, including the version, and by a hash of the
+    `Authorization` header, so that a file is never shared across
+    credentials. Files are cached together with their `ETag` and
+    `Last-Modified` headers, and are revalidated with conditional requests,
+    so that an unchanged file is neither downloaded nor parsed again. A file
+    is not revalidated while it is fresh according to the `Cache-Control`
+    header of the response.
+
+    Args:
+        cache_dir: Directory to persist the files in. If None, files are
+            only cached in memory.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None) -> None:
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, url: str, headers: Dict[str, str], *, missing_ok: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Gets the parsed content of a file.
+
+        Args:
+            url: URL of the file.
+            headers: Headers of the request.
+            missing_ok: If True, None is returned instead of raising an error
+                when the file cannot be fetched.
+
+        Returns:
+            The parsed content of the file.
+        """
+        key = _get_cache_key(url, headers)
+        entry, request_headers = self._prepare_request(key, headers)
+        if entry is not None and request_headers is None:
+            return copy.deepcopy(entry["data"])
+        # Use the same timeout as the asynchronous version.
+        timeout = get_transport(url).timeout
+        try:
+            response = requests.get(url, headers=request_headers, timeout=timeout)
+        except requests.Timeout as e:
+            raise RemoteToolError(
+                f"The request to `{url}` timed out after {timeout} seconds.", stage="Loading"
+            ) from e
+        return self._handle_response(
+            key, url, entry, response.status_code, response.headers, response.content, missing_ok
+        )
+
+    async def aget(
+        self, url: str, headers: Dict[str, str], *, missing_ok: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Asynchronous version of `get`."""
+        key = _get_cache_key(url, headers)
+        entry, request_headers = self._prepare_request(key, headers)
+        if entry is not None and request_headers is None:
+            return copy.deepcopy(entry["data"])
+        response = await get_transport(url).request("get", url, headers=request_headers)
+        return self._handle_response(
+            key, url, entry, response.status_code, response.headers, response.content, missing_ok
+        )
+
+    def clear(self) -> None:
+        """Removes all files from the cache."""
+        with self._lock:
+            self._entries.clear()
+            if self.cache_dir is not None and os.path.isdir(self.cache_dir):
+                for file_name in os.listdir(self.cache_dir):
+                    if file_name.endswith(".json"):
+                        os.remove(os.path.join(self.cache_dir, file_name))
+
+    def _prepare_request(
+        self, key: str, headers: Dict[str, str]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+        # Returns the cached entry and the headers of the request to send, or
+        # None if the entry is fresh.
+        entry = self._load_entry(key)
+        if entry is None:
+            return None, dict(headers)
+        if entry.get("expires_at", 0) > time.time():
+            return entry, None
+        request_headers = dict(headers)
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+        return entry, request_headers
+
+    def _handle_response(
+        self,
+        key: str,
+        url: str,
+        entry: Optional[Dict[str, Any]],
+        status_code: int,
+        headers: Mapping[str, str],
+        content: bytes,
+        missing_ok: bool,
+    ) -> Optional[Dict[str, Any]]:
+        if status_code == 304 and entry is not None:
+            _logger.debug("`%s` is not modified.", url)
+            expires_at = _get_expiration_time(headers)
+            if expires_at is not None:
+                entry = {**entry, "expires_at": expires_at}
+                self._save_entry(key, entry)
+            return copy.deepcopy(entry["data"])
+        if status_code != 200:
+            if missing_ok:
+                return None
+            _logger.debug(f"The resource requested returned the following headers: {headers}")
+            raise RemoteToolError(
+                f"`{url}` returned {status_code}: {content.decode('utf-8', errors='replace')}",
+                stage="Loading",
+            )
+
+        file_content = content.decode("utf-8")
+        if not file_content.strip():
+            raise RemoteToolError(f"the content is empty from: {url}", stage="Loading")
+        try:
+            data = file_handler(io.StringIO(file_content))
+        except Exception as e:
+            raise RemoteToolError(f"invalid yaml file from: {url}", stage="Loading") from e
+
+        if "no-store" not in headers.get("Cache-Control", ""):
+            new_entry = {
+                "key": key,
+                "url": url,
+                "etag": headers.get("ETag", None),
+                "last_modified": headers.get("Last-Modified", None),
+                "expires_at": _get_expiration_time(headers) or 0,
+                "data": data,
+            }
+            self._save_entry(key, new_entry)
+        return copy.deepcopy(data)
+
+    def _load_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None or self.cache_dir is None:
+                return entry
+            path = self._get_entry_path(key)
+            if not os.path.exists(path):
+                return None
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError) as e:
+                _logger.warning("Failed to read the cached file of `%s`: %s", key, e)
+                return None
+            # Entries written by older versions are not keyed by credentials.
+            if entry.get("key", None) != key:
+                return None
+            self._entries[key] = entry
+            return entry
+
+    def _save_entry(self, key: str, entry: Dict[str, Any]) -> None:
+        url = entry["url"]
+        with self._lock:
+            self._entries[key] = entry
+            if self.cache_dir is None:
+                return
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Write to a temporary file first, so that other processes
+                # never read a partially written file.
+                fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(temp_path, self._get_entry_path(key))
+            except OSError as e:
+                _logger.warning("Failed to cache the file of `%s`: %s", url, e)
+
+    def _get_entry_path(self, key: str) -> str:
+        assert self.cache_dir is not None
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def _get_cache_key(url: str, headers: Mapping[str, str]) -> str:
+    # Only a hash of the credentials is stored.
+    authorization = next((val for name, val in headers.items() if name.lower() == "authorization"), "")
+    return f"{url}#{hashlib.sha256(authorization.encode('utf-8')).hexdigest()}"
+
+
+def _get_expiration_time(headers: Mapping[str, str]) -> Optional[float]:
+    cache_control = headers.get("Cache-Control", "")
+    if "no-cache" in cache_control:
+        return None
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    if match is None:
+        return None
+    return time.time() + int(match.group(1))
+
+
+_default_cache: Optional[ToolkitSpecCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_toolkit_cache() -> ToolkitSpecCache:
+    """Returns the cache used by `RemoteToolkit`.
+
+    Files are persisted in the directory specified by the environment
+    variable `EB_AGENT_TOOLKIT_CACHE_DIR`, or in `~/.cache/erniebot_agent/toolkits`.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            cache_dir = C.get_toolkit_cache_dir() or os.path.join(
+                os.path.expanduser("~"), ".cache", "erniebot_agent", "toolkits"
+            )
+            _default_cache = ToolkitSpecCache(cache_dir)
+        return _default_cache
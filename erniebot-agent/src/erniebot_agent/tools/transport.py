@@ -0,0 +1,217 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+import asyncio_atexit  # type: ignore
+
+from erniebot_agent.utils.exceptions import RemoteToolError
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60.0
+
+# Status codes that indicate that the request was not processed.
+_RETRY_STATUS_CODES = frozenset({429, 503})
+# Status codes that gateways may return after the request has been processed.
+_IDEMPOTENT_RETRY_STATUS_CODES = frozenset({502, 504})
+_IDEMPOTENT_METHODS = frozenset({"get", "head", "put", "delete", "options"})
+
+
+class RemoteToolResponse(object):
+    """Response of a remote tool, with the interface of `requests.Response`
+    that `parse_response` relies on."""
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class RemoteToolTransport(object):
+    """Sends requests to a toolkit server over pooled keep-alive connections.
+
+    A connection pool is created for each event loop that uses the
+    transport and is closed when the loop exits. Requests that are not
+    processed by the server, e.g., because the connection fails or the
+    server is overloaded, are retried with exponential backoff, or after the
+    delay given by the `Retry-After` header. Timeouts, dropped connections
+    and 502/504 responses from gateways are only retried for idempotent
+    methods, as the tool may have run.
+
+    Args:
+        max_connections: Maximum number of connections in a pool.
+        max_retries: Maximum number of retries of a request.
+        retry_backoff: Delay before the first retry, in seconds.
+        timeout: Default timeout of a request, in seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self._sessions: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, aiohttp.ClientSession
+        ] = weakref.WeakKeyDictionary()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Any] = None,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> RemoteToolResponse:
+        """Sends a request and reads the response.
+
+        The arguments follow `requests.request`. `files` maps the names of
+        multipart fields to the file contents.
+        """
+        method = method.lower()
+        if timeout is None:
+            timeout = self.timeout
+        kwargs: Dict[str, Any] = {
+            "headers": headers,
+            "timeout": aiohttp.ClientTimeout(total=timeout),
+        }
+        if params is not None:
+            kwargs["params"] = _encode_fields(params)
+        if json is not None:
+            kwargs["json"] = json
+
+        retry_status_codes = _RETRY_STATUS_CODES
+        if method in _IDEMPOTENT_METHODS:
+            retry_status_codes = retry_status_codes | _IDEMPOTENT_RETRY_STATUS_CODES
+        session = self._get_session()
+        attempt = 0
+        while True:
+            delay = self.retry_backoff * 2**attempt
+            if data is not None or files is not None:
+                # A form can only be sent once, so a new one is created for each attempt.
+                kwargs["data"] = _create_form_data(data, files)
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status in retry_status_codes and attempt < self.max_retries:
+                        _logger.debug("`%s` returned %d, retrying.", url, response.status)
+                        delay = _get_retry_after(response.headers, delay)
+                    else:
+                        # The whole body is read into memory.
+                        content = await response.read()
+                        return RemoteToolResponse(response.status, response.headers, content)
+            except aiohttp.ClientConnectorError as e:
+                # The request was not sent.
+                if attempt >= self.max_retries:
+                    raise RemoteToolError(f"Failed to connect to `{url}`: {e}", stage="Executing") from e
+                _logger.debug("Failed to connect to `%s`, retrying: %s", url, e)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries or method not in _IDEMPOTENT_METHODS:
+                    if isinstance(e, asyncio.TimeoutError):
+                        message = f"The request to `{url}` timed out after {timeout} seconds."
+                    else:
+                        message = f"The request to `{url}` failed: {e}"
+                    raise RemoteToolError(message, stage="Executing") from e
+                _logger.debug("The request to `%s` failed, retrying: %r", url, e)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self) -> None:
+        """Closes the connection pool of the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop, None)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                # The URLs are already encoded by the toolkit.
+                requote_redirect_url=False,
+            )
+            self._sessions[loop] = session
+            asyncio_atexit.register(self.close)
+        return session
+
+
+def _get_retry_after(headers: Mapping[str, str], default: float) -> float:
+    # Only the delay-seconds form of `Retry-After` is supported.
+    try:
+        delay = float(headers.get("Retry-After", ""))
+    except ValueError:
+        return default
+    return delay if delay >= 0 else default
+
+
+_transports: Dict[str, RemoteToolTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(server_url: str) -> RemoteToolTransport:
+    """Returns the transport shared by the tools of a toolkit server."""
+    parts = urlsplit(server_url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    with _transports_lock:
+        transport = _transports.get(key, None)
+        if transport is None:
+            transport = _transports[key] = RemoteToolTransport()
+    return transport
+
+
+def _encode_fields(fields: Dict[str, Any]) -> List[Tuple[str, str]]:
+    # Encode values like `requests` does: sequences become repeated fields,
+    # and None is dropped.
+    encoded = []
+    for key, value in fields.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            if item is not None:
+                encoded.append((key, item if isinstance(item, str) else str(item)))
+    return encoded
+
+
+def _create_form_data(data: Optional[Dict[str, Any]], files: Optional[Dict[str, Any]]) -> aiohttp.FormData:
+    form_data = aiohttp.FormData(_encode_fields(data or {}))
+    for key, content in (files or {}).items():
+        form_data.add_field(key, content, filename=key)
+    return form_data
@@ -1,9 +1,11 @@
 import base64
+import collections
 import inspect
 import logging
+import threading
 import typing
 from copy import deepcopy
-from typing import Any, Dict, Optional, Type, no_type_check
+from typing import Any, Dict, Optional, Type, Union, no_type_check
 
 from openapi_spec_validator import validate
 from openapi_spec_validator.readers import read_from_filename
@@ -18,13 +20,20 @@ from erniebot_agent.file.protocol import (
 from erniebot_agent.tools.schema import (
     ToolParameterView,
     get_args,
+    get_schema_digest,
     get_typing_list_type,
 )
+from erniebot_agent.tools.transport import RemoteToolResponse
 from erniebot_agent.utils.common import get_file_suffix, import_module, is_json_response
 from erniebot_agent.utils.exceptions import RemoteToolError
 
 _logger = logging.getLogger(__name__)
 
+# Digests of the openapi specs that passed validation.
+_VALIDATED_SPECS_CACHE_SIZE = 256
+_validated_spec_digests: typing.OrderedDict[str, None] = collections.OrderedDict()
+_validated_spec_digests_lock = threading.Lock()
+
 
 def tool_response_contains_file(element: Any):
     if isinstance(element, str):
@@ -50,8 +59,18 @@ def validate_openapi_yaml(yaml_file: str) -> bool:
         bool: whether yaml file is valid
     """
     yaml_dict = read_from_filename(yaml_file)[0]
+    # Validating a spec is slow, so the results for valid specs are cached.
+    digest = get_schema_digest(yaml_dict)
+    with _validated_spec_digests_lock:
+        if digest in _validated_spec_digests:
+            _validated_spec_digests.move_to_end(digest)
+            return True
     try:
         validate(yaml_dict)
+        with _validated_spec_digests_lock:
+            _validated_spec_digests[digest] = None
+            if len(_validated_spec_digests) > _VALIDATED_SPECS_CACHE_SIZE:
+                _validated_spec_digests.popitem(last=False)
         return True
     except Exception as e:  # type: ignore
         _logger.error(e)
@@ -385,7 +404,7 @@ async def parse_json_response(
 
 
 async def parse_response(
-    response: Response,
+    response: Union[Response, RemoteToolResponse],
     file_manager: FileManager,
     file_metadata: Dict[str, str] = {},
     tool_parameter_view: Optional[Type[ToolParameterView]] = None,
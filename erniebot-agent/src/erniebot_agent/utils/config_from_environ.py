@@ -32,6 +32,10 @@ def get_logging_file_path() -> Optional[str]:
     return _get_val_from_env_var("EB_AGENT_LOGGING_FILE")
 
 
+def get_toolkit_cache_dir() -> Optional[str]:
+    return _get_val_from_env_var("EB_AGENT_TOOLKIT_CACHE_DIR")
+
+
 def get_global_aksk() -> Tuple[Union[str, None], Union[str, None]]:
     return (_get_val_from_env_var("EB_AGENT_AK"), _get_val_from_env_var("EB_AGENT_SK"))
 
@@ -1,13 +1,23 @@
+import asyncio
 import json
+import time
 
 import pytest
 
 from erniebot_agent.agents import FunctionAgent
-from erniebot_agent.memory import AIMessage, HumanMessage
+from erniebot_agent.agents.schema import (
+    LLMTokenEvent,
+    RunEndEvent,
+    StepEvent,
+    ToolEndEvent,
+    ToolStartEvent,
+)
+from erniebot_agent.memory import AIMessage, HumanMessage, SlidingWindowMemory
 from erniebot_agent.memory.messages import FunctionCall
 from tests.unit_tests.testing_utils.components import CountingCallbackHandler
 from tests.unit_tests.testing_utils.mocks.mock_chat_models import (
     FakeERNIEBotWithPresetResponses,
+    FakeERNIEBotWithStreamingResponses,
     FakeSimpleChatModel,
 )
 from tests.unit_tests.testing_utils.mocks.mock_memory import FakeMemory
@@ -231,3 +241,133 @@ async def test_function_agent_system():
     )
     response = await agent.run("Run!")
     assert "Recieved system message" in response.text
+
+
+@pytest.mark.asyncio
+async def test_function_agent_run_stream(identity_tool):
+    function_call = FunctionCall(
+        name=identity_tool.tool_name, thoughts="", arguments=json.dumps({"param": "test"})
+    )
+    callback_handler = CountingCallbackHandler()
+    agent = FunctionAgent(
+        llm=FakeERNIEBotWithStreamingResponses(
+            [AIMessage("", function_call=function_call), AIMessage("Done.", function_call=None)]
+        ),
+        tools=[identity_tool],
+        memory=FakeMemory(),
+        callbacks=[callback_handler],
+    )
+
+    events = [event async for event in agent.run_stream("Run!")]
+
+    assert [type(event) for event in events] == [
+        ToolStartEvent,
+        ToolEndEvent,
+        StepEvent,
+        LLMTokenEvent,
+        LLMTokenEvent,
+        LLMTokenEvent,
+        RunEndEvent,
+    ]
+    assert events[0].tool_name == identity_tool.tool_name
+    assert json.loads(events[1].response.json) == {"param": "test"}
+    assert "".join(event.token for event in events if isinstance(event, LLMTokenEvent)) == "Done."
+    response = events[-1].response
+    assert response.text == "Done."
+    assert response.steps == [events[2].step]
+    assert callback_handler.llm_tokens == 3
+    assert callback_handler.run_ends == 1
+    assert agent.memory.get_messages()[-1].content == "Done."
+
+
+@pytest.mark.asyncio
+async def test_function_agent_concurrent_first_tools():
+    async def _sleep(seconds):
+        await asyncio.sleep(seconds)
+        return {"seconds": seconds}
+
+    tools = [
+        FakeTool(
+            name=f"sleep_tool_{i}",
+            description="This tool sleeps for the given number of seconds.",
+            parameters={"type": "object", "properties": {"seconds": {"type": "number"}}},
+            responses={"type": "object", "properties": {"seconds": {"type": "number"}}},
+            function=_sleep,
+        )
+        for i in range(3)
+    ]
+    # The first tool finishes last.
+    durations = [0.3, 0.1, 0.2]
+    llm = FakeERNIEBotWithPresetResponses(
+        responses=[
+            AIMessage(
+                "",
+                function_call=FunctionCall(
+                    name=tool.tool_name, thoughts="", arguments=json.dumps({"seconds": seconds})
+                ),
+            )
+            for tool, seconds in zip(tools, durations)
+        ]
+        + [AIMessage("Done.", function_call=None)]
+    )
+    agent = FunctionAgent(
+        llm=llm,
+        tools=tools,
+        memory=FakeMemory(),
+        first_tools=tools,
+        max_concurrent_tool_calls=3,
+    )
+
+    start_time = time.monotonic()
+    response = await agent.run("Run!")
+    assert time.monotonic() - start_time < sum(durations)
+
+    assert response.status == "FINISHED"
+    assert [step.info["tool_name"] for step in response.steps] == [tool.tool_name for tool in tools]
+    for step, seconds in zip(response.steps, durations):
+        assert step.elapsed_time >= seconds
+    function_messages = [message for message in response.chat_history if message.role == "function"]
+    assert [message.name for message in function_messages] == [tool.tool_name for tool in tools]
+
+
+@pytest.mark.asyncio
+async def test_function_agent_sessions(identity_tool):
+    agent = FunctionAgent(
+        llm=FakeERNIEBotWithPresetResponses([AIMessage("Done.", function_call=None)] * 4),
+        tools=[identity_tool],
+        system="You are a helpful bot.",
+    )
+    sessions = [agent.create_session() for _ in range(3)]
+
+    assert all(isinstance(session, FunctionAgent) for session in sessions)
+    assert all(session.get_tools() == agent.get_tools() for session in sessions)
+    assert all(session.memory.msg_manager.system_message == agent.system for session in sessions)
+
+    await asyncio.gather(*(session.run(f"Run {i}!") for i, session in enumerate(sessions)))
+    for i, session in enumerate(sessions):
+        messages = session.memory.get_messages()
+        assert [message.content for message in messages] == [f"Run {i}!", "Done."]
+    assert len(agent.memory.get_messages()) == 0
+
+
+@pytest.mark.asyncio
+async def test_function_agent_session_memory_keeps_limits(identity_tool):
+    agent = FunctionAgent(
+        llm=FakeERNIEBotWithPresetResponses([]),
+        tools=[identity_tool],
+        memory=SlidingWindowMemory(max_round=2),
+        system="You are a helpful bot.",
+    )
+    agent.memory.add_message(HumanMessage("Hi!"))
+    session = agent.create_session()
+
+    assert isinstance(session.memory, SlidingWindowMemory)
+    assert session.memory is not agent.memory
+    assert session.memory.max_round == 2
+    assert session.memory.get_messages() == []
+    assert session.memory.msg_manager.system_message == agent.system
+    for i in range(5):
+        session.memory.add_message(HumanMessage(f"Question {i}"))
+        session.memory.add_message(AIMessage(f"Answer {i}", function_call=None))
+    assert len(session.memory.get_messages()) == 4
+    assert len(agent.memory.get_messages()) == 1
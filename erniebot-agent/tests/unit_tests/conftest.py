@@ -0,0 +1,12 @@
+import pytest
+
+from erniebot_agent.tools import toolkit_cache
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolate_toolkit_cache(tmp_path_factory):
+    # Do not read or write the toolkit cache in the home directory.
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("EB_AGENT_TOOLKIT_CACHE_DIR", str(tmp_path_factory.mktemp("toolkits")))
+        mp.setattr(toolkit_cache, "_default_cache", None)
+        yield
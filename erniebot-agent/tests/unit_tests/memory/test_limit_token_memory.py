@@ -2,7 +2,13 @@ import unittest
 
 import pytest
 
-from erniebot_agent.memory import HumanMessage, LimitTokensMemory, SystemMessage
+from erniebot_agent.memory import (
+    AIMessage,
+    FunctionMessage,
+    HumanMessage,
+    LimitTokensMemory,
+    SystemMessage,
+)
 from tests.unit_tests.testing_utils.mocks.mock_chat_models import FakeSimpleChatModel
 
 
@@ -60,6 +66,48 @@ class Testlimit_tokenMemory(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(memory.mem_token_count <= 100)
         self.assertTrue(len(memory.get_messages()) < 2 * k)
 
+    def test_limit_token_memory_prune_human_messages(self):
+        memory = LimitTokensMemory(30)
+        for i in range(20):
+            # 10 tokens each
+            memory.add_message(HumanMessage(content="一二三四五六七八九" + str(i)))
+            self.assertLessEqual(memory.mem_token_count, 30)
+        self.assertEqual(len(memory.get_messages()), 3)
+        self.assertEqual(memory.get_messages()[-1].content, "一二三四五六七八九19")
+
+    def test_limit_token_memory_running_token_count(self):
+        memory = LimitTokensMemory(None)
+        memory.add_message(HumanMessage(content="你好"))
+        memory.add_message(
+            AIMessage(content="你好呀", token_usage={"prompt_tokens": 5, "completion_tokens": 3})
+        )
+        # The prompt tokens include the history, so they are not counted.
+        self.assertEqual(memory.mem_token_count, 2 + 3)
+        memory.msg_manager.pop_message()
+        self.assertEqual(memory.mem_token_count, 3)
+        memory.clear_chat_history()
+        self.assertEqual(memory.mem_token_count, 0)
+
+    def test_limit_token_memory_prune_rounds(self):
+        memory = LimitTokensMemory(1000)
+        for i in range(20):
+            # 100 tokens each
+            memory.add_message(HumanMessage(content="一二三四五六七八九" * 11 + str(i)))
+            memory.add_message(FunctionMessage(name="tool", content="一二三四五六七八九" * 11 + str(i)))
+            # Usage is reported as by ERNIE Bot, with the whole prompt.
+            prompt_tokens = memory.mem_token_count + 10
+            memory.add_message(
+                AIMessage(
+                    content="一二三四五六七八九" * 11 + str(i),
+                    token_usage={"prompt_tokens": prompt_tokens, "completion_tokens": 100},
+                )
+            )
+            self.assertLessEqual(memory.mem_token_count, 1000)
+            self.assertIsInstance(memory.get_messages()[0], HumanMessage)
+        # 3 rounds of 300 tokens are kept.
+        self.assertEqual(len(memory.get_messages()), 9)
+        self.assertEqual(memory.mem_token_count, 900)
+
 
 if __name__ == "__main__":
     unittest.main()
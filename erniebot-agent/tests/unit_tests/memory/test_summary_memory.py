@@ -0,0 +1,137 @@
+import asyncio
+import unittest
+
+from erniebot_agent.chat_models.base import ChatModel
+from erniebot_agent.memory import AIMessage, HumanMessage, SummaryMemory
+from erniebot_agent.memory.summary_memory import SUMMARY_MESSAGE_PREFIX
+
+
+class FakeSummaryChatModel(ChatModel):
+    def __init__(self, error=None):
+        super().__init__("summary_chat_model")
+        self.error = error
+        self.release = asyncio.Event()
+        self.prompts = []
+
+    async def chat(self, messages, *, stream=False, **kwargs):
+        self.prompts.append(messages[-1].content)
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return AIMessage("Summary")
+
+
+def _add_rounds(memory, num_rounds, start=0):
+    for i in range(start, start + num_rounds):
+        # 10 tokens each
+        memory.add_message(HumanMessage("一二三四五六七八九" + str(i)))
+        memory.add_message(AIMessage("一二三四五六七八九" + str(i), token_usage=None))
+
+
+class TestSummaryMemory(unittest.IsolatedAsyncioTestCase):
+    async def test_summarize_in_background(self):
+        llm = FakeSummaryChatModel()
+        memory = SummaryMemory(llm, token_threshold=50, keep_tokens=20)
+        _add_rounds(memory, 3)
+        # The summarization has been scheduled but not started.
+        self.assertEqual(llm.prompts, [])
+
+        _add_rounds(memory, 1, start=3)
+        await asyncio.sleep(0)
+        self.assertEqual(len(llm.prompts), 1)
+        # The messages are available while the summary is being generated.
+        messages = memory.get_messages()
+        self.assertEqual(len(messages), 8)
+
+        llm.release.set()
+        await memory.wait_for_summary()
+        messages = memory.get_messages()
+        self.assertEqual(len(messages), 4)
+        self.assertEqual(messages[0].content, SUMMARY_MESSAGE_PREFIX + "Summary")
+        self.assertIsInstance(messages[1], AIMessage)
+        self.assertEqual(messages[2].content, "一二三四五六七八九3")
+        self.assertLessEqual(memory.msg_manager.token_count, 50)
+
+    async def test_threshold_with_token_usage(self):
+        llm = FakeSummaryChatModel()
+        memory = SummaryMemory(llm, token_threshold=100, keep_tokens=40)
+        for i in range(6):
+            memory.add_message(HumanMessage("一二三四五六七八九" + str(i)))
+            # Usage is reported as by ERNIE Bot, with the whole prompt.
+            memory.add_message(
+                AIMessage(
+                    "一二三四五六七八九" + str(i),
+                    token_usage={
+                        "prompt_tokens": memory.msg_manager.token_count + 10,
+                        "completion_tokens": 10,
+                    },
+                )
+            )
+            await asyncio.sleep(0)
+            # The threshold is exceeded only in the last round.
+            self.assertEqual(len(llm.prompts), 1 if i == 5 else 0)
+
+        llm.release.set()
+        await memory.wait_for_summary()
+        messages = memory.get_messages()
+        self.assertEqual(len(messages), 6)
+        self.assertEqual(messages[0].content, SUMMARY_MESSAGE_PREFIX + "Summary")
+        self.assertEqual(
+            [m.content for m in messages[2:]], [c for i in (4, 5) for c in ["一二三四五六七八九" + str(i)] * 2]
+        )
+
+    async def test_oversized_last_round(self):
+        llm = FakeSummaryChatModel()
+        llm.release.set()
+        memory = SummaryMemory(llm, token_threshold=100, keep_tokens=50)
+        _add_rounds(memory, 1)
+        memory.add_message(HumanMessage("一二三四五六七八九十" * 130))
+        await asyncio.wait_for(memory.wait_for_summary(), timeout=1)
+        memory.add_message(AIMessage("一二三四五六七八九十" * 130, token_usage=None))
+        await asyncio.wait_for(memory.wait_for_summary(), timeout=1)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        # The summary is not summarized again.
+        self.assertEqual(len(llm.prompts), 1)
+        self.assertIsNone(memory._summary_task)
+        messages = memory.get_messages()
+        self.assertEqual(len(messages), 4)
+        self.assertEqual(messages[0].content, SUMMARY_MESSAGE_PREFIX + "Summary")
+
+    async def test_discard_outdated_summary(self):
+        llm = FakeSummaryChatModel()
+        memory = SummaryMemory(llm, token_threshold=50, keep_tokens=20)
+        _add_rounds(memory, 4)
+        await asyncio.sleep(0)
+        memory.clear_chat_history()
+        _add_rounds(memory, 1)
+
+        llm.release.set()
+        await memory.wait_for_summary()
+        self.assertEqual([m.content for m in memory.get_messages()], ["一二三四五六七八九0"] * 2)
+
+    async def test_keep_messages_on_error(self):
+        llm = FakeSummaryChatModel(error=RuntimeError("unavailable"))
+        llm.release.set()
+        memory = SummaryMemory(llm, token_threshold=50, keep_tokens=20)
+        _add_rounds(memory, 4)
+        await memory.wait_for_summary()
+        self.assertEqual(len(memory.get_messages()), 8)
+        self.assertEqual(len(llm.prompts), 1)
+
+    async def test_create_empty(self):
+        llm = FakeSummaryChatModel()
+        memory = SummaryMemory(llm, token_threshold=50, keep_tokens=20)
+        _add_rounds(memory, 4)
+        empty_memory = memory.create_empty()
+        self.assertIs(empty_memory.llm, llm)
+        self.assertEqual(empty_memory.token_threshold, 50)
+        self.assertEqual(empty_memory.get_messages(), [])
+        self.assertIsNone(empty_memory._summary_task)
+        llm.release.set()
+        await memory.wait_for_summary()
+
+    def test_no_event_loop(self):
+        memory = SummaryMemory(FakeSummaryChatModel(), token_threshold=50)
+        _add_rounds(memory, 4)
+        self.assertEqual(len(memory.get_messages()), 8)
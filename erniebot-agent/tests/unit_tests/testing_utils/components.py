@@ -9,6 +9,7 @@ class CountingCallbackHandler(CallbackHandler):
         super().__init__()
         self.run_starts = 0
         self.llm_starts = 0
+        self.llm_tokens = 0
         self.llm_ends = 0
         self.llm_errors = 0
         self.tool_starts = 0
@@ -23,6 +24,9 @@ class CountingCallbackHandler(CallbackHandler):
     async def on_llm_start(self, agent, llm, messages):
         self.llm_starts += 1
 
+    async def on_llm_token(self, agent, llm, token):
+        self.llm_tokens += 1
+
     async def on_llm_end(self, agent, llm, response):
         self.llm_ends += 1
 
@@ -1,6 +1,6 @@
 from erniebot_agent.chat_models.base import ChatModel
 from erniebot_agent.chat_models.erniebot import BaseERNIEBot, ERNIEBot
-from erniebot_agent.memory import AIMessage
+from erniebot_agent.memory import AIMessage, AIMessageChunk
 
 
 class FakeSimpleChatModel(ChatModel):
@@ -35,6 +35,29 @@ class FakeERNIEBotWithPresetResponses(BaseERNIEBot):
         return response
 
 
+class FakeERNIEBotWithStreamingResponses(BaseERNIEBot):
+    """Streams the contents of preset responses two characters at a time."""
+
+    def __init__(self, responses):
+        super().__init__("erniebot_with_streaming_responses")
+        self.responses = responses
+        self._counter = 0
+
+    async def chat(self, messages, *, stream=False, functions=None, **kwargs):
+        response = self.responses[self._counter]
+        self._counter += 1
+        if not stream:
+            return response
+        return self._stream(response)
+
+    async def _stream(self, response):
+        if response.function_call is not None:
+            yield AIMessageChunk("", function_call=response.function_call)
+            return
+        for i in range(0, len(response.content), 2):
+            yield AIMessageChunk(response.content[i : i + 2])
+
+
 class FakeERNIEBotWithAllInput(ERNIEBot):
     def __init__(
         self,
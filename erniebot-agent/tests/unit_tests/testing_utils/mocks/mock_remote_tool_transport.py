@@ -0,0 +1,62 @@
+import functools
+import json
+from typing import Any, Dict, List, Tuple
+from unittest import mock
+from urllib.parse import urlsplit, urlunsplit
+
+from erniebot_agent.tools.transport import RemoteToolResponse, RemoteToolTransport
+
+# `json` is shadowed by the keyword arguments below.
+_json_dumps = json.dumps
+
+
+class MockedResponses(object):
+    """Mocks the responses of remote tools, with an interface like that of the
+    `responses` package."""
+
+    def __init__(self):
+        super().__init__()
+        self._registry: List[Tuple[str, str, RemoteToolResponse]] = []
+        self.calls: List[Dict[str, Any]] = []
+
+    def add(self, method: str, url: str, *, json: Any = None, body: bytes = b"", status: int = 200):
+        if json is not None:
+            content = _json_dumps(json).encode("utf-8")
+            headers = {"Content-Type": "application/json"}
+        else:
+            content = body
+            headers = {}
+        self._registry.append(
+            (method.lower(), _strip_query(url), RemoteToolResponse(status, headers, content))
+        )
+
+    def get(self, url: str, **kwargs: Any):
+        self.add("get", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any):
+        self.add("post", url, **kwargs)
+
+    def activate(self, func):
+        @functools.wraps(func)
+        async def _wrapper(*args, **kwargs):
+            self._registry.clear()
+            self.calls.clear()
+            with mock.patch.object(RemoteToolTransport, "request", self._request):
+                return await func(*args, **kwargs)
+
+        return _wrapper
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> RemoteToolResponse:
+        self.calls.append({"method": method, "url": url, **kwargs})
+        for registered_method, registered_url, response in self._registry:
+            if registered_method == method.lower() and registered_url == _strip_query(url):
+                return response
+        raise ConnectionError(f"No response is registered for {method.upper()} {url}")
+
+
+def _strip_query(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+responses = MockedResponses()
@@ -1,3 +1,5 @@
+import inspect
+
 from erniebot_agent.tools.base import BaseTool
 
 
@@ -23,7 +25,10 @@ class FakeTool(BaseTool):
         return []
 
     async def __call__(self, *args, **kwargs):
-        return self.function(*args, **kwargs)
+        result = self.function(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
     def function_call_schema(self):
         return self.schema
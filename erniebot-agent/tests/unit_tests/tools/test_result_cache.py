@@ -0,0 +1,85 @@
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from erniebot_agent.agents import FunctionAgent
+from erniebot_agent.file.local_file import create_local_file_from_path
+from erniebot_agent.tools import ToolResultCache, cache_results
+from erniebot_agent.tools.result_cache import create_tool_result_cache_key
+from tests.unit_tests.testing_utils.mocks.mock_chat_models import (
+    FakeERNIEBotWithPresetResponses,
+)
+from tests.unit_tests.testing_utils.mocks.mock_memory import FakeMemory
+from tests.unit_tests.testing_utils.mocks.mock_tool import FakeTool
+
+
+class TestToolResultCache(unittest.IsolatedAsyncioTestCase):
+    def test_ttl(self):
+        cache = ToolResultCache(ttl=10)
+        with mock.patch("time.time", return_value=100.0):
+            cache.set("key", {"a": 1})
+            self.assertEqual(cache.get("key"), {"a": 1})
+        with mock.patch("time.time", return_value=110.0):
+            self.assertIsNone(cache.get("key"))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru(self):
+        cache = ToolResultCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as td:
+            ToolResultCache(cache_dir=td).set("key", {"text": "结果"})
+            cache = ToolResultCache(cache_dir=td)
+            self.assertEqual(cache.get("key"), {"text": "结果"})
+            cache.clear()
+            self.assertIsNone(ToolResultCache(cache_dir=td).get("key"))
+
+    async def test_key_of_local_files(self):
+        with tempfile.TemporaryDirectory() as td:
+            files = []
+            for name in ("a.txt", "b.txt"):
+                path = pathlib.Path(td) / name
+                path.write_text("content")
+                files.append(create_local_file_from_path(path, "assistants", {}))
+            keys = [
+                await create_tool_result_cache_key("tool", {"file": file.id, "lang": "en"}, [file])
+                for file in files
+            ]
+            self.assertEqual(keys[0], keys[1])
+
+            (pathlib.Path(td) / "b.txt").write_text("new content")
+            key = await create_tool_result_cache_key("tool", {"lang": "en", "file": files[1].id}, [files[1]])
+            self.assertNotEqual(key, keys[0])
+
+    async def test_agent_reuses_results(self):
+        calls = []
+
+        def _add(a, b):
+            calls.append((a, b))
+            return {"sum": a + b}
+
+        tool = cache_results(
+            FakeTool(
+                name="add",
+                description="Adds two numbers.",
+                parameters={"type": "object", "properties": {}},
+                responses={"type": "object", "properties": {}},
+                function=_add,
+            ),
+            ttl=60,
+        )
+        agent = FunctionAgent(llm=FakeERNIEBotWithPresetResponses([]), tools=[tool], memory=FakeMemory())
+
+        for args in ({"a": 1, "b": 2}, {"b": 2, "a": 1}, {"a": 2, "b": 2}):
+            response = await agent.run_tool("add", json.dumps(args))
+            self.assertEqual(json.loads(response.json), {"sum": args["a"] + args["b"]})
+        self.assertEqual(calls, [(1, 2), (2, 2)])
@@ -21,7 +21,6 @@ from inspect import isclass
 from typing import List, Optional, Type, get_args
 from uuid import uuid4
 
-import responses
 from openapi_spec_validator.readers import read_from_filename
 from pydantic import Field
 
@@ -36,6 +35,7 @@ from erniebot_agent.tools.schema import (
 )
 from erniebot_agent.tools.utils import parse_json_request, tool_response_contains_file
 from erniebot_agent.utils.common import create_enum_class
+from tests.unit_tests.testing_utils.mocks.mock_remote_tool_transport import responses
 
 
 class TestToolSchema(unittest.TestCase):
@@ -83,6 +83,27 @@ class TestToolSchema(unittest.TestCase):
             function_call_schemas[3]["examples"][1]["function_call"]["name"], "单词本/v1/deleteWord"
         )
 
+    def test_compiled_views_are_shared(self):
+        toolkit = RemoteToolkit.from_openapi_file(self.openapi_file)
+        other_toolkit = RemoteToolkit.from_openapi_file(self.openapi_file)
+        for name, view in toolkit.component_schemas.items():
+            self.assertIs(other_toolkit.component_schemas[name], view)
+
+        schema = {"type": "object", "properties": {"a": {"type": "string"}, "b": {"type": "integer"}}}
+        reordered_schema = {
+            "properties": {"b": {"type": "integer"}, "a": {"type": "string"}},
+            "type": "object",
+        }
+        self.assertIs(
+            ToolParameterView.from_openapi_dict(schema),
+            ToolParameterView.from_openapi_dict(reordered_schema),
+        )
+        schema["properties"]["a"]["description"] = "a"
+        self.assertIsNot(
+            ToolParameterView.from_openapi_dict(schema),
+            ToolParameterView.from_openapi_dict(reordered_schema),
+        )
+
     def test_get_typing_list_type(self):
         result = get_typing_list_type(List[int])
         self.assertEqual(result, "integer")
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import json
 import socket
 import time
 import unittest
+from unittest import mock
 
 import requests
 
@@ -23,6 +25,36 @@ def is_port_in_use(port):
             return True
 
 
+class TestToolManagerSchemas(unittest.TestCase):
+    def test_schemas_are_cached(self):
+        tool_manager = ToolManager([CurrentTimeTool()])
+        with mock.patch.object(
+            CalculatorTool,
+            "function_call_schema",
+            autospec=True,
+            side_effect=CalculatorTool.function_call_schema,
+        ) as mocked_schema:
+            calculator = CalculatorTool()
+            tool_manager.add_tool(calculator)
+            schemas = tool_manager.get_tool_schemas()
+            self.assertEqual([schema["name"] for schema in schemas], ["CurrentTimeTool", "CalculatorTool"])
+            self.assertEqual(tool_manager.get_tool_schemas(), schemas)
+            tool_manager.get_tool_names_with_descriptions()
+            prepared = tool_manager.get_prepared_tool_schemas()
+            self.assertEqual(json.loads(prepared.encoded), schemas)
+            self.assertIs(tool_manager.get_prepared_tool_schemas(), prepared)
+            self.assertEqual(mocked_schema.call_count, 1)
+
+            tool_manager.remove_tool(calculator)
+            self.assertEqual(
+                [schema["name"] for schema in tool_manager.get_tool_schemas()], ["CurrentTimeTool"]
+            )
+            self.assertEqual(len(tool_manager.get_prepared_tool_schemas()), 1)
+            tool_manager.add_tool(calculator)
+            self.assertEqual(len(tool_manager.get_tool_schemas()), 2)
+            self.assertEqual(mocked_schema.call_count, 2)
+
+
 class TestToolManagerServe(unittest.IsolatedAsyncioTestCase):
     def avaliable_free_port(self, exclude=None):
         exclude = exclude or []
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from erniebot_agent.tools import RemoteToolkit
+from erniebot_agent.tools.toolkit_cache import ToolkitSpecCache
+from erniebot_agent.tools.transport import get_transport
+from erniebot_agent.utils.exceptions import RemoteToolError
+
+
+class TestToolkitSpecCache(unittest.IsolatedAsyncioTestCase):
+    openapi_file = "./tests/fixtures/openapi.yaml"
+    examples_file = "./tests/fixtures/examples.yaml"
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.cache_control = None
+        self.files = {}
+        for name, path in (("openapi.yaml", self.openapi_file), ("examples.yaml", self.examples_file)):
+            with open(path, "rb") as f:
+                self.files[name] = f.read()
+
+        async def _serve(request):
+            name = request.match_info["name"]
+            self.requests.append((name, request.headers.get("If-None-Match", None)))
+            if name not in self.files:
+                return web.Response(status=404)
+            etag = '"' + hashlib.sha256(self.files[name]).hexdigest() + '"'
+            headers = {"ETag": etag}
+            if self.cache_control is not None:
+                headers["Cache-Control"] = self.cache_control
+            if request.headers.get("If-None-Match", None) == etag:
+                return web.Response(status=304, headers=headers)
+            return web.Response(body=self.files[name], headers=headers)
+
+        app = web.Application()
+        app.router.add_get("/.well-known/{name}", _serve)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url(""))
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.tempdir.cleanup()
+
+    def _patch_cache(self, cache):
+        return mock.patch(
+            "erniebot_agent.tools.remote_toolkit.get_default_toolkit_cache", return_value=cache
+        )
+
+    async def test_revalidation(self):
+        with self._patch_cache(ToolkitSpecCache(self.tempdir.name)):
+            toolkit = await RemoteToolkit.afrom_url(self.url, access_token="token")
+        self.assertEqual(len(toolkit.paths), 4)
+        self.assertGreater(len(toolkit.examples), 0)
+        self.assertTrue(all(etag is None for _, etag in self.requests))
+
+        # A new cache reads the files persisted by the previous one.
+        self.requests.clear()
+        with self._patch_cache(ToolkitSpecCache(self.tempdir.name)):
+            cached_toolkit = await RemoteToolkit.afrom_url(self.url, access_token="token")
+        self.assertEqual(cached_toolkit.to_openapi_dict(), toolkit.to_openapi_dict())
+        self.assertEqual(len(cached_toolkit.examples), len(toolkit.examples))
+        self.assertEqual(len(self.requests), 2)
+        self.assertTrue(all(etag is not None for _, etag in self.requests))
+
+        # Changed files are downloaded again.
+        self.requests.clear()
+        self.files["openapi.yaml"] = self.files["openapi.yaml"].replace(b"v1", b"v2")
+        with self._patch_cache(ToolkitSpecCache(self.tempdir.name)):
+            toolkit = await RemoteToolkit.afrom_url(self.url, access_token="token")
+        self.assertEqual(toolkit.info.version, "v2")
+
+    async def test_sync_loading(self):
+        cache = ToolkitSpecCache(self.tempdir.name)
+        loop = asyncio.get_running_loop()
+        with self._patch_cache(cache):
+            for _ in range(2):
+                # `from_url` blocks, so it is run in another thread to let the server respond.
+                toolkit = await loop.run_in_executor(
+                    None, lambda: RemoteToolkit.from_url(self.url, access_token="token")
+                )
+                self.assertEqual(len(toolkit.paths), 4)
+        self.assertEqual([etag is None for _, etag in self.requests], [True, True, False, False])
+
+    def test_sync_loading_timeout(self):
+        cache = ToolkitSpecCache()
+        with mock.patch("requests.get", side_effect=requests.Timeout()) as mock_get:
+            with self.assertRaises(RemoteToolError):
+                cache.get(self.url + ".well-known/openapi.yaml", {})
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], get_transport(self.url).timeout)
+
+    async def test_fresh_files_are_not_revalidated(self):
+        self.cache_control = "max-age=60"
+        cache = ToolkitSpecCache()
+        with self._patch_cache(cache):
+            await RemoteToolkit.afrom_url(self.url, access_token="token")
+            await RemoteToolkit.afrom_url(self.url, access_token="token")
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_entries_are_not_shared_across_tokens(self):
+        self.cache_control = "max-age=60"
+        cache = ToolkitSpecCache(self.tempdir.name)
+        with self._patch_cache(cache):
+            await RemoteToolkit.afrom_url(self.url, access_token="token")
+            await RemoteToolkit.afrom_url(self.url, access_token="another_token")
+            await RemoteToolkit.afrom_url(self.url, access_token="another_token")
+        # A fresh file is only reused by requests with the same credentials.
+        self.assertEqual(len(self.requests), 4)
+        self.assertTrue(all(etag is None for _, etag in self.requests))
+
+    async def test_missing_examples(self):
+        del self.files["examples.yaml"]
+        with self._patch_cache(ToolkitSpecCache()):
+            toolkit = await RemoteToolkit.afrom_url(self.url, access_token="token")
+        self.assertEqual(toolkit.examples, [])
+
+    async def test_no_cache(self):
+        with self._patch_cache(ToolkitSpecCache()):
+            await RemoteToolkit.afrom_url(self.url, access_token="token")
+            await RemoteToolkit.afrom_url(self.url, access_token="token", use_cache=False)
+        self.assertTrue(all(etag is None for _, etag in self.requests))
@@ -0,0 +1,116 @@
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from erniebot_agent.tools.transport import RemoteToolTransport, get_transport
+from erniebot_agent.utils.exceptions import RemoteToolError
+
+
+class TestRemoteToolTransport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.num_calls = 0
+
+        async def _flaky(request):
+            self.num_calls += 1
+            if self.num_calls < 3:
+                return web.Response(status=503)
+            return web.json_response({"calls": self.num_calls})
+
+        async def _gateway_timeout(request):
+            self.num_calls += 1
+            return web.Response(status=504)
+
+        async def _throttled(request):
+            self.num_calls += 1
+            if self.num_calls < 2:
+                return web.Response(status=429, headers={"Retry-After": "0"})
+            return web.json_response({"calls": self.num_calls})
+
+        async def _slow(request):
+            self.num_calls += 1
+            await asyncio.sleep(float(request.query.get("delay", "0.3")))
+            return web.json_response({"ok": True})
+
+        async def _echo(request):
+            form = await request.post()
+            return web.json_response(
+                {
+                    "query": sorted(request.query.items()),
+                    "form": {
+                        key: (val if isinstance(val, str) else val.file.read().decode())
+                        for key, val in form.items()
+                    },
+                }
+            )
+
+        app = web.Application()
+        app.router.add_get("/flaky", _flaky)
+        app.router.add_get("/gateway_timeout", _gateway_timeout)
+        app.router.add_post("/gateway_timeout", _gateway_timeout)
+        app.router.add_post("/throttled", _throttled)
+        app.router.add_get("/slow", _slow)
+        app.router.add_post("/slow", _slow)
+        app.router.add_post("/echo", _echo)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.transport = RemoteToolTransport(retry_backoff=0.01)
+
+    async def asyncTearDown(self):
+        await self.transport.close()
+        await self.server.close()
+
+    async def test_retry_on_unavailable(self):
+        response = await self.transport.request("get", str(self.server.make_url("/flaky")))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"calls": 3})
+
+    async def test_retry_gateway_errors_only_if_idempotent(self):
+        url = str(self.server.make_url("/gateway_timeout"))
+        response = await self.transport.request("get", url)
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(self.num_calls, 3)
+
+        # The tool may have run, so a non-idempotent request is not retried.
+        self.num_calls = 0
+        response = await self.transport.request("post", url)
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(self.num_calls, 1)
+
+        self.num_calls = 0
+        response = await self.transport.request("post", str(self.server.make_url("/throttled")))
+        self.assertEqual(response.json(), {"calls": 2})
+
+    async def test_requests_do_not_block(self):
+        url = str(self.server.make_url("/slow"))
+        start = time.monotonic()
+        responses = await asyncio.gather(*(self.transport.request("get", url) for _ in range(5)))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+
+    async def test_timeout(self):
+        url = str(self.server.make_url("/slow"))
+        with self.assertRaises(RemoteToolError):
+            await self.transport.request("get", url, params={"delay": 1}, timeout=0.1)
+        # Idempotent requests are retried.
+        self.assertEqual(self.num_calls, 3)
+
+        self.num_calls = 0
+        with self.assertRaises(RemoteToolError):
+            await self.transport.request("post", url, params={"delay": 1}, timeout=0.1)
+        self.assertEqual(self.num_calls, 1)
+
+    async def test_form_and_files(self):
+        url = str(self.server.make_url("/echo"))
+        response = await self.transport.request(
+            "post", url, params={"a": [1, 2], "b": None}, data={"c": 3}, files={"f": b"content"}
+        )
+        self.assertEqual(
+            response.json(), {"query": [["a", "1"], ["a", "2"]], "form": {"c": "3", "f": "content"}}
+        )
+
+    def test_transport_shared_by_server(self):
+        self.assertIs(get_transport("http://127.0.0.1:8000/a"), get_transport("http://127.0.0.1:8000/b"))
+        self.assertIsNot(get_transport("http://127.0.0.1:8000"), get_transport("http://127.0.0.1:8001"))
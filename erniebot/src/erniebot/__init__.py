@@ -17,7 +17,9 @@ from .config import GlobalConfig
 from .config import init_global_config as _init_global_config
 from .errors import ConfigItemNotFoundError as _ConfigItemNotFoundError
 from .intro import Model
+from .prepared import PreparedFunctions, PreparedJSON
 from .resources import (
+    AsyncStreamAccumulator,
     ChatCompletion,
     ChatCompletionResponse,
     ChatCompletionWithPlugins,
@@ -27,10 +29,13 @@ from .resources import (
     ImageResponse,
     ImageV1,
     ImageV2,
+    StreamAccumulator,
 )
 from .response import EBResponse
+from .streaming import AsyncResponseStream, ResponseStream
 from .utils.logging import setup_logging as _setup_logging
 from .version import VERSION
+from .warmup import awarmup, warmup
 
 __version__ = VERSION
 
@@ -49,7 +54,15 @@ __all__ = [
     "ChatCompletionResponse",
     "EmbeddingResponse",
     "ImageResponse",
+    "StreamAccumulator",
+    "AsyncStreamAccumulator",
     "GlobalConfig",
+    "warmup",
+    "awarmup",
+    "PreparedFunctions",
+    "PreparedJSON",
+    "ResponseStream",
+    "AsyncResponseStream",
     "__version__",
 ]
 
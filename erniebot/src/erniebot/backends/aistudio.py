@@ -19,7 +19,7 @@ import erniebot.errors as errors
 import erniebot.utils.logging as logging
 from erniebot.api_types import APIType
 from erniebot.response import EBResponse
-from erniebot.types import ConfigDictType, HeadersType, ParamsType
+from erniebot.types import ConfigDictType, HeadersType, ParamsType, StreamMode
 
 from .base import EBBackend
 
@@ -41,12 +41,12 @@ class AIStudioBackend(EBBackend):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
@@ -67,12 +67,12 @@ class AIStudioBackend(EBBackend):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
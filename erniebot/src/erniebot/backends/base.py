@@ -15,51 +15,76 @@
 from typing import AsyncIterator, ClassVar, Iterator, Optional, Union
 
 from erniebot.api_types import APIType
+from erniebot.cassette import get_cassette
 from erniebot.http_client import EBClient
 from erniebot.response import EBResponse
-from erniebot.types import ConfigDictType, HeadersType, ParamsType
+from erniebot.types import ConfigDictType, HeadersType, ParamsType, StreamMode
 
 
 class EBBackend(object):
     api_type: ClassVar[APIType]
     base_url: ClassVar[str]
+    # Whether the server accepts gzip-compressed request bodies. This is the
+    # default of the `request_compression` setting.
+    supports_request_compression: ClassVar[bool] = False
 
     def __init__(self, config_dict: ConfigDictType) -> None:
         super().__init__()
         self._base_url = config_dict.get("api_base_url", None) or type(self).base_url
         self._cfg = config_dict
+        cassette_path = self._cfg.get("cassette_path", None)
+        request_compression = self._cfg.get("request_compression", None)
+        if request_compression is None:
+            request_compression = type(self).supports_request_compression
         self._client = EBClient(
             self._base_url,
             session=self._cfg.get("requests_session", None),
             asession=self._cfg.get("aiohttp_session", None),
             response_handler=self.handle_response,
             proxy=self._cfg.get("proxy", None),
+            cassette=(
+                get_cassette(cassette_path, self._cfg.get("cassette_mode", None) or "replay")
+                if cassette_path
+                else None
+            ),
+            replay_speed=self._cfg.get("replay_speed", None),
+            compression_threshold=(
+                self._cfg.get("request_compression_threshold", None) if request_compression else None
+            ),
         )
 
     def request(
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         raise NotImplementedError
 
     async def arequest(
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         raise NotImplementedError
 
+    def warm_up(self, num_connections: int = 1) -> None:
+        """Prepares the backend for sending requests."""
+        self._client.warm_up(num_connections)
+
+    async def awarm_up(self, num_connections: int = 1) -> None:
+        """Prepares the backend for sending requests asynchronously."""
+        await self._client.awarm_up(num_connections)
+
     @classmethod
     def handle_response(cls, resp: EBResponse) -> EBResponse:
         raise NotImplementedError
@@ -34,7 +34,7 @@ import erniebot.utils.logging as logging
 from erniebot.api_types import APIType
 from erniebot.auth import build_auth_token_manager
 from erniebot.response import EBResponse
-from erniebot.types import ConfigDictType, HeadersType, ParamsType
+from erniebot.types import ConfigDictType, HeadersType, ParamsType, StreamMode
 from erniebot.utils.url import add_query_params
 
 from .base import EBBackend
@@ -51,16 +51,25 @@ class _BCELegacyBackend(EBBackend):
             sk=self._cfg["sk"],
         )
 
+    def warm_up(self, num_connections: int = 1) -> None:
+        self._auth_manager.get_auth_token()
+        super().warm_up(num_connections)
+
+    async def awarm_up(self, num_connections: int = 1) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._auth_manager.get_auth_token)
+        await super().awarm_up(num_connections)
+
     def request(
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
@@ -99,12 +108,12 @@ class _BCELegacyBackend(EBBackend):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
@@ -159,12 +168,12 @@ class _BCEBackend(EBBackend):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
@@ -185,12 +194,12 @@ class _BCEBackend(EBBackend):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
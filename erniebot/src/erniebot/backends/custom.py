@@ -19,7 +19,7 @@ import erniebot.utils.logging as logging
 from erniebot.api_types import APIType
 from erniebot.backends.bce import QianfanLegacyBackend
 from erniebot.response import EBResponse
-from erniebot.types import HeadersType, ParamsType
+from erniebot.types import HeadersType, ParamsType, StreamMode
 
 from .base import EBBackend
 
@@ -28,6 +28,7 @@ class CustomBackend(EBBackend):
     """Custom backend for debugging purposes."""
 
     api_type: ClassVar[APIType] = APIType.CUSTOM
+    supports_request_compression: ClassVar[bool] = True
 
     def __init__(self, config_dict: Dict[str, Any]) -> None:
         super().__init__(config_dict=config_dict)
@@ -40,12 +41,12 @@ class CustomBackend(EBBackend):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
@@ -65,12 +66,12 @@ class CustomBackend(EBBackend):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         url, headers, data = self._client.prepare_request(
             method,
             path,
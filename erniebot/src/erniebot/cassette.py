@@ -0,0 +1,245 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import (
+    IO,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    cast,
+)
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from . import errors
+from .utils import logging
+from .utils.misc import SingletonMeta
+
+__all__ = ["Cassette", "Interaction", "get_cassette"]
+
+_RECORD_MODE: Final[str] = "record"
+_REPLAY_MODE: Final[str] = "replay"
+# Query parameters that carry credentials are not part of the interaction key,
+# so that a cassette can be replayed with different credentials.
+_IGNORED_QUERY_PARAMS: Final[Tuple[str, ...]] = ("access_token",)
+
+
+@dataclass
+class Interaction(object):
+    """A recorded HTTP request-response pair."""
+
+    key: str
+    method: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    # Seconds elapsed before the response (or its headers, for streamed
+    # responses) arrived.
+    latency: float
+    # Body of a non-streamed response.
+    body: Optional[str] = None
+    # Non-empty lines of a streamed response, each paired with the seconds
+    # elapsed since the previous line.
+    chunks: Optional[List[Tuple[float, str]]] = None
+
+    @property
+    def is_stream(self) -> bool:
+        return self.chunks is not None
+
+
+class Cassette(object):
+    """On-disk storage of HTTP interactions.
+
+    In record mode, interactions are appended to the file as JSON lines as soon
+    as they complete. In replay mode, the file is loaded once, and requests with
+    the same method, URL (ignoring the host and credentials), and body are
+    answered by the recorded responses in the order of recording, wrapping
+    around when all of them have been used. The file is gzip-compressed if its
+    name ends with `.gz`.
+    """
+
+    def __init__(self, path: str, mode: str) -> None:
+        super().__init__()
+        if mode not in (_RECORD_MODE, _REPLAY_MODE):
+            raise ValueError(f"Invalid cassette mode: {repr(mode)}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._interactions: Optional[Dict[str, List[Interaction]]] = None
+        self._cursors: Dict[str, int] = collections.defaultdict(int)
+
+    @property
+    def is_recording(self) -> bool:
+        return self.mode == _RECORD_MODE
+
+    @property
+    def is_replaying(self) -> bool:
+        return self.mode == _REPLAY_MODE
+
+    @staticmethod
+    def make_key(method: str, url: str, data: Optional[bytes]) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(method.upper().encode())
+        hasher.update(b"\n")
+        hasher.update(_normalize_url(url).encode())
+        hasher.update(b"\n")
+        if data is not None:
+            hasher.update(data)
+        return hasher.hexdigest()
+
+    def add_interaction(self, interaction: Interaction) -> None:
+        line = json.dumps(asdict(interaction), ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            with self._open("a") as f:
+                f.write(line)
+
+    def find_interaction(self, method: str, url: str, data: Optional[bytes]) -> Interaction:
+        key = self.make_key(method, url, data)
+        with self._lock:
+            if self._interactions is None:
+                self._interactions = self._load()
+            candidates = self._interactions.get(key, None)
+            if not candidates:
+                raise errors.ConnectionError(
+                    f"No recorded interaction in {repr(self.path)} matches the request: "
+                    f"{method} {_normalize_url(url)}"
+                )
+            idx = self._cursors[key]
+            self._cursors[key] = (idx + 1) % len(candidates)
+        return candidates[idx]
+
+    def start_recording(
+        self,
+        method: str,
+        url: str,
+        data: Optional[bytes],
+        status: int,
+        headers: Mapping[str, Any],
+        latency: float,
+    ) -> "InteractionRecorder":
+        return InteractionRecorder(
+            self,
+            Interaction(
+                key=self.make_key(method, url, data),
+                method=method.upper(),
+                url=_normalize_url(url),
+                status=status,
+                headers={str(k): str(v) for k, v in headers.items()},
+                latency=latency,
+            ),
+        )
+
+    def _load(self) -> Dict[str, List[Interaction]]:
+        interactions: Dict[str, List[Interaction]] = collections.defaultdict(list)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette {repr(self.path)} does not exist.")
+        with self._open("r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                dict_ = json.loads(line)
+                if dict_.get("chunks", None) is not None:
+                    dict_["chunks"] = [tuple(chunk) for chunk in dict_["chunks"]]
+                interaction = Interaction(**dict_)
+                interactions[interaction.key].append(interaction)
+        logging.info("%d interactions loaded from %s", sum(map(len, interactions.values())), self.path)
+        return interactions
+
+    def _open(self, mode: str) -> IO[str]:
+        if self.path.endswith(".gz"):
+            return cast(IO[str], gzip.open(self.path, mode + "t", encoding="utf-8"))
+        else:
+            return open(self.path, mode, encoding="utf-8")
+
+
+class InteractionRecorder(object):
+    """Collects the response of an ongoing interaction and stores it in a
+    cassette once the response is complete."""
+
+    def __init__(self, cassette: Cassette, interaction: Interaction) -> None:
+        super().__init__()
+        self._cassette = cassette
+        self._interaction = interaction
+
+    def record_body(self, body: bytes) -> None:
+        self._interaction.body = body.decode("utf-8")
+        self._cassette.add_interaction(self._interaction)
+
+    def record_lines(self, lines: Iterator[bytes]) -> Iterator[bytes]:
+        chunks: List[Tuple[float, str]] = []
+        last_time = time.monotonic()
+        for line in lines:
+            if line.strip():
+                curr_time = time.monotonic()
+                chunks.append((curr_time - last_time, line.rstrip(b"\r\n").decode("utf-8")))
+                last_time = curr_time
+            yield line
+        self._interaction.chunks = chunks
+        self._cassette.add_interaction(self._interaction)
+
+    async def arecord_lines(self, lines: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        chunks: List[Tuple[float, str]] = []
+        last_time = time.monotonic()
+        async for line in lines:
+            if line.strip():
+                curr_time = time.monotonic()
+                chunks.append((curr_time - last_time, line.rstrip(b"\r\n").decode("utf-8")))
+                last_time = curr_time
+            yield line
+        self._interaction.chunks = chunks
+        self._cassette.add_interaction(self._interaction)
+
+
+class _CassetteRegistry(metaclass=SingletonMeta):
+    def __init__(self) -> None:
+        super().__init__()
+        self._cassettes: Dict[Tuple[str, str], Cassette] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, mode: str) -> Cassette:
+        key = (os.path.abspath(path), mode)
+        with self._lock:
+            if key not in self._cassettes:
+                self._cassettes[key] = Cassette(path, mode)
+            return self._cassettes[key]
+
+
+def get_cassette(path: str, mode: str) -> Cassette:
+    """Gets the cassette that is shared by all clients using the same file and
+    mode."""
+    return _CassetteRegistry().get(path, mode)
+
+
+def _normalize_url(url: str) -> str:
+    _, _, path, query, _ = urlsplit(url)
+    params = sorted(
+        (k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in _IGNORED_QUERY_PARAMS
+    )
+    if params:
+        return f"{path}?{urlencode(params)}"
+    return path
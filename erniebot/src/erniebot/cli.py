@@ -13,12 +13,20 @@
 # limitations under the License.
 
 import argparse
+import asyncio
+import json
 import logging
+import os
+import sys
+import time
+
+import aiohttp
 
 import erniebot
 
 from .config import GlobalConfig
 from .errors import EBError
+from .gateway import GatewayConfig, serve
 from .response import EBResponse
 from .utils.logging import setup_logging
 
@@ -38,7 +46,7 @@ def console_main():
     if args.api_type:
         cfg.set_value("api_type", args.api_type)
     if args.api_base_url:
-        cfg.set_value("base_url", args.api_base_url)
+        cfg.set_value("api_base_url", args.api_base_url)
     if args.access_token:
         cfg.set_value("access_token", args.access_token)
     if args.ak:
@@ -88,9 +96,14 @@ def parse_args(*args, **kwargs):
     api_parsers = subparser_api.add_subparsers(dest="api", required=True)
     _register_resource(api_parsers, ChatCompletionHelper, "chat_completion")
     _register_resource(api_parsers, ChatFileHelper, "chat_file")
+    _register_resource(api_parsers, EmbeddingHelper, "embedding")
     _register_resource(api_parsers, ImageV2Helper, "image")
     _register_resource(api_parsers, ModelHelper, "model")
 
+    subparser_serve = subparsers.add_parser("serve", help="Run an OpenAI-compatible gateway.")
+    _add_serve_arguments(subparser_serve)
+    subparser_serve.set_defaults(api_invoker=_serve)
+
     return parser.parse_args(*args, **kwargs)
 
 
@@ -142,7 +155,7 @@ class ChatCompletionHelper(_ResourceCLIHelper):
 
     @classmethod
     def get_api_names(cls):
-        return ["create"]
+        return ["create", "batch"]
 
     @classmethod
     def get_resource_class(cls):
@@ -208,6 +221,15 @@ class ChatCompletionHelper(_ResourceCLIHelper):
         for r in responses:
             print(r.result)
 
+    # ChatCompletion.batch
+    @classmethod
+    def add_batch_arguments(cls, parser):
+        return _add_batch_arguments(parser)
+
+    @classmethod
+    def batch(cls, args):
+        _run_batch(cls.get_resource_class(), args)
+
 
 class ChatFileHelper(_ResourceCLIHelper):
     @classmethod
@@ -258,6 +280,59 @@ class ChatFileHelper(_ResourceCLIHelper):
             print(r.result)
 
 
+class EmbeddingHelper(_ResourceCLIHelper):
+    @classmethod
+    def add_resource_arguments(cls, parser):
+        return parser
+
+    @classmethod
+    def get_api_names(cls):
+        return ["create", "batch"]
+
+    @classmethod
+    def get_resource_class(cls):
+        return erniebot.Embedding
+
+    # Embedding.create
+    @classmethod
+    def add_create_arguments(cls, parser):
+        parser.add_argument(
+            "--input",
+            type=str,
+            action="append",
+            required=True,
+            help="Text to embed. This option can be specified multiple times to embed multiple texts.",
+        )
+        parser.add_argument("--model", type=str, required=True, help="Model to use.")
+        parser.add_argument("--user-id", type=str, help="Unique identifier of the user.")
+        parser.add_argument(
+            "--request-timeout",
+            type=float,
+            help="How many seconds to wait for the server to send data before giving up.",
+        )
+        return parser
+
+    @classmethod
+    def create(cls, args):
+        kwargs = {"model": args.model, "input": args.input}
+        if args.user_id:
+            kwargs["user_id"] = args.user_id
+        if args.request_timeout:
+            kwargs["request_timeout"] = args.request_timeout
+        resp = cls.get_resource_class().create(**kwargs)
+        for item in resp.get_result():
+            print(json.dumps(item))
+
+    # Embedding.batch
+    @classmethod
+    def add_batch_arguments(cls, parser):
+        return _add_batch_arguments(parser)
+
+    @classmethod
+    def batch(cls, args):
+        _run_batch(cls.get_resource_class(), args)
+
+
 class ImageV1Helper(_ResourceCLIHelper):
     @classmethod
     def add_resource_arguments(cls, parser):
@@ -392,3 +467,242 @@ class ModelHelper(_ResourceCLIHelper):
         for model_name, model_desc in model_info_list:
             # XXX: Hard-code max name length
             print("%-24s %s", model_name, model_desc)
+
+
+def _add_serve_arguments(parser):
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind.")
+    parser.add_argument(
+        "--pool-size", type=int, default=100, help="Maximum number of connections to the upstream service."
+    )
+    parser.add_argument("--rate-limit", type=float, help="Maximum number of requests per second per client.")
+    parser.add_argument(
+        "--burst", type=int, default=10, help="Maximum number of requests that a client can send in a burst."
+    )
+    parser.add_argument(
+        "--no-coalesce",
+        action="store_true",
+        help="Do not merge identical non-streamed requests that are in flight.",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=0,
+        help="Seconds to cache responses of non-streamed requests. Caching is disabled by default.",
+    )
+    parser.add_argument("--cache-size", type=int, default=1024, help="Maximum number of cached responses.")
+    return parser
+
+
+def _serve(args):
+    serve(
+        GatewayConfig(
+            host=args.host,
+            port=args.port,
+            pool_size=args.pool_size,
+            rate_limit=args.rate_limit,
+            burst=args.burst,
+            coalesce=not args.no_coalesce,
+            cache_ttl=args.cache_ttl,
+            cache_size=args.cache_size,
+        )
+    )
+
+
+def _add_batch_arguments(parser):
+    parser.add_argument(
+        "--input",
+        type=str,
+        required=True,
+        help="Input file in JSON Lines format. Each line is a JSON object containing the arguments of a request and optionally an `id` field (defaults to the line number).",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="Output file in JSON Lines format. Results are appended as soon as they are ready, and requests that already succeeded are skipped on restart.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of concurrent requests.")
+    parser.add_argument("--rate-limit", type=float, help="Maximum number of requests to send per second.")
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        help="How many seconds to wait for the server to send data before giving up.",
+    )
+    return parser
+
+
+def _run_batch(resource_cls, args):
+    if args.concurrency <= 0:
+        raise ValueError("`--concurrency` must be a positive integer.")
+    if args.rate_limit is not None and args.rate_limit <= 0:
+        raise ValueError("`--rate-limit` must be a positive number.")
+    stats = asyncio.run(
+        _BatchRunner(
+            resource_cls,
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+            request_timeout=args.request_timeout,
+        ).run()
+    )
+    print(stats)
+
+
+class _AsyncRateLimiter(object):
+    def __init__(self, rate):
+        super().__init__()
+        self._interval = 1 / rate
+        self._next_time = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._next_time is not None and self._next_time > now:
+                await asyncio.sleep(self._next_time - now)
+                now = self._next_time
+            self._next_time = now + self._interval
+
+
+class _BatchStats(object):
+    def __init__(self):
+        super().__init__()
+        self.num_succeeded = 0
+        self.num_failed = 0
+        self.num_skipped = 0
+        self.total_tokens = 0
+        self.wall_time = 0.0
+
+    def __str__(self):
+        num_sent = self.num_succeeded + self.num_failed
+        wall_time = max(self.wall_time, 1e-9)
+        return (
+            f"Requests: {num_sent} sent, {self.num_succeeded} succeeded, {self.num_failed} failed, "
+            f"{self.num_skipped} skipped\n"
+            f"Wall time: {self.wall_time:.2f} s\n"
+            f"Throughput: {num_sent / wall_time:.2f} requests/s, {self.total_tokens / wall_time:.2f} tokens/s"
+        )
+
+
+class _BatchRunner(object):
+    def __init__(self, resource_cls, input_path, output_path, *, concurrency, rate_limit, request_timeout):
+        super().__init__()
+        self._resource_cls = resource_cls
+        self._input_path = input_path
+        self._output_path = output_path
+        self._concurrency = concurrency
+        self._rate_limiter = _AsyncRateLimiter(rate_limit) if rate_limit is not None else None
+        self._request_timeout = request_timeout
+        self._stats = _BatchStats()
+
+    async def run(self):
+        finished_ids = self._load_finished_ids()
+        start_time = time.perf_counter()
+        # Reuse connections across requests.
+        connector = aiohttp.TCPConnector(limit=self._concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            sem = asyncio.Semaphore(self._concurrency)
+            tasks = set()
+            with open(self._input_path, "r", encoding="utf-8") as fin, open(
+                self._output_path, "a", encoding="utf-8"
+            ) as fout:
+                if not self._ends_with_newline():
+                    fout.write("\n")
+                for line_no, line in enumerate(fin):
+                    if not line.strip():
+                        continue
+                    # Bound the number of pending requests so that the input file
+                    # is streamed rather than loaded at once.
+                    await sem.acquire()
+                    task = asyncio.create_task(
+                        self._process_line(line_no, line, finished_ids, session, fout)
+                    )
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    task.add_done_callback(lambda _: sem.release())
+                if tasks:
+                    await asyncio.gather(*tasks)
+        self._stats.wall_time = time.perf_counter() - start_time
+        return self._stats
+
+    async def _process_line(self, line_no, line, finished_ids, session, fout):
+        try:
+            kwargs = json.loads(line)
+            if not isinstance(kwargs, dict):
+                raise ValueError("Each line of the input file must be a JSON object.")
+        except ValueError as e:
+            self._write_record(fout, {"id": line_no, "error": {"type": type(e).__name__, "message": str(e)}})
+            self._stats.num_failed += 1
+            return
+
+        id_ = kwargs.pop("id", line_no)
+        if not isinstance(id_, (str, int)):
+            record = {
+                "id": line_no,
+                "error": {"type": "ValueError", "message": "`id` must be a string or an integer."},
+            }
+            self._write_record(fout, record)
+            self._stats.num_failed += 1
+            return
+        if id_ in finished_ids:
+            self._stats.num_skipped += 1
+            return
+
+        if kwargs.get("stream", False):
+            record = {"id": id_, "error": {"type": "ValueError", "message": "Streaming is not supported."}}
+            self._write_record(fout, record)
+            self._stats.num_failed += 1
+            return
+        if self._request_timeout is not None:
+            kwargs.setdefault("request_timeout", self._request_timeout)
+
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire()
+        try:
+            resp = await self._resource_cls.acreate(_config_=dict(aiohttp_session=session), **kwargs)
+        except Exception as e:
+            # A single bad request should not abort the whole batch.
+            self._write_record(fout, {"id": id_, "error": {"type": type(e).__name__, "message": str(e)}})
+            self._stats.num_failed += 1
+        else:
+            self._write_record(fout, {"id": id_, "response": resp.rbody})
+            self._stats.num_succeeded += 1
+            if isinstance(resp.rbody, dict) and isinstance(resp.rbody.get("usage", None), dict):
+                self._stats.total_tokens += resp.rbody["usage"].get("total_tokens", 0)
+
+    def _write_record(self, fout, record):
+        fout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Flush each record so that progress is not lost if the process is
+        # interrupted.
+        fout.flush()
+
+    def _ends_with_newline(self):
+        if not os.path.exists(self._output_path) or os.path.getsize(self._output_path) == 0:
+            return True
+        with open(self._output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load_finished_ids(self):
+        finished_ids = set()
+        if not os.path.exists(self._output_path):
+            return finished_ids
+        with open(self._output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may be incomplete if the previous run was
+                    # killed while writing.
+                    continue
+                if isinstance(record, dict) and "response" in record:
+                    finished_ids.add(record["id"])
+        if finished_ids:
+            print(
+                f"Resuming: {len(finished_ids)} finished requests found in {self._output_path}",
+                file=sys.stderr,
+            )
+        return finished_ids
@@ -52,6 +52,18 @@ def init_global_config() -> None:
     # Maximum retry delay (not taking account of jitter)
     cfg.add_item(PositiveNumberItem(key="max_retry_delay", env_key="EB_MAX_RETRY_DELAY", default=10))
 
+    # Scheduling settings
+    # Maximum number of in-flight requests of the process (unlimited if not set)
+    cfg.add_item(
+        PositiveNumberItem(
+            key="max_concurrent_requests", env_key="EB_MAX_CONCURRENT_REQUESTS", ensure_integer=True
+        )
+    )
+    # Priority class of requests ('interactive' or 'batch')
+    cfg.add_item(StringItem(key="request_priority", env_key="EB_REQUEST_PRIORITY", default="interactive"))
+    # Tenant that requests are accounted to (defaults to `user_id` of requests)
+    cfg.add_item(StringItem(key="tenant", env_key="EB_TENANT"))
+
     # Miscellaneous settings
     # Proxy to use
     cfg.add_item(URLItem(key="proxy", env_key="EB_PROXY"))
@@ -59,6 +71,30 @@ def init_global_config() -> None:
     cfg.add_item(AnyObjectItem(key="requests_session"))
     # aiohttp session
     cfg.add_item(AnyObjectItem(key="aiohttp_session"))
+    # Whether to compress request bodies with gzip (defaults to whether the
+    # backend is known to accept compressed bodies)
+    cfg.add_item(BoolItem(key="request_compression", env_key="EB_REQUEST_COMPRESSION"))
+    # Minimum size in bytes of request bodies to compress with gzip, if
+    # compression is enabled
+    cfg.add_item(
+        PositiveNumberItem(
+            key="request_compression_threshold",
+            env_key="EB_REQUEST_COMPRESSION_THRESHOLD",
+            default=1024,
+            ensure_integer=True,
+        )
+    )
+    # What to do if the input is estimated to exceed the context length of the
+    # model ('ignore', 'raise', or 'route')
+    cfg.add_item(StringItem(key="context_overflow", env_key="EB_CONTEXT_OVERFLOW", default="ignore"))
+
+    # Record/replay settings
+    # Path of the cassette file
+    cfg.add_item(StringItem(key="cassette_path", env_key="EB_CASSETTE_PATH"))
+    # Cassette mode ('record' or 'replay')
+    cfg.add_item(StringItem(key="cassette_mode", env_key="EB_CASSETTE_MODE", default="replay"))
+    # Replay speed relative to the recorded timing (0 disables delays)
+    cfg.add_item(PositiveNumberItem(key="replay_speed", env_key="EB_REPLAY_SPEED", default=1))
 
 
 class _Config(object):
@@ -188,6 +224,21 @@ class StringItem(_ConfigItem):
             raise TypeError
 
 
+class BoolItem(_ConfigItem):
+    def factory(self, env_val: str) -> Any:
+        env_val = env_val.strip().lower()
+        if env_val in ("1", "true", "yes", "on"):
+            return True
+        elif env_val in ("0", "false", "no", "off"):
+            return False
+        else:
+            raise ValueError(f"Invalid value ({env_val}) for {self.key}, which should be a boolean value.")
+
+    def _validate(self, val: Any) -> None:
+        if not isinstance(val, bool):
+            raise TypeError
+
+
 class PathItem(StringItem):
     def _validate(self, val: Any) -> None:
         super()._validate(val)
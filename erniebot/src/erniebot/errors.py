@@ -17,6 +17,7 @@ from typing import Any, Mapping, Optional
 __all__ = [
     "ArgumentNotFoundError",
     "InvalidArgumentError",
+    "ContextLengthExceededError",
     "TokenUpdateFailedError",
     "UnsupportedAPITypeError",
     "HTTPRequestError",
@@ -51,6 +52,10 @@ class InvalidArgumentError(EBError):
     """An argument is invalid."""
 
 
+class ContextLengthExceededError(InvalidArgumentError):
+    """The input is estimated to exceed the context length of the model."""
+
+
 class TokenUpdateFailedError(EBError):
     """The security token could not be updated."""
 
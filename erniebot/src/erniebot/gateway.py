@@ -0,0 +1,446 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""An OpenAI-compatible HTTP gateway backed by the SDK.
+
+The gateway exposes `POST /v1/chat/completions` (with SSE streaming),
+`POST /v1/embeddings`, and `GET /v1/models`. All upstream requests share one
+pooled `aiohttp` session and the credentials of the gateway process. Clients
+are identified by the bearer token in the `Authorization` header (or by their
+address) for rate limiting. Identical non-streamed requests that are in flight
+at the same time are coalesced into one upstream request, and their responses
+can optionally be cached.
+"""
+
+import asyncio
+import collections
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+import erniebot
+
+from . import errors
+from .response import EBResponse
+from .utils import logging
+
+__all__ = ["GatewayConfig", "create_app", "serve"]
+
+# Keys of OpenAI chat completion requests that are passed to `ChatCompletion`
+# with the same names.
+_CHAT_PASSTHROUGH_KEYS = (
+    "functions",
+    "temperature",
+    "top_p",
+    "stop",
+    "tool_choice",
+    # ERNIE-specific parameters
+    "penalty_score",
+    "system",
+    "disable_search",
+    "enable_citation",
+)
+
+
+@dataclass
+class GatewayConfig(object):
+    host: str = "127.0.0.1"
+    port: int = 8000
+    # Maximum number of connections to the upstream service.
+    pool_size: int = 100
+    # Maximum number of requests per second for each client. `None` means no
+    # limit.
+    rate_limit: Optional[float] = None
+    # Maximum number of requests that a client can send in a burst.
+    burst: int = 10
+    # Whether to merge identical non-streamed requests that are in flight.
+    coalesce: bool = True
+    # Seconds to cache responses of non-streamed requests. 0 disables caching.
+    cache_ttl: float = 0
+    # Maximum number of cached responses.
+    cache_size: int = 1024
+
+
+class _TokenBucket(object):
+    def __init__(self, rate: float, capacity: int) -> None:
+        super().__init__()
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._last_time = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_time) * self._rate)
+        self._last_time = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def is_full(self, now: float) -> bool:
+        # A full bucket behaves like a new one, so it can be dropped.
+        return self._tokens + (now - self._last_time) * self._rate >= self._capacity
+
+
+class _TTLCache(object):
+    def __init__(self, ttl: float, max_size: int) -> None:
+        super().__init__()
+        self._ttl = ttl
+        self._max_size = max_size
+        self._data: "collections.OrderedDict[str, Tuple[float, Any]]" = collections.OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key, None)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+
+class _Gateway(object):
+    def __init__(self, config: GatewayConfig) -> None:
+        super().__init__()
+        self._config = config
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Ordered by the time of last use. Buckets that have refilled are
+        # dropped, so that the number of buckets is bounded by the number of
+        # recently active clients.
+        self._buckets: "collections.OrderedDict[str, _TokenBucket]" = collections.OrderedDict()
+        self._inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        self._cache = _TTLCache(config.cache_ttl, config.cache_size) if config.cache_ttl > 0 else None
+
+    async def session_context(self, app: web.Application) -> AsyncIterator[None]:
+        connector = aiohttp.TCPConnector(limit=self._config.pool_size)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            self._session = session
+            yield
+            self._session = None
+
+    @web.middleware
+    async def rate_limit_middleware(
+        self, request: web.Request, handler: Callable[[web.Request], Awaitable[web.StreamResponse]]
+    ) -> web.StreamResponse:
+        if self._config.rate_limit is not None:
+            client_id = self._get_client_id(request)
+            self._drop_full_buckets()
+            bucket = self._buckets.get(client_id, None)
+            if bucket is None:
+                bucket = self._buckets[client_id] = _TokenBucket(self._config.rate_limit, self._config.burst)
+            else:
+                self._buckets.move_to_end(client_id)
+            if not bucket.try_acquire():
+                return _error_response(429, "Rate limit exceeded.", "rate_limit_exceeded")
+        return await handler(request)
+
+    def _drop_full_buckets(self) -> None:
+        now = time.monotonic()
+        while self._buckets:
+            client_id, bucket = next(iter(self._buckets.items()))
+            if not bucket.is_full(now):
+                break
+            del self._buckets[client_id]
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await _read_json(request)
+        try:
+            model = body["model"]
+            kwargs = _convert_chat_request(body)
+        except (KeyError, TypeError, ValueError) as e:
+            return _error_response(400, f"Invalid request: {e}", "invalid_request_error")
+
+        if kwargs.get("stream", False):
+            return await self._stream_chat_completion(request, model, kwargs)
+
+        async def _create() -> Dict[str, Any]:
+            resp = await erniebot.ChatCompletion.acreate(_config_=self._get_sdk_config(), **kwargs)
+            assert isinstance(resp, EBResponse)
+            return _convert_chat_response(resp, model)
+
+        return await self._handle_non_stream("chat", kwargs, _create)
+
+    async def embeddings(self, request: web.Request) -> web.StreamResponse:
+        body = await _read_json(request)
+        try:
+            model = body["model"]
+            input_ = body["input"]
+            if isinstance(input_, str):
+                input_ = [input_]
+            if not isinstance(input_, list) or not all(isinstance(x, str) for x in input_):
+                raise TypeError("`input` must be a string or a list of strings.")
+        except (KeyError, TypeError) as e:
+            return _error_response(400, f"Invalid request: {e}", "invalid_request_error")
+        kwargs: Dict[str, Any] = {"model": model, "input": input_}
+        if "user" in body:
+            kwargs["user_id"] = body["user"]
+
+        async def _create() -> Dict[str, Any]:
+            resp = await erniebot.Embedding.acreate(_config_=self._get_sdk_config(), **kwargs)
+            return {
+                "object": "list",
+                "data": [
+                    {"object": "embedding", "embedding": item["embedding"], "index": item["index"]}
+                    for item in resp.data
+                ],
+                "model": model,
+                "usage": resp.get("usage", {}),
+            }
+
+        return await self._handle_non_stream("embeddings", kwargs, _create)
+
+    async def models(self, request: web.Request) -> web.StreamResponse:
+        data = [
+            {"id": name, "object": "model", "owned_by": "baidu", "description": desc}
+            for name, desc in erniebot.Model.list()
+        ]
+        return web.json_response({"object": "list", "data": data})
+
+    async def _handle_non_stream(
+        self, endpoint: str, kwargs: Dict[str, Any], create: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> web.StreamResponse:
+        key = _make_request_key(endpoint, kwargs)
+        if self._cache is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return web.json_response(cached)
+
+        try:
+            if self._config.coalesce:
+                result = await self._coalesce(key, create)
+            else:
+                result = await create()
+        except (errors.EBError, ValueError) as e:
+            return _error_response_from_exception(e)
+
+        if self._cache is not None:
+            self._cache.put(key, result)
+        return web.json_response(result)
+
+    async def _coalesce(self, key: str, create: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        task = self._inflight.get(key, None)
+        if task is None:
+            task = asyncio.ensure_future(create())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield the shared task, so that a disconnected client does not cancel
+        # the request for others.
+        return await asyncio.shield(task)
+
+    async def _stream_chat_completion(
+        self, request: web.Request, model: str, kwargs: Dict[str, Any]
+    ) -> web.StreamResponse:
+        try:
+            resp_iter = await erniebot.ChatCompletion.acreate(_config_=self._get_sdk_config(), **kwargs)
+        except (errors.EBError, ValueError) as e:
+            return _error_response_from_exception(e)
+
+        stream_resp = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream; charset=utf-8", "Cache-Control": "no-cache"}
+        )
+        try:
+            await stream_resp.prepare(request)
+            await self._write_chat_completion_chunks(stream_resp, resp_iter, model)
+        finally:
+            # Close the upstream stream even if the client has disconnected
+            # or the handler is cancelled.
+            aclose = getattr(resp_iter, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        return stream_resp
+
+    async def _write_chat_completion_chunks(
+        self, stream_resp: web.StreamResponse, resp_iter: AsyncIterator[Any], model: str
+    ) -> None:
+        id_ = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        is_first = True
+        try:
+            async for chunk in resp_iter:
+                delta: Dict[str, Any] = {}
+                if is_first:
+                    delta["role"] = "assistant"
+                    is_first = False
+                if chunk.rbody.get("function_call", None) is not None:
+                    delta["function_call"] = chunk.rbody["function_call"]
+                else:
+                    delta["content"] = chunk.rbody.get("result", "")
+                finish_reason = _get_finish_reason(chunk.rbody) if chunk.rbody.get("is_end", False) else None
+                data = {
+                    "id": id_,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                if "usage" in chunk.rbody and finish_reason is not None:
+                    data["usage"] = chunk.rbody["usage"]
+                await stream_resp.write(_format_sse(data))
+        except errors.EBError as e:
+            # The status line has been sent, so report the error in the stream.
+            logging.warning("Upstream error while streaming: %s", e)
+            await stream_resp.write(_format_sse({"error": {"message": str(e), "type": "upstream_error"}}))
+        await stream_resp.write(b"data: [DONE]\n\n")
+        await stream_resp.write_eof()
+
+    def _get_sdk_config(self) -> Dict[str, Any]:
+        return {"aiohttp_session": self._session}
+
+    def _get_client_id(self, request: web.Request) -> str:
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer ") and len(auth) > len("Bearer "):
+            return "key:" + auth[len("Bearer ") :]
+        return "addr:" + (request.remote or "")
+
+
+def create_app(config: Optional[GatewayConfig] = None) -> web.Application:
+    """Creates the gateway application.
+
+    Upstream settings (API type, credentials, retries, etc.) are taken from the
+    global configuration of the SDK.
+    """
+    if config is None:
+        config = GatewayConfig()
+    gateway = _Gateway(config)
+    app = web.Application(middlewares=[gateway.rate_limit_middleware])
+    app.cleanup_ctx.append(gateway.session_context)
+    app.router.add_post("/v1/chat/completions", gateway.chat_completions)
+    app.router.add_post("/v1/embeddings", gateway.embeddings)
+    app.router.add_get("/v1/models", gateway.models)
+    return app
+
+
+def serve(config: Optional[GatewayConfig] = None) -> None:
+    """Runs the gateway until interrupted."""
+    if config is None:
+        config = GatewayConfig()
+    web.run_app(create_app(config), host=config.host, port=config.port)
+
+
+def _convert_chat_request(body: Dict[str, Any]) -> Dict[str, Any]:
+    messages: List[dict] = []
+    system_parts: List[str] = []
+    for message in body["messages"]:
+        role = message["role"]
+        if role == "system":
+            # ERNIE takes the system message as a separate parameter.
+            system_parts.append(message["content"])
+            continue
+        converted = {"role": role, "content": message.get("content", None) or ""}
+        for key in ("name", "function_call"):
+            if message.get(key, None) is not None:
+                converted[key] = message[key]
+        messages.append(converted)
+
+    kwargs: Dict[str, Any] = {"model": body["model"], "messages": messages}
+    for key in _CHAT_PASSTHROUGH_KEYS:
+        if body.get(key, None) is not None:
+            kwargs[key] = body[key]
+    if system_parts and "system" not in kwargs:
+        kwargs["system"] = "\n".join(system_parts)
+    if body.get("user", None) is not None:
+        kwargs["user_id"] = body["user"]
+    if body.get("max_tokens", None) is not None:
+        kwargs["extra_params"] = {"max_output_tokens": body["max_tokens"]}
+    if body.get("stream", False):
+        kwargs["stream"] = True
+    return kwargs
+
+
+def _convert_chat_response(resp: EBResponse, model: str) -> Dict[str, Any]:
+    rbody = resp.rbody
+    assert isinstance(rbody, dict)
+    message: Dict[str, Any] = {"role": "assistant", "content": rbody.get("result", "")}
+    if rbody.get("function_call", None) is not None:
+        message["content"] = None
+        message["function_call"] = rbody["function_call"]
+    return {
+        "id": rbody.get("id", None) or f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": rbody.get("created", None) or int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": _get_finish_reason(rbody)}],
+        "usage": rbody.get("usage", {}),
+    }
+
+
+def _get_finish_reason(rbody: Dict[str, Any]) -> str:
+    if rbody.get("function_call", None) is not None:
+        return "function_call"
+    finish_reason = rbody.get("finish_reason", None)
+    if finish_reason == "length" or rbody.get("is_truncated", False):
+        return "length"
+    return "stop"
+
+
+def _make_request_key(endpoint: str, kwargs: Dict[str, Any]) -> str:
+    canonical = json.dumps(kwargs, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}\n{canonical}".encode()).hexdigest()
+
+
+async def _read_json(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError as e:
+        raise web.HTTPBadRequest(
+            text=json.dumps({"error": {"message": f"Invalid JSON: {e}", "type": "invalid_request_error"}}),
+            content_type="application/json",
+        ) from e
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(
+            text=json.dumps(
+                {"error": {"message": "Expected a JSON object.", "type": "invalid_request_error"}}
+            ),
+            content_type="application/json",
+        )
+    return body
+
+
+def _format_sse(data: Dict[str, Any]) -> bytes:
+    return b"data: " + json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n\n"
+
+
+def _error_response(status: int, message: str, type_: str) -> web.Response:
+    return web.json_response({"error": {"message": message, "type": type_}}, status=status)
+
+
+def _error_response_from_exception(e: Exception) -> web.Response:
+    if isinstance(
+        e, (errors.InvalidArgumentError, errors.ArgumentNotFoundError, errors.BadRequestError, ValueError)
+    ):
+        return _error_response(400, str(e), "invalid_request_error")
+    elif isinstance(e, (errors.RateLimitError, errors.RequestLimitError)):
+        return _error_response(429, str(e), "rate_limit_exceeded")
+    elif isinstance(e, errors.TimeoutError):
+        return _error_response(504, str(e), "upstream_timeout")
+    elif isinstance(e, errors.UnsupportedAPITypeError):
+        return _error_response(501, str(e), "not_supported")
+    else:
+        logging.warning("Upstream error: %s", e)
+        return _error_response(502, str(e), "upstream_error")
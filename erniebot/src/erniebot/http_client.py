@@ -40,8 +40,14 @@
 from __future__ import annotations
 
 import asyncio
+import gzip
 import http
 import json
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager, contextmanager
 from json import JSONDecodeError
 from typing import (
@@ -59,23 +65,67 @@ from typing import (
 )
 
 import aiohttp
+import asyncio_atexit  # type: ignore
 import requests
+from requests.structures import CaseInsensitiveDict
 
 import erniebot
 
 from . import constants, errors
+from .cassette import Cassette, Interaction, InteractionRecorder
+from .prepared import encode_params
 from .response import EBResponse
-from .types import HeadersType, ParamsType
+from .streaming import AsyncResponseStream, ResponseStream
+from .types import HeadersType, ParamsType, StreamMode
 from .utils import logging
 from .utils.url import add_query_params
 
-__all__ = ["EBClient"]
+__all__ = ["EBClient", "get_loop_aiohttp_session"]
+
+# Matches payloads that carry a nonzero error code in the formats of the
+# supported backends, so that raw streams only decode suspicious payloads.
+_ERROR_PAYLOAD_PATTERN: Final[re.Pattern] = re.compile(rb'"(?:error_code|errorCode)"\s*:\s*(?!0\s*[,}])')
+
+# Shared sessions created by `get_loop_aiohttp_session`. An aiohttp session is
+# bound to the event loop it is created in, so there is one for each loop.
+_loop_aiohttp_sessions: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, aiohttp.ClientSession
+] = weakref.WeakKeyDictionary()
+
+
+def get_loop_aiohttp_session(create: bool = False) -> Optional[aiohttp.ClientSession]:
+    """Returns the shared session of the running event loop.
+
+    Requests that are not given a session use the shared session if there is
+    one, so that they reuse its connections. The session is closed when the
+    event loop is closed.
+
+    Args:
+        create: Whether to create the session if it does not exist.
+    """
+    loop = asyncio.get_running_loop()
+    session = _loop_aiohttp_sessions.get(loop, None)
+    if session is not None and session.closed:
+        session = None
+    if session is None and create:
+        session = aiohttp.ClientSession()
+        _loop_aiohttp_sessions[loop] = session
+        asyncio_atexit.register(_close_loop_aiohttp_session)
+    return session
+
+
+async def _close_loop_aiohttp_session() -> None:
+    session = _loop_aiohttp_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
 
 
 class EBClient(object):
     """Provides low-level APIs to send HTTP requests and handle responses."""
 
     DEFAULT_REQUEST_TIMEOUT_SECS: Final[float] = constants.DEFAULT_REQUEST_TIMEOUT_SECS
+    ACCEPT_ENCODING: Final[str] = "gzip, deflate"
+    COMPRESSION_LEVEL: Final[int] = 6
 
     _session: Optional[requests.Session]
     _asession: Optional[aiohttp.ClientSession]
@@ -88,6 +138,9 @@ class EBClient(object):
         asession: Optional[aiohttp.ClientSession] = None,
         response_handler: Optional[Callable[[EBResponse], EBResponse]] = None,
         proxy: Optional[str] = None,
+        cassette: Optional[Cassette] = None,
+        replay_speed: Optional[float] = None,
+        compression_threshold: Optional[int] = None,
     ) -> None:
         super().__init__()
         self._base_url = base_url
@@ -95,6 +148,9 @@ class EBClient(object):
         self._asession = asession
         self._resp_handler = response_handler
         self._proxy = proxy
+        self._cassette = cassette
+        self._replay_speed = replay_speed if replay_speed is not None else 1.0
+        self._compression_threshold = compression_threshold
 
     def prepare_request(
         self,
@@ -112,7 +168,11 @@ class EBClient(object):
                 url = add_query_params(url, [(str(k), str(v)) for k, v in params.items() if v is not None])
         elif method == "POST" or method == "PUT":
             if params:
-                data = json.dumps(params).encode()
+                data = encode_params(params)
+                if self._compression_threshold is not None and len(data) >= self._compression_threshold:
+                    # `mtime` is fixed to make the body deterministic.
+                    data = gzip.compress(data, compresslevel=self.COMPRESSION_LEVEL, mtime=0)
+                    headers["Content-Encoding"] = "gzip"
         else:
             raise errors.ConnectionError(f"Unrecognized HTTP method: {repr(method)}")
 
@@ -127,38 +187,41 @@ class EBClient(object):
         self,
         method: str,
         url: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         data: Optional[bytes] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
+        if self._cassette is not None and self._cassette.is_replaying:
+            return self._replay_request(method, url, stream, data=data)
+        headers = self._add_accept_encoding(headers, stream)
+
         ctx = self._make_requests_session_context_manager()
         session = ctx.__enter__()
         should_clean_up_ctx = True
 
         try:
+            start_time = time.monotonic()
             result = self.send_request_raw(
                 session,
                 method.upper(),
                 url,
                 data=data,
                 headers=headers,
-                stream=stream,
+                stream=bool(stream),
                 request_timeout=request_timeout,
             )
             should_clean_up_result = True
             try:
-                resp, got_stream = self._interpret_response(result)
-                if stream != got_stream:
-                    logging.warning("Unexpected response: %s", resp)
-                    logging.warning(
-                        f"A {'streamed' if stream else 'non-streamed'} response was expected, "
-                        f"but got a {'streamed' if got_stream else 'non-streamed'} response. "
-                    )
+                recorder = self._start_recording(
+                    method, url, data, result.status_code, result.headers, time.monotonic() - start_time
+                )
+                resp, got_stream = self._interpret_response(result, recorder, raw=stream == "raw")
+                self._check_stream(bool(stream), got_stream, resp)
                 if got_stream:
 
-                    def wrap_resp(resp: Iterator) -> Iterator[EBResponse]:
+                    def wrap_resp(resp: Iterator) -> Iterator:
                         try:
                             for r in resp:
                                 yield r
@@ -167,7 +230,8 @@ class EBClient(object):
                             ctx.__exit__(None, None, None)
 
                     assert isinstance(resp, Iterator)
-                    resp = wrap_resp(resp)
+                    # Cancelling the stream closes the connection at once.
+                    resp = ResponseStream(wrap_resp(resp), on_cancel=result.close)
 
                     should_clean_up_result = False
                     should_clean_up_ctx = False
@@ -185,17 +249,22 @@ class EBClient(object):
         self,
         method: str,
         url: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         data: Optional[bytes] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
+        if self._cassette is not None and self._cassette.is_replaying:
+            return await self._areplay_request(method, url, stream, data=data)
+        headers = self._add_accept_encoding(headers, stream)
+
         ctx = self._make_aiohttp_session_context_manager()
         session = await ctx.__aenter__()
         should_clean_up_ctx = True
 
         try:
+            start_time = time.monotonic()
             result = await self.asend_request_raw(
                 session,
                 method.upper(),
@@ -206,16 +275,16 @@ class EBClient(object):
             )
             should_clean_up_result = True
             try:
-                resp, got_stream = await self._interpret_async_response(result)
-                if stream != got_stream:
-                    logging.warning("Unexpected response: %s", resp)
-                    logging.warning(
-                        f"A {'streamed' if stream else 'non-streamed'} response was expected, "
-                        f"but got a {'streamed' if got_stream else 'non-streamed'} response. "
-                    )
+                recorder = self._start_recording(
+                    method, url, data, result.status, result.headers, time.monotonic() - start_time
+                )
+                resp, got_stream = await self._interpret_async_response(
+                    result, recorder, raw=stream == "raw"
+                )
+                self._check_stream(bool(stream), got_stream, resp)
                 if got_stream:
 
-                    async def wrap_resp(resp: AsyncIterator) -> AsyncIterator[EBResponse]:
+                    async def wrap_resp(resp: AsyncIterator) -> AsyncIterator:
                         try:
                             async for r in resp:
                                 yield r
@@ -224,7 +293,7 @@ class EBClient(object):
                             await ctx.__aexit__(None, None, None)
 
                     assert isinstance(resp, AsyncIterator)
-                    resp = wrap_resp(resp)
+                    resp = AsyncResponseStream(wrap_resp(resp), on_cancel=result.close)
 
                     should_clean_up_result = False
                     should_clean_up_ctx = False
@@ -292,6 +361,76 @@ class EBClient(object):
 
         return result
 
+    def warm_up(self, num_connections: int = 1, request_timeout: Optional[float] = None) -> None:
+        """Opens connections to the server.
+
+        The connections can be reused by later requests only if the client is
+        created with a session.
+        """
+        if self._cassette is not None and self._cassette.is_replaying:
+            return
+        url = self._base_url
+        headers = self._get_request_headers("HEAD", None)
+        # Each connection is held until all are open, so that none of them is
+        # reused by another request of the warm-up.
+        barrier = threading.Barrier(num_connections)
+        with self._make_requests_session_context_manager() as session:
+
+            def _open_connection() -> None:
+                resp = self.send_request_raw(session, "HEAD", url, None, headers, True, request_timeout)
+                try:
+                    barrier.wait(timeout=request_timeout or self.DEFAULT_REQUEST_TIMEOUT_SECS)
+                except threading.BrokenBarrierError:
+                    pass
+                finally:
+                    # Closing the response would close the connection, so the
+                    # body is consumed to return the connection to the pool.
+                    resp.raw.read()
+                    resp.raw.release_conn()
+
+            with ThreadPoolExecutor(max_workers=num_connections) as executor:
+                futures = [executor.submit(_open_connection) for _ in range(num_connections)]
+                try:
+                    for future in futures:
+                        future.result()
+                finally:
+                    barrier.abort()
+
+    async def awarm_up(self, num_connections: int = 1, request_timeout: Optional[float] = None) -> None:
+        """Opens connections to the server asynchronously.
+
+        The connections can be reused by later requests only if the client is
+        created with a session, or if the shared session of the running event
+        loop exists.
+        """
+        if self._cassette is not None and self._cassette.is_replaying:
+            return
+        url = self._base_url
+        headers = self._get_request_headers("HEAD", None)
+        async with self._make_aiohttp_session_context_manager() as session:
+            results = await asyncio.gather(
+                *(
+                    self.asend_request_raw(session, "HEAD", url, None, headers, request_timeout)
+                    for _ in range(num_connections)
+                ),
+                return_exceptions=True,
+            )
+            # Connections are released only after all are open.
+            for result in results:
+                if isinstance(result, aiohttp.ClientResponse):
+                    result.release()
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+    def _add_accept_encoding(self, headers: Optional[HeadersType], stream: StreamMode) -> HeadersType:
+        headers = dict(headers) if headers is not None else {}
+        if not any(key.lower() == "accept-encoding" for key in headers):
+            # Compressed event streams may be buffered by the server or
+            # proxies, which delays the chunks.
+            headers["Accept-Encoding"] = "identity" if stream else self.ACCEPT_ENCODING
+        return headers
+
     def _get_request_headers(self, method: str, supplied_headers: Optional[HeadersType]) -> HeadersType:
         headers = {}
 
@@ -315,16 +454,23 @@ class EBClient(object):
                 raise TypeError("Header values must be strings.")
 
     def _interpret_response(
-        self, response: requests.Response
-    ) -> Tuple[Union[EBResponse, Iterator[EBResponse]], bool]:
+        self, response: requests.Response, recorder: Optional[InteractionRecorder] = None, raw: bool = False
+    ) -> Tuple[Union[EBResponse, Iterator[EBResponse], Iterator[bytes]], bool]:
         if "Content-Type" in response.headers and response.headers["Content-Type"].startswith(
             "text/event-stream"
         ):
+            if raw:
+                return (
+                    self._interpret_raw_stream_response(response, recorder),
+                    True,
+                )
             return (
-                self._interpret_stream_response(response),
+                self._interpret_stream_response(response, recorder),
                 True,
             )
         else:
+            if recorder is not None:
+                recorder.record_body(response.content)
             return (
                 self._interpret_response_line(
                     response.content.decode("utf-8"),
@@ -336,13 +482,21 @@ class EBClient(object):
             )
 
     async def _interpret_async_response(
-        self, response: aiohttp.ClientResponse
-    ) -> Tuple[Union[EBResponse, AsyncIterator[EBResponse]], bool]:
+        self,
+        response: aiohttp.ClientResponse,
+        recorder: Optional[InteractionRecorder] = None,
+        raw: bool = False,
+    ) -> Tuple[Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]], bool]:
         if "Content-Type" in response.headers and response.headers["Content-Type"].startswith(
             "text/event-stream"
         ):
+            if raw:
+                return (
+                    self._interpret_async_raw_stream_response(response, recorder),
+                    True,
+                )
             return (
-                self._interpret_async_stream_response(response),
+                self._interpret_async_stream_response(response, recorder),
                 True,
             )
         else:
@@ -351,6 +505,8 @@ class EBClient(object):
             except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
                 raise errors.TimeoutError(f"Request timed out: {str(e)}") from e
             else:
+                if recorder is not None:
+                    recorder.record_body(rbody)
                 return (
                     self._interpret_response_line(
                         rbody.decode("utf-8"),
@@ -361,18 +517,56 @@ class EBClient(object):
                     False,
                 )
 
-    def _interpret_stream_response(self, response: requests.Response) -> Iterator[EBResponse]:
-        for line in self._parse_stream(response.iter_lines()):
+    def _interpret_stream_response(
+        self, response: requests.Response, recorder: Optional[InteractionRecorder] = None
+    ) -> Iterator[EBResponse]:
+        lines = response.iter_lines()
+        if recorder is not None:
+            lines = recorder.record_lines(lines)
+        for line in self._parse_stream(lines):
             resp = self._interpret_response_line(line, response.status_code, response.headers, stream=True)
             yield resp
 
     async def _interpret_async_stream_response(
-        self, response: aiohttp.ClientResponse
+        self, response: aiohttp.ClientResponse, recorder: Optional[InteractionRecorder] = None
     ) -> AsyncIterator[EBResponse]:
-        async for line in self._parse_async_stream(response.content):
+        lines: Union[aiohttp.StreamReader, AsyncIterator[bytes]] = response.content
+        if recorder is not None:
+            lines = recorder.arecord_lines(lines)
+        async for line in self._parse_async_stream(lines):
             resp = self._interpret_response_line(line, response.status, response.headers, stream=True)
             yield resp
 
+    def _interpret_raw_stream_response(
+        self, response: requests.Response, recorder: Optional[InteractionRecorder] = None
+    ) -> Iterator[bytes]:
+        lines = response.iter_lines()
+        if recorder is not None:
+            lines = recorder.record_lines(lines)
+        for line in lines:
+            payload = self._parse_raw_line(line)
+            if payload is not None:
+                self._check_raw_payload(payload, response.status_code, response.headers)
+                yield payload
+
+    async def _interpret_async_raw_stream_response(
+        self, response: aiohttp.ClientResponse, recorder: Optional[InteractionRecorder] = None
+    ) -> AsyncIterator[bytes]:
+        lines: Union[aiohttp.StreamReader, AsyncIterator[bytes]] = response.content
+        if recorder is not None:
+            lines = recorder.arecord_lines(lines)
+        async for line in lines:
+            payload = self._parse_raw_line(line)
+            if payload is not None:
+                self._check_raw_payload(payload, response.status, response.headers)
+                yield payload
+
+    def _check_raw_payload(self, payload: bytes, rcode: int, rheaders: Mapping[str, Any]) -> None:
+        # Only payloads that look like errors are decoded, in which case the
+        # response handler raises the corresponding exception.
+        if rcode != http.HTTPStatus.OK or _ERROR_PAYLOAD_PATTERN.search(payload) is not None:
+            self._interpret_response_line(payload.decode("utf-8"), rcode, rheaders, stream=True)
+
     def _interpret_response_line(
         self,
         rbody: str,
@@ -429,12 +623,19 @@ class EBClient(object):
             if _line is not None:
                 yield _line
 
-    async def _parse_async_stream(self, rbody: aiohttp.StreamReader) -> AsyncIterator[str]:
+    async def _parse_async_stream(
+        self, rbody: Union[aiohttp.StreamReader, AsyncIterator[bytes]]
+    ) -> AsyncIterator[str]:
         async for line in rbody:
             _line = self._parse_line(line)
             if _line is not None:
                 yield _line
 
+    def _parse_raw_line(self, line: bytes) -> Optional[bytes]:
+        if line.startswith(constants.STREAM_RESPONSE_PREFIX):
+            return line[len(constants.STREAM_RESPONSE_PREFIX) :].rstrip(b"\r\n")
+        return None
+
     def _parse_line(self, line: bytes) -> Optional[str]:
         if line:
             if line.startswith(constants.STREAM_RESPONSE_PREFIX):
@@ -445,6 +646,101 @@ class EBClient(object):
                 return None
         return None
 
+    def _check_stream(self, stream: bool, got_stream: bool, resp: Any) -> None:
+        if stream != got_stream:
+            logging.warning("Unexpected response: %s", resp)
+            logging.warning(
+                f"A {'streamed' if stream else 'non-streamed'} response was expected, "
+                f"but got a {'streamed' if got_stream else 'non-streamed'} response. "
+            )
+
+    def _start_recording(
+        self,
+        method: str,
+        url: str,
+        data: Optional[bytes],
+        rcode: int,
+        rheaders: Mapping[str, Any],
+        latency: float,
+    ) -> Optional[InteractionRecorder]:
+        if self._cassette is None or not self._cassette.is_recording:
+            return None
+        return self._cassette.start_recording(method, url, data, rcode, rheaders, latency)
+
+    def _replay_request(
+        self, method: str, url: str, stream: StreamMode, *, data: Optional[bytes]
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
+        assert self._cassette is not None
+        interaction = self._cassette.find_interaction(method, url, data)
+        time.sleep(self._get_replay_delay(interaction.latency))
+        rheaders = CaseInsensitiveDict(interaction.headers)
+        resp: Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]
+        if interaction.chunks is not None:
+            resp = self._interpret_replayed_stream_response(interaction, rheaders, raw=stream == "raw")
+        else:
+            assert interaction.body is not None
+            resp = self._interpret_response_line(
+                interaction.body, interaction.status, rheaders, stream=False
+            )
+        self._check_stream(bool(stream), interaction.is_stream, resp)
+        return resp
+
+    async def _areplay_request(
+        self, method: str, url: str, stream: StreamMode, *, data: Optional[bytes]
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
+        assert self._cassette is not None
+        interaction = self._cassette.find_interaction(method, url, data)
+        await asyncio.sleep(self._get_replay_delay(interaction.latency))
+        rheaders = CaseInsensitiveDict(interaction.headers)
+        resp: Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]
+        if interaction.chunks is not None:
+            resp = self._interpret_async_replayed_stream_response(interaction, rheaders, raw=stream == "raw")
+        else:
+            assert interaction.body is not None
+            resp = self._interpret_response_line(
+                interaction.body, interaction.status, rheaders, stream=False
+            )
+        self._check_stream(bool(stream), interaction.is_stream, resp)
+        return resp
+
+    def _interpret_replayed_stream_response(
+        self, interaction: Interaction, rheaders: Mapping[str, Any], raw: bool
+    ) -> Iterator[Any]:
+        assert interaction.chunks is not None
+        for delay, line in interaction.chunks:
+            time.sleep(self._get_replay_delay(delay))
+            resp = self._interpret_replayed_line(line, interaction.status, rheaders, raw)
+            if resp is not None:
+                yield resp
+
+    async def _interpret_async_replayed_stream_response(
+        self, interaction: Interaction, rheaders: Mapping[str, Any], raw: bool
+    ) -> AsyncIterator[Any]:
+        assert interaction.chunks is not None
+        for delay, line in interaction.chunks:
+            await asyncio.sleep(self._get_replay_delay(delay))
+            resp = self._interpret_replayed_line(line, interaction.status, rheaders, raw)
+            if resp is not None:
+                yield resp
+
+    def _interpret_replayed_line(
+        self, line: str, rcode: int, rheaders: Mapping[str, Any], raw: bool
+    ) -> Union[EBResponse, bytes, None]:
+        if raw:
+            payload = self._parse_raw_line(line.encode("utf-8"))
+            if payload is not None:
+                self._check_raw_payload(payload, rcode, rheaders)
+            return payload
+        _line = self._parse_line(line.encode("utf-8"))
+        if _line is None:
+            return None
+        return self._interpret_response_line(_line, rcode, rheaders, stream=True)
+
+    def _get_replay_delay(self, recorded_delay: float) -> float:
+        if self._replay_speed == 0:
+            return 0
+        return recorded_delay / self._replay_speed
+
     @contextmanager
     def _make_requests_session_context_manager(self) -> Generator[requests.Session, None, None]:
         if self._session is not None:
@@ -467,8 +763,10 @@ class EBClient(object):
         self,
     ) -> AsyncGenerator[aiohttp.ClientSession, None]:
         # TODO: Support proxies
-        if self._asession is not None:
-            session = self._asession
+        session = self._asession
+        if session is None:
+            session = get_loop_aiohttp_session()
+        if session is not None:
             should_close_session = False
         else:
             session = aiohttp.ClientSession()
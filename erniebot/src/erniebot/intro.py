@@ -12,22 +12,123 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Tuple
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 
-__all__ = ["Model"]
+__all__ = ["Model", "ModelInfo"]
+
+
+@dataclass(frozen=True)
+class ModelInfo(object):
+    """Capabilities of a model.
+
+    Attributes:
+        name: Name of the model.
+        description: Description of the model.
+        api_types: Names of the API types that serve the model.
+        max_input_tokens: Maximum number of input tokens, or None if unknown.
+        max_output_tokens: Maximum number of output tokens, or None if
+            unknown.
+        supports_functions: Whether the model supports function calling.
+        supports_streaming: Whether the model supports response streaming.
+    """
+
+    name: str
+    description: str
+    api_types: Tuple[str, ...]
+    max_input_tokens: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    supports_functions: bool = False
+    supports_streaming: bool = False
+
+
+_CHAT_API_TYPES = ("qianfan", "aistudio", "custom")
+
+_BUILTIN_MODELS = (
+    ModelInfo(
+        name="ernie-3.5",
+        description="文心大模型（ernie-3.5）",
+        api_types=_CHAT_API_TYPES,
+        max_input_tokens=3000,
+        max_output_tokens=2048,
+        supports_functions=True,
+        supports_streaming=True,
+    ),
+    ModelInfo(
+        name="ernie-turbo",
+        description="文心大模型（ernie-turbo）",
+        api_types=("qianfan", "aistudio"),
+        max_input_tokens=3000,
+        supports_streaming=True,
+    ),
+    ModelInfo(
+        name="ernie-4.0",
+        description="文心大模型（ernie-4.0）",
+        api_types=_CHAT_API_TYPES,
+        max_input_tokens=3000,
+        max_output_tokens=2048,
+        supports_functions=True,
+        supports_streaming=True,
+    ),
+    ModelInfo(
+        name="ernie-longtext",
+        description="文心大模型（ernie-longtext）",
+        api_types=_CHAT_API_TYPES,
+        max_input_tokens=7000,
+        max_output_tokens=2048,
+        supports_functions=True,
+        supports_streaming=True,
+    ),
+    ModelInfo(
+        name="ernie-speed",
+        description="文心大模型（ernie-speed）",
+        api_types=("qianfan", "custom"),
+        max_input_tokens=7000,
+        max_output_tokens=2048,
+        supports_streaming=True,
+    ),
+    ModelInfo(
+        name="ernie-text-embedding",
+        description="文心百中语义模型",
+        api_types=("qianfan", "aistudio"),
+        max_input_tokens=384,
+    ),
+    ModelInfo(
+        name="ernie-vilg-v2",
+        description="文心一格模型",
+        api_types=("yinian",),
+        max_input_tokens=200,
+    ),
+)
 
 
 class Model(object):
     """A dummy resource class."""
 
+    _registry: Dict[str, ModelInfo] = {info.name: info for info in _BUILTIN_MODELS}
+    _lock = threading.Lock()
+
     @staticmethod
     def list() -> List[Tuple[str, str]]:
         """Lists the available models."""
-        return [
-            ("ernie-3.5", "文心大模型（ernie-3.5）"),
-            ("ernie-turbo", "文心大模型（ernie-turbo）"),
-            ("ernie-4.0", "文心大模型（ernie-4.0）"),
-            ("ernie-longtext", "文心大模型（ernie-longtext）"),
-            ("ernie-text-embedding", "文心百中语义模型"),
-            ("ernie-vilg-v2", "文心一格模型"),
-        ]
+        return [(info.name, info.description) for info in Model._registry.values()]
+
+    @staticmethod
+    def get(name: str) -> Optional[ModelInfo]:
+        """Gets the capabilities of a model.
+
+        Returns:
+            The capabilities of the model, or None if the model is not
+            registered.
+        """
+        return Model._registry.get(name, None)
+
+    @staticmethod
+    def register(info: ModelInfo) -> None:
+        """Registers a model or replaces the capabilities of a model."""
+        with Model._lock:
+            # Copy on write, so that readers need not hold the lock.
+            registry = dict(Model._registry)
+            registry[info.name] = info
+            Model._registry = registry
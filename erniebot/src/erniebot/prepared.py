@@ -0,0 +1,101 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import json
+from typing import Any, Dict, List, Mapping
+
+__all__ = ["PreparedJSON", "PreparedFunctions", "encode_params"]
+
+
+class PreparedJSON(object):
+    """A JSON value that is encoded once and reused across requests.
+
+    When a request parameter is a `PreparedJSON` object, the encoded text is
+    spliced into the request body as is, instead of being serialized again.
+    The wrapped value is copied on construction, so later changes to the
+    original object do not affect the prepared one.
+    """
+
+    __slots__ = ("_value", "_encoded")
+
+    def __init__(self, value: Any) -> None:
+        super().__init__()
+        self._value = copy.deepcopy(value)
+        self._encoded = json.dumps(self._value)
+
+    @property
+    def value(self) -> Any:
+        return self._value
+
+    @property
+    def encoded(self) -> str:
+        return self._encoded
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PreparedJSON):
+            return NotImplemented
+        return self._encoded == other._encoded
+
+    def __hash__(self) -> int:
+        return hash(self._encoded)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._value!r})"
+
+
+class PreparedFunctions(PreparedJSON):
+    """A list of function descriptions that is encoded once.
+
+    Examples:
+        >>> functions = erniebot.PreparedFunctions([{"name": "get_weather", ...}])
+        >>> for _ in range(num_steps):
+        ...     erniebot.ChatCompletion.create(model=..., messages=..., functions=functions)
+    """
+
+    __slots__ = ()
+
+    def __init__(self, functions: List[dict]) -> None:
+        if not isinstance(functions, list):
+            raise TypeError(f"`functions` should be a list, but got {type(functions)}.")
+        super().__init__(functions)
+
+    @property
+    def value(self) -> List[dict]:
+        return self._value
+
+    def __len__(self) -> int:
+        return len(self._value)
+
+
+def encode_params(params: Mapping[str, Any]) -> bytes:
+    """Encodes request parameters as a JSON object.
+
+    Top-level values that are `PreparedJSON` objects are not serialized again.
+    """
+    plain: Dict[str, Any] = {}
+    fragments: List[str] = []
+    for key, value in params.items():
+        if isinstance(value, PreparedJSON):
+            fragments.append(f"{json.dumps(key)}: {value.encoded}")
+        else:
+            plain[key] = value
+    encoded = json.dumps(plain)
+    if fragments:
+        joined = ", ".join(fragments)
+        if plain:
+            encoded = f"{encoded[:-1]}, {joined}}}"
+        else:
+            encoded = f"{{{joined}}}"
+    return encoded.encode()
@@ -61,7 +61,9 @@ class Creatable(Resource):
 
 
 class CreatableWithStreaming(Resource):
-    def create_resource(self, **create_kwargs: Any) -> Union[EBResponse, Iterator[EBResponse]]:
+    def create_resource(
+        self, **create_kwargs: Any
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         """Creates a resource."""
         req = self._prepare_create(create_kwargs)
         resp = self.request(
@@ -74,11 +76,15 @@ class CreatableWithStreaming(Resource):
         )
         if isinstance(resp, EBResponse):
             resp = self._postprocess_create(resp)
-        else:
+        elif req.stream != "raw":
+            # Raw payloads are passed through as is.
+            resp = cast(Iterator[EBResponse], resp)
             resp = self._postprocess_create(resp)
         return resp
 
-    async def acreate_resource(self, **create_kwargs: Any) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    async def acreate_resource(
+        self, **create_kwargs: Any
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         """Asynchronous version of `create_resource`."""
         req = self._prepare_create(create_kwargs)
         resp = await self.arequest(
@@ -91,7 +97,7 @@ class CreatableWithStreaming(Resource):
         )
         if isinstance(resp, EBResponse):
             resp = self._postprocess_create(resp)
-        else:
+        elif req.stream != "raw":
             # See https://github.com/python/mypy/issues/16590
             resp = cast(AsyncIterator[EBResponse], resp)
             resp = self._postprocess_create(resp)
@@ -24,7 +24,7 @@ from typing import (
 )
 
 from erniebot.response import EBResponse
-from erniebot.types import HeadersType, ParamsType
+from erniebot.types import HeadersType, ParamsType, StreamMode
 
 
 @runtime_checkable
@@ -66,37 +66,53 @@ class Resource(Protocol):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: Literal["raw"],
         *,
         params: Optional[ParamsType] = ...,
         headers: Optional[HeadersType] = ...,
         request_timeout: Optional[float] = ...,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Iterator[bytes]:
+        ...
+
+    @overload
+    def request(
+        self,
+        method: str,
+        path: str,
+        stream: StreamMode,
+        *,
+        params: Optional[ParamsType] = ...,
+        headers: Optional[HeadersType] = ...,
+        request_timeout: Optional[float] = ...,
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         ...
 
     def request(
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         """Makes an HTTP request for the resource.
 
         Args:
             method: HTTP method to use.
             path: Path to request.
-            stream: Whether to enable streaming.
+            stream: Whether to enable streaming. If `stream` is "raw",
+                enables streaming without decoding the server-sent events.
             params: Parameters to send.
             headers: Headers to add to the request.
             request_timeout: Request timeout in seconds.
 
         Returns:
             If `stream` is True, returns an iterator that yields response
-            objects. Otherwise returns a response object.
+            objects. If `stream` is "raw", returns an iterator that yields the
+            payloads of server-sent events as bytes. Otherwise returns a
+            response object.
         """
         ...
 
@@ -131,23 +147,36 @@ class Resource(Protocol):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: Literal["raw"],
+        *,
+        params: Optional[ParamsType] = ...,
+        headers: Optional[HeadersType] = ...,
+        request_timeout: Optional[float] = ...,
+    ) -> AsyncIterator[bytes]:
+        ...
+
+    @overload
+    async def arequest(
+        self,
+        method: str,
+        path: str,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = ...,
         headers: Optional[HeadersType] = ...,
         request_timeout: Optional[float] = ...,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         ...
 
     async def arequest(
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         """Asynchronous version of `request`."""
         ...
@@ -12,6 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import functools
+import hashlib
+import json
+import threading
 from typing import (
     Any,
     AsyncIterator,
@@ -23,23 +28,28 @@ from typing import (
     Optional,
     Tuple,
     Union,
+    cast,
     overload,
 )
 
 import jsonschema
-import jsonschema.exceptions
+import jsonschema.protocols
+import jsonschema.validators
 
 import erniebot.errors as errors
 from erniebot.api_types import APIType
+from erniebot.intro import Model
+from erniebot.prepared import PreparedFunctions, PreparedJSON
 from erniebot.response import EBResponse
-from erniebot.types import ConfigDictType, HeadersType, RequestWithStream
-from erniebot.utils import logging
+from erniebot.streaming import AsyncResponseStream, ResponseStream
+from erniebot.types import ConfigDictType, HeadersType, RequestWithStream, StreamMode
+from erniebot.utils import logging, token_helper
 from erniebot.utils.misc import NOT_GIVEN, NotGiven, filter_args, transform
 
 from .abc import CreatableWithStreaming
 from .resource import EBResource
 
-__all__ = ["ChatCompletion", "ChatCompletionResponse"]
+__all__ = ["ChatCompletion", "ChatCompletionResponse", "StreamAccumulator", "AsyncStreamAccumulator"]
 
 
 class ChatCompletion(EBResource, CreatableWithStreaming):
@@ -48,6 +58,20 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         APIType.AISTUDIO,
         APIType.CUSTOM,
     )
+    _MODEL_ALIASES: ClassVar[Dict[str, str]] = {
+        "ernie-bot": "ernie-3.5",
+        "ernie-bot-turbo": "ernie-turbo",
+        "ernie-bot-4": "ernie-4.0",
+        "ernie-bot-8k": "ernie-longtext",
+    }
+    # For these models, `stop` is applied on the client side.
+    _MODELS_WITHOUT_STOP: ClassVar[Tuple[str, ...]] = ("ernie-turbo", "ernie-speed")
+    _LONG_CONTEXT_MODEL: ClassVar[str] = "ernie-longtext"
+    _VALIDATED_FUNCTIONS_CACHE_SIZE: ClassVar[int] = 256
+
+    _validated_functions_digests: ClassVar["collections.OrderedDict[str, None]"] = collections.OrderedDict()
+    _validated_functions_lock: ClassVar[threading.Lock] = threading.Lock()
+
     _API_INFO_DICT: ClassVar[Dict[APIType, Dict[str, Any]]] = {
         APIType.QIANFAN: {
             "resource_id": "chat",
@@ -112,11 +136,11 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = ...,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
         temperature: Union[float, NotGiven] = ...,
         top_p: Union[float, NotGiven] = ...,
         penalty_score: Union[float, NotGiven] = ...,
-        system: Union[str, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
         stop: Union[str, NotGiven] = ...,
         disable_search: Union[bool, NotGiven] = ...,
         enable_citation: Union[bool, NotGiven] = ...,
@@ -138,11 +162,11 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = ...,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
         temperature: Union[float, NotGiven] = ...,
         top_p: Union[float, NotGiven] = ...,
         penalty_score: Union[float, NotGiven] = ...,
-        system: Union[str, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
         stop: Union[str, NotGiven] = ...,
         disable_search: Union[bool, NotGiven] = ...,
         enable_citation: Union[bool, NotGiven] = ...,
@@ -164,23 +188,49 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = ...,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
+        temperature: Union[float, NotGiven] = ...,
+        top_p: Union[float, NotGiven] = ...,
+        penalty_score: Union[float, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
+        stop: Union[str, NotGiven] = ...,
+        disable_search: Union[bool, NotGiven] = ...,
+        enable_citation: Union[bool, NotGiven] = ...,
+        user_id: Union[str, NotGiven] = ...,
+        tool_choice: Union[dict, NotGiven] = ...,
+        stream: Literal["raw"],
+        validate_functions: bool = ...,
+        extra_params: Optional[dict] = ...,
+        headers: Optional[HeadersType] = ...,
+        request_timeout: Optional[float] = ...,
+        _config_: Optional[ConfigDictType] = ...,
+    ) -> Iterator[bytes]:
+        ...
+
+    @overload
+    @classmethod
+    def create(
+        cls,
+        model: str,
+        messages: List[dict],
+        *,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
         temperature: Union[float, NotGiven] = ...,
         top_p: Union[float, NotGiven] = ...,
         penalty_score: Union[float, NotGiven] = ...,
-        system: Union[str, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
         stop: Union[str, NotGiven] = ...,
         disable_search: Union[bool, NotGiven] = ...,
         enable_citation: Union[bool, NotGiven] = ...,
         user_id: Union[str, NotGiven] = ...,
         tool_choice: Union[dict, NotGiven] = ...,
-        stream: bool,
+        stream: StreamMode,
         validate_functions: bool = ...,
         extra_params: Optional[dict] = ...,
         headers: Optional[HeadersType] = ...,
         request_timeout: Optional[float] = ...,
         _config_: Optional[ConfigDictType] = ...,
-    ) -> Union["ChatCompletionResponse", Iterator["ChatCompletionResponse"]]:
+    ) -> Union["ChatCompletionResponse", Iterator["ChatCompletionResponse"], Iterator[bytes]]:
         ...
 
     @classmethod
@@ -189,42 +239,50 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = NOT_GIVEN,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = NOT_GIVEN,
         temperature: Union[float, NotGiven] = NOT_GIVEN,
         top_p: Union[float, NotGiven] = NOT_GIVEN,
         penalty_score: Union[float, NotGiven] = NOT_GIVEN,
-        system: Union[str, NotGiven] = NOT_GIVEN,
+        system: Union[str, PreparedJSON, NotGiven] = NOT_GIVEN,
         stop: Union[str, NotGiven] = NOT_GIVEN,
         disable_search: Union[bool, NotGiven] = NOT_GIVEN,
         enable_citation: Union[bool, NotGiven] = NOT_GIVEN,
         user_id: Union[str, NotGiven] = NOT_GIVEN,
         tool_choice: Union[dict, NotGiven] = NOT_GIVEN,
-        stream: Union[bool, NotGiven] = NOT_GIVEN,
+        stream: Union[StreamMode, NotGiven] = NOT_GIVEN,
         validate_functions: bool = False,
         extra_params: Optional[dict] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
         _config_: Optional[ConfigDictType] = None,
-    ) -> Union["ChatCompletionResponse", Iterator["ChatCompletionResponse"]]:
+    ) -> Union["ChatCompletionResponse", Iterator["ChatCompletionResponse"], Iterator[bytes]]:
         """Creates a model response for the given conversation.
 
         Args:
             model: Name of the model to use.
             messages: Messages comprising the conversation so far.
             functions: Descriptions of the functions that the model may generate
-                JSON inputs for.
+                JSON inputs for. Pass a `PreparedFunctions` object to avoid
+                encoding the same functions in every request.
             temperature: Sampling temperature to use.
             top_p: Parameter of nucleus sampling that affects the diversity of
                 generated content.
             penalty_score: Penalty assigned to new tokens that appear in the
                 generated text so far.
             system: Text that tells the model how to interpret the conversation.
+                May be wrapped in a `PreparedJSON` object.
             stop: Instructs the model to stop generating further tokens at the
-                first occurrence of any of these strings.
+                first occurrence of any of these strings. For models that do not
+                support this parameter, the strings are matched on the client
+                side, and a streamed response is closed at the first match.
             disable_search: Whether to disable the search engine.
             enable_citation: Whether to enable citation generation.
             user_id: ID for the end user.
-            stream: Whether to enable response streaming.
+            stream: Whether to enable response streaming. If `stream` is "raw",
+                the payloads of server-sent events are yielded as bytes without
+                being decoded, which is useful for relaying the stream. A
+                streamed response can be cancelled by calling its `cancel`
+                method, which closes the connection at once.
             validate_functions: Whether to validate the function descriptions.
             headers: Custom headers to send with the request.
             request_timeout: Timeout for a single request.
@@ -232,7 +290,8 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
 
         Returns:
             If `stream` is True, returns an iterator that yields response
-            objects. Otherwise returns a response object.
+            objects. If `stream` is "raw", returns an iterator that yields
+            bytes. Otherwise returns a response object.
         """
         config = _config_ or {}
         resource = cls(**config)
@@ -258,8 +317,14 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
             kwargs["headers"] = headers
         if request_timeout is not None:
             kwargs["request_timeout"] = request_timeout
+        client_side_stop = cls._pop_client_side_stop(kwargs)
         resp = resource.create_resource(**kwargs)
-        return transform(ChatCompletionResponse.from_mapping, resp)
+        if stream == "raw":
+            return cast(Iterator[bytes], resp)
+        chat_resp = transform(ChatCompletionResponse.from_mapping, resp)
+        if client_side_stop:
+            chat_resp = _apply_stop_sequences(chat_resp, client_side_stop)
+        return chat_resp
 
     @overload
     @classmethod
@@ -268,11 +333,11 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = ...,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
         temperature: Union[float, NotGiven] = ...,
         top_p: Union[float, NotGiven] = ...,
         penalty_score: Union[float, NotGiven] = ...,
-        system: Union[str, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
         stop: Union[str, NotGiven] = ...,
         disable_search: Union[bool, NotGiven] = ...,
         enable_citation: Union[bool, NotGiven] = ...,
@@ -294,11 +359,11 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = ...,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
         temperature: Union[float, NotGiven] = ...,
         top_p: Union[float, NotGiven] = ...,
         penalty_score: Union[float, NotGiven] = ...,
-        system: Union[str, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
         stop: Union[str, NotGiven] = ...,
         disable_search: Union[bool, NotGiven] = ...,
         enable_citation: Union[bool, NotGiven] = ...,
@@ -320,23 +385,49 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = ...,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
+        temperature: Union[float, NotGiven] = ...,
+        top_p: Union[float, NotGiven] = ...,
+        penalty_score: Union[float, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
+        stop: Union[str, NotGiven] = ...,
+        disable_search: Union[bool, NotGiven] = ...,
+        enable_citation: Union[bool, NotGiven] = ...,
+        user_id: Union[str, NotGiven] = ...,
+        tool_choice: Union[dict, NotGiven] = ...,
+        stream: Literal["raw"],
+        validate_functions: bool = ...,
+        extra_params: Optional[dict] = ...,
+        headers: Optional[HeadersType] = ...,
+        request_timeout: Optional[float] = ...,
+        _config_: Optional[ConfigDictType] = ...,
+    ) -> AsyncIterator[bytes]:
+        ...
+
+    @overload
+    @classmethod
+    async def acreate(
+        cls,
+        model: str,
+        messages: List[dict],
+        *,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = ...,
         temperature: Union[float, NotGiven] = ...,
         top_p: Union[float, NotGiven] = ...,
         penalty_score: Union[float, NotGiven] = ...,
-        system: Union[str, NotGiven] = ...,
+        system: Union[str, PreparedJSON, NotGiven] = ...,
         stop: Union[str, NotGiven] = ...,
         disable_search: Union[bool, NotGiven] = ...,
         enable_citation: Union[bool, NotGiven] = ...,
         user_id: Union[str, NotGiven] = ...,
         tool_choice: Union[dict, NotGiven] = ...,
-        stream: bool,
+        stream: StreamMode,
         validate_functions: bool = ...,
         extra_params: Optional[dict] = ...,
         headers: Optional[HeadersType] = ...,
         request_timeout: Optional[float] = ...,
         _config_: Optional[ConfigDictType] = ...,
-    ) -> Union["ChatCompletionResponse", AsyncIterator["ChatCompletionResponse"]]:
+    ) -> Union["ChatCompletionResponse", AsyncIterator["ChatCompletionResponse"], AsyncIterator[bytes]]:
         ...
 
     @classmethod
@@ -345,42 +436,50 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         model: str,
         messages: List[dict],
         *,
-        functions: Union[List[dict], NotGiven] = NOT_GIVEN,
+        functions: Union[List[dict], PreparedFunctions, NotGiven] = NOT_GIVEN,
         temperature: Union[float, NotGiven] = NOT_GIVEN,
         top_p: Union[float, NotGiven] = NOT_GIVEN,
         penalty_score: Union[float, NotGiven] = NOT_GIVEN,
-        system: Union[str, NotGiven] = NOT_GIVEN,
+        system: Union[str, PreparedJSON, NotGiven] = NOT_GIVEN,
         stop: Union[str, NotGiven] = NOT_GIVEN,
         disable_search: Union[bool, NotGiven] = NOT_GIVEN,
         enable_citation: Union[bool, NotGiven] = NOT_GIVEN,
         user_id: Union[str, NotGiven] = NOT_GIVEN,
         tool_choice: Union[dict, NotGiven] = NOT_GIVEN,
-        stream: Union[bool, NotGiven] = NOT_GIVEN,
+        stream: Union[StreamMode, NotGiven] = NOT_GIVEN,
         validate_functions: bool = False,
         extra_params: Optional[dict] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
         _config_: Optional[ConfigDictType] = None,
-    ) -> Union["ChatCompletionResponse", AsyncIterator["ChatCompletionResponse"]]:
+    ) -> Union["ChatCompletionResponse", AsyncIterator["ChatCompletionResponse"], AsyncIterator[bytes]]:
         """Creates a model response for the given conversation.
 
         Args:
             model: Name of the model to use.
             messages: Messages comprising the conversation so far.
             functions: Descriptions of the functions that the model may generate
-                JSON inputs for.
+                JSON inputs for. Pass a `PreparedFunctions` object to avoid
+                encoding the same functions in every request.
             temperature: Sampling temperature to use.
             top_p: Parameter of nucleus sampling that affects the diversity of
                 generated content.
             penalty_score: Penalty assigned to new tokens that appear in the
                 generated text so far.
             system: Text that tells the model how to interpret the conversation.
+                May be wrapped in a `PreparedJSON` object.
             stop: Instructs the model to stop generating further tokens at the
-                first occurrence of any of these strings.
+                first occurrence of any of these strings. For models that do not
+                support this parameter, the strings are matched on the client
+                side, and a streamed response is closed at the first match.
             disable_search: Whether to disable the search engine.
             enable_citation: Whether to enable citation generation.
             user_id: ID for the end user.
-            stream: Whether to enable response streaming.
+            stream: Whether to enable response streaming. If `stream` is "raw",
+                the payloads of server-sent events are yielded as bytes without
+                being decoded, which is useful for relaying the stream. A
+                streamed response can be cancelled by calling its `cancel`
+                method, which closes the connection at once.
             validate_functions: Whether to validate the function descriptions.
             headers: Custom headers to send with the request.
             request_timeout: Timeout for a single request.
@@ -388,7 +487,8 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
 
         Returns:
             If `stream` is True, returns an iterator that yields response
-            objects. Otherwise returns a response object.
+            objects. If `stream` is "raw", returns an iterator that yields
+            bytes. Otherwise returns a response object.
         """
         config = _config_ or {}
         resource = cls(**config)
@@ -414,8 +514,14 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
             kwargs["headers"] = headers
         if request_timeout is not None:
             kwargs["request_timeout"] = request_timeout
+        client_side_stop = cls._pop_client_side_stop(kwargs)
         resp = await resource.acreate_resource(**kwargs)
-        return transform(ChatCompletionResponse.from_mapping, resp)
+        if stream == "raw":
+            return cast(AsyncIterator[bytes], resp)
+        chat_resp = transform(ChatCompletionResponse.from_mapping, resp)
+        if client_side_stop:
+            chat_resp = _apply_stop_sequences(chat_resp, client_side_stop)
+        return chat_resp
 
     def _prepare_create(self, kwargs: Dict[str, Any]) -> RequestWithStream:
         def _update_model_name(given_name: str, old_name_to_new_name: Dict[str, str]) -> str:
@@ -462,21 +568,18 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
             raise errors.ArgumentNotFoundError("model")
         model = kwargs["model"]
         # For backward compatibility
-        model = _update_model_name(
-            model,
-            {
-                "ernie-bot": "ernie-3.5",
-                "ernie-bot-turbo": "ernie-turbo",
-                "ernie-bot-4": "ernie-4.0",
-                "ernie-bot-8k": "ernie-longtext",
-            },
-        )
+        model = _update_model_name(model, self._MODEL_ALIASES)
 
         # messages
         if "messages" not in kwargs:
             raise errors.ArgumentNotFoundError("messages")
         messages = kwargs["messages"]
 
+        # Preflight check of the context length
+        overflow_policy = self._cfg.get("context_overflow", None) or "ignore"
+        if overflow_policy != "ignore":
+            model = self._check_context_length(model, kwargs, overflow_policy)
+
         # path
         if self.api_type in self.SUPPORTED_API_TYPES:
             api_info = self._API_INFO_DICT[self.api_type]
@@ -517,7 +620,8 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
             # The AI Studio backend automatically injects `user_id`.
             _set_val_if_key_exists(kwargs, params, "user_id")
         _set_val_if_key_exists(kwargs, params, "tool_choice")
-        _set_val_if_key_exists(kwargs, params, "stream")
+        if "stream" in kwargs:
+            params["stream"] = bool(kwargs["stream"])
         if "extra_params" in kwargs:
             params.update(kwargs["extra_params"])
 
@@ -544,7 +648,106 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
         )
 
     @classmethod
-    def _validate_functions(cls, functions: List[dict]) -> None:
+    def _pop_client_side_stop(cls, kwargs: Dict[str, Any]) -> Optional[List[str]]:
+        if "stop" not in kwargs or kwargs.get("stream", False) == "raw":
+            return None
+        model = kwargs.get("model", None)
+        if cls._MODEL_ALIASES.get(model, model) not in cls._MODELS_WITHOUT_STOP:
+            return None
+        stop = kwargs.pop("stop")
+        return [stop] if isinstance(stop, str) else list(stop)
+
+    def _check_context_length(self, model: str, kwargs: Dict[str, Any], policy: str) -> str:
+        if policy not in ("raise", "route"):
+            raise ValueError(f"Invalid context overflow policy: {repr(policy)}")
+        info = Model.get(model)
+        if info is None:
+            return model
+
+        max_output_tokens = kwargs.get("extra_params", {}).get("max_output_tokens", None)
+        if (
+            info.max_output_tokens is not None
+            and max_output_tokens is not None
+            and max_output_tokens > info.max_output_tokens
+        ):
+            raise errors.InvalidArgumentError(
+                f"`max_output_tokens` should not exceed {info.max_output_tokens} for the {model} model."
+            )
+
+        if info.max_input_tokens is None:
+            return model
+        num_tokens = self._estimate_num_input_tokens(kwargs)
+        if num_tokens <= info.max_input_tokens:
+            return model
+        if policy == "route":
+            target = Model.get(self._LONG_CONTEXT_MODEL)
+            if (
+                target is not None
+                and target.name in self._API_INFO_DICT.get(self.api_type, {}).get("models", {})
+                and target.max_input_tokens is not None
+                and num_tokens <= target.max_input_tokens
+                and (target.supports_functions or "functions" not in kwargs)
+            ):
+                logging.info(
+                    "The input (about %d tokens) exceeds the context length of %s. Routing to %s.",
+                    num_tokens,
+                    model,
+                    target.name,
+                )
+                return target.name
+        raise errors.ContextLengthExceededError(
+            f"The input (about {num_tokens} tokens) exceeds the context length of the {model} model"
+            f" ({info.max_input_tokens} tokens)."
+        )
+
+    @staticmethod
+    def _estimate_num_input_tokens(kwargs: Dict[str, Any]) -> int:
+        texts: List[str] = []
+        for message in kwargs["messages"]:
+            if message.get("content", None):
+                texts.append(message["content"])
+            if "function_call" in message:
+                texts.append(json.dumps(message["function_call"], ensure_ascii=False))
+        system = kwargs.get("system", None)
+        if isinstance(system, PreparedJSON):
+            system = system.value
+        if system:
+            texts.append(system)
+        functions = kwargs.get("functions", None)
+        if isinstance(functions, PreparedFunctions):
+            functions = functions.value
+        if functions:
+            texts.append(json.dumps(functions, ensure_ascii=False))
+        return sum(token_helper.approx_num_tokens_batch(texts))
+
+    @classmethod
+    def _validate_functions(cls, functions: Union[List[dict], PreparedFunctions]) -> None:
+        # Agents typically send the same functions in every request, so the
+        # digests of validated functions are cached to skip revalidation.
+        if isinstance(functions, PreparedFunctions):
+            digest = hashlib.sha256(functions.encoded.encode()).hexdigest()
+            functions = functions.value
+        else:
+            try:
+                digest = hashlib.sha256(
+                    json.dumps(functions, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode()
+                ).hexdigest()
+            except (TypeError, ValueError):
+                # Not serializable. Let the request fail later with a clearer error.
+                cls._do_validate_functions(functions)
+                return
+        with cls._validated_functions_lock:
+            if digest in cls._validated_functions_digests:
+                cls._validated_functions_digests.move_to_end(digest)
+                return
+        cls._do_validate_functions(functions)
+        with cls._validated_functions_lock:
+            cls._validated_functions_digests[digest] = None
+            while len(cls._validated_functions_digests) > cls._VALIDATED_FUNCTIONS_CACHE_SIZE:
+                cls._validated_functions_digests.popitem(last=False)
+
+    @classmethod
+    def _do_validate_functions(cls, functions: List[dict]) -> None:
         for idx, function in enumerate(functions):
             if "parameters" in function:
                 parameters = function["parameters"]
@@ -565,12 +768,127 @@ class ChatCompletion(EBResource, CreatableWithStreaming):
 
     @staticmethod
     def _check_json_schema(schema: dict) -> bool:
+        return _get_meta_schema_validator().is_valid(schema)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_meta_schema_validator() -> jsonschema.protocols.Validator:
+    # Equivalent to what `jsonschema.Draft202012Validator.check_schema` builds
+    # on every call.
+    meta_schema = jsonschema.Draft202012Validator.META_SCHEMA
+    validator_cls = jsonschema.validators.validator_for(meta_schema, default=jsonschema.Draft202012Validator)
+    return validator_cls(meta_schema, format_checker=validator_cls.FORMAT_CHECKER)
+
+
+class _StopSequenceMatcher(object):
+    def __init__(self, stop: List[str]) -> None:
+        super().__init__()
+        self._stop = [s for s in stop if s]
+        self._pending = ""
+
+    def feed(self, text: str) -> Tuple[str, bool]:
+        """Returns the text that is safe to emit and whether a stop sequence
+        was found."""
+        text = self._pending + text
+        self._pending = ""
+        positions = [pos for pos in (text.find(s) for s in self._stop) if pos >= 0]
+        if positions:
+            return text[: min(positions)], True
+        # Hold back the longest suffix that may be the start of a stop sequence.
+        num_held = 0
+        for s in self._stop:
+            for length in range(min(len(s) - 1, len(text)), num_held, -1):
+                if text.endswith(s[:length]):
+                    num_held = length
+                    break
+        if num_held > 0:
+            self._pending = text[-num_held:]
+            text = text[:-num_held]
+        return text, False
+
+    def flush(self) -> str:
+        text = self._pending
+        self._pending = ""
+        return text
+
+
+def _apply_stop_sequences(resp: Any, stop: List[str]) -> Any:
+    def _replace(chunk: "ChatCompletionResponse", **fields: Any) -> "ChatCompletionResponse":
+        return ChatCompletionResponse(chunk.rcode, {**cast(dict, chunk.rbody), **fields}, chunk.rheaders)
+
+    def _process(
+        matcher: _StopSequenceMatcher, chunk: "ChatCompletionResponse", is_last: bool = False
+    ) -> Tuple["ChatCompletionResponse", bool]:
+        if "result" not in chunk:
+            return chunk, False
+        text, stopped = matcher.feed(chunk.result)
+        if stopped:
+            return _replace(chunk, result=text, is_end=True, finish_reason="stop"), True
+        if is_last or chunk.get("is_end", False):
+            text += matcher.flush()
+        return _replace(chunk, result=text), False
+
+    def _flush(
+        matcher: _StopSequenceMatcher, last_chunk: Optional["ChatCompletionResponse"]
+    ) -> Optional["ChatCompletionResponse"]:
+        # Returns a chunk with the text held back, if the stream ended without
+        # an `is_end` chunk.
+        text = matcher.flush()
+        if not text or last_chunk is None:
+            return None
+        return _replace(last_chunk, result=text)
+
+    if isinstance(resp, ChatCompletionResponse):
+        # A complete response has no more text that may complete a stop
+        # sequence.
+        result, _ = _process(_StopSequenceMatcher(stop), resp, is_last=True)
+        return result
+
+    if isinstance(resp, AsyncIterator):
+        astream = resp if isinstance(resp, AsyncResponseStream) else AsyncResponseStream(resp)
+
+        async def _agen() -> AsyncIterator[ChatCompletionResponse]:
+            matcher = _StopSequenceMatcher(stop)
+            last_chunk = None
+            try:
+                async for chunk in astream:
+                    last_chunk = chunk
+                    chunk, stopped = _process(matcher, chunk)
+                    yield chunk
+                    if stopped:
+                        # No need to receive the rest of the response.
+                        astream.cancel()
+                        break
+                else:
+                    final_chunk = _flush(matcher, last_chunk)
+                    if final_chunk is not None:
+                        yield final_chunk
+            finally:
+                await astream.aclose()
+
+        return AsyncResponseStream(_agen(), on_cancel=astream.cancel)
+
+    stream = resp if isinstance(resp, ResponseStream) else ResponseStream(resp)
+
+    def _gen() -> Iterator[ChatCompletionResponse]:
+        matcher = _StopSequenceMatcher(stop)
+        last_chunk = None
         try:
-            jsonschema.Draft202012Validator.check_schema(schema)
-        except jsonschema.exceptions.SchemaError:
-            return False
-        else:
-            return True
+            for chunk in stream:
+                last_chunk = chunk
+                chunk, stopped = _process(matcher, chunk)
+                yield chunk
+                if stopped:
+                    stream.cancel()
+                    break
+            else:
+                final_chunk = _flush(matcher, last_chunk)
+                if final_chunk is not None:
+                    yield final_chunk
+        finally:
+            stream.close()
+
+    return ResponseStream(_gen(), on_cancel=stream.cancel)
 
 
 class ChatCompletionResponse(EBResponse):
@@ -592,3 +910,121 @@ class ChatCompletionResponse(EBResponse):
         else:
             message["content"] = self.result
         return message
+
+
+class _ChunkAccumulator(object):
+    def __init__(self) -> None:
+        super().__init__()
+        self._first: Optional[ChatCompletionResponse] = None
+        self._last_body: Dict[str, Any] = {}
+        self._result_parts: List[str] = []
+        self._function_call: Optional[Dict[str, Any]] = None
+        self._arguments_parts: List[str] = []
+        self._thoughts_parts: List[str] = []
+        self._search_info: Any = None
+        self._num_chunks = 0
+        self._response: Optional[ChatCompletionResponse] = None
+
+    @property
+    def num_chunks(self) -> int:
+        """Number of chunks added so far."""
+        return self._num_chunks
+
+    def add(self, chunk: ChatCompletionResponse) -> None:
+        """Adds a chunk."""
+        if self._first is None:
+            self._first = chunk
+        body = cast(dict, chunk.rbody)
+        self._last_body = body
+        result = body.get("result", None)
+        if result:
+            self._result_parts.append(result)
+        function_call = body.get("function_call", None)
+        if function_call:
+            if self._function_call is None:
+                self._function_call = dict(function_call)
+            elif function_call.get("name", None):
+                self._function_call["name"] = function_call["name"]
+            if function_call.get("arguments", None):
+                self._arguments_parts.append(function_call["arguments"])
+            if function_call.get("thoughts", None):
+                self._thoughts_parts.append(function_call["thoughts"])
+        if body.get("search_info", None):
+            self._search_info = body["search_info"]
+        self._num_chunks += 1
+        self._response = None
+
+    @property
+    def response(self) -> ChatCompletionResponse:
+        """The response object that merges the chunks added so far.
+
+        `result`, `function_call.arguments`, and `function_call.thoughts` are
+        concatenated. The other fields, including the cumulative `usage`, are
+        taken from the last chunk that has them.
+        """
+        if self._first is None:
+            raise RuntimeError("No chunks have been added.")
+        if self._response is None:
+            body = dict(self._last_body)
+            body["result"] = "".join(self._result_parts)
+            if self._function_call is not None:
+                function_call = dict(self._function_call)
+                if self._arguments_parts:
+                    function_call["arguments"] = "".join(self._arguments_parts)
+                if self._thoughts_parts:
+                    function_call["thoughts"] = "".join(self._thoughts_parts)
+                body["function_call"] = function_call
+            if self._search_info is not None:
+                body["search_info"] = self._search_info
+            self._response = ChatCompletionResponse(self._first.rcode, body, self._first.rheaders)
+        return self._response
+
+
+class StreamAccumulator(_ChunkAccumulator):
+    """Passes through the chunks of a streamed chat completion and merges them
+    into a final response.
+
+    Text is collected in an append-only buffer and joined once, so that
+    accumulating a long stream takes linear time.
+
+    Examples:
+        >>> chunks = erniebot.ChatCompletion.create(..., stream=True)
+        >>> acc = erniebot.StreamAccumulator(chunks)
+        >>> for chunk in acc:
+        ...     print(chunk.get_result(), end="")
+        >>> acc.response.usage
+    """
+
+    def __init__(self, stream: Iterator[ChatCompletionResponse]) -> None:
+        super().__init__()
+        self._stream = stream
+
+    def __iter__(self) -> Iterator[ChatCompletionResponse]:
+        for chunk in self._stream:
+            self.add(chunk)
+            yield chunk
+
+    def consume(self) -> ChatCompletionResponse:
+        """Consumes the remaining chunks and returns the final response."""
+        for _ in self:
+            pass
+        return self.response
+
+
+class AsyncStreamAccumulator(_ChunkAccumulator):
+    """Asynchronous version of `StreamAccumulator`."""
+
+    def __init__(self, stream: AsyncIterator[ChatCompletionResponse]) -> None:
+        super().__init__()
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionResponse]:
+        async for chunk in self._stream:
+            self.add(chunk)
+            yield chunk
+
+    async def consume(self) -> ChatCompletionResponse:
+        """Consumes the remaining chunks and returns the final response."""
+        async for _ in self:
+            pass
+        return self.response
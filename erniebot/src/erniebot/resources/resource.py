@@ -40,7 +40,8 @@ from erniebot.api_types import APIType, convert_str_to_api_type
 from erniebot.backends import build_backend
 from erniebot.config import GlobalConfig
 from erniebot.response import EBResponse
-from erniebot.types import ConfigDictType, HeadersType, ParamsType
+from erniebot.scheduling import get_scheduler
+from erniebot.types import ConfigDictType, HeadersType, ParamsType, StreamMode
 
 
 class EBResource(object):
@@ -75,6 +76,9 @@ class EBResource(object):
 
         self._backend = build_backend(self.api_type, self._cfg)
 
+        max_concurrent_requests = self._cfg.get("max_concurrent_requests", None)
+        self._scheduler = get_scheduler(max_concurrent_requests) if max_concurrent_requests else None
+
     @overload
     def request(
         self,
@@ -106,12 +110,25 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: Literal["raw"],
+        *,
+        params: Optional[ParamsType] = ...,
+        headers: Optional[HeadersType] = ...,
+        request_timeout: Optional[float] = ...,
+    ) -> Iterator[bytes]:
+        ...
+
+    @overload
+    def request(
+        self,
+        method: str,
+        path: str,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = ...,
         headers: Optional[HeadersType] = ...,
         request_timeout: Optional[float] = ...,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         ...
 
     @final
@@ -119,12 +136,12 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         retrying = tenacity.Retrying(
             stop=tenacity.stop_after_attempt(self.max_retries + 1),
             wait=tenacity.wait_exponential(multiplier=1, max=self.retry_after[1], min=self.retry_after[0])
@@ -143,14 +160,31 @@ class EBResource(object):
         )
         for attempt in retrying:
             with attempt:
-                return self._request(
-                    method=method,
-                    path=path,
-                    stream=stream,
-                    params=params,
-                    headers=headers,
-                    request_timeout=request_timeout,
-                )
+                if self._scheduler is None:
+                    return self._request(
+                        method=method,
+                        path=path,
+                        stream=stream,
+                        params=params,
+                        headers=headers,
+                        request_timeout=request_timeout,
+                    )
+                # Each attempt waits for its turn, so that no capacity is held
+                # while waiting to retry.
+                self._scheduler.acquire(*self._get_scheduling_key(params))
+                try:
+                    resp = self._request(
+                        method=method,
+                        path=path,
+                        stream=stream,
+                        params=params,
+                        headers=headers,
+                        request_timeout=request_timeout,
+                    )
+                except BaseException:
+                    self._scheduler.release()
+                    raise
+                return self._scheduler.hold_until_done(resp)
         raise AssertionError
 
     @overload
@@ -184,12 +218,25 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: Literal["raw"],
+        *,
+        params: Optional[ParamsType] = ...,
+        headers: Optional[HeadersType] = ...,
+        request_timeout: Optional[float] = ...,
+    ) -> AsyncIterator[bytes]:
+        ...
+
+    @overload
+    async def arequest(
+        self,
+        method: str,
+        path: str,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = ...,
         headers: Optional[HeadersType] = ...,
         request_timeout: Optional[float] = ...,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         ...
 
     @final
@@ -197,12 +244,12 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         *,
         params: Optional[ParamsType] = None,
         headers: Optional[HeadersType] = None,
         request_timeout: Optional[float] = None,
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         async_retrying = tenacity.AsyncRetrying(
             stop=tenacity.stop_after_attempt(self.max_retries + 1),
             wait=tenacity.wait_exponential(multiplier=1, max=self.retry_after[1], min=self.retry_after[0])
@@ -221,14 +268,29 @@ class EBResource(object):
         )
         async for attempt in async_retrying:
             with attempt:
-                return await self._arequest(
-                    method=method,
-                    path=path,
-                    stream=stream,
-                    params=params,
-                    headers=headers,
-                    request_timeout=request_timeout,
-                )
+                if self._scheduler is None:
+                    return await self._arequest(
+                        method=method,
+                        path=path,
+                        stream=stream,
+                        params=params,
+                        headers=headers,
+                        request_timeout=request_timeout,
+                    )
+                await self._scheduler.aacquire(*self._get_scheduling_key(params))
+                try:
+                    resp = await self._arequest(
+                        method=method,
+                        path=path,
+                        stream=stream,
+                        params=params,
+                        headers=headers,
+                        request_timeout=request_timeout,
+                    )
+                except BaseException:
+                    self._scheduler.release()
+                    raise
+                return self._scheduler.hold_until_done(resp)
         raise AssertionError
 
     @final
@@ -320,11 +382,23 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: Literal["raw"],
+        params: Optional[ParamsType],
+        headers: Optional[HeadersType],
+        request_timeout: Optional[float],
+    ) -> Iterator[bytes]:
+        ...
+
+    @overload
+    def _request(
+        self,
+        method: str,
+        path: str,
+        stream: StreamMode,
         params: Optional[ParamsType],
         headers: Optional[HeadersType],
         request_timeout: Optional[float],
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         ...
 
     @final
@@ -332,11 +406,11 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         params: Optional[ParamsType],
         headers: Optional[HeadersType],
         request_timeout: Optional[float],
-    ) -> Union[EBResponse, Iterator[EBResponse]]:
+    ) -> Union[EBResponse, Iterator[EBResponse], Iterator[bytes]]:
         resp = self._backend.request(
             method,
             path,
@@ -382,11 +456,23 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: Literal["raw"],
         params: Optional[ParamsType],
         headers: Optional[HeadersType],
         request_timeout: Optional[float],
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> AsyncIterator[bytes]:
+        ...
+
+    @overload
+    async def _arequest(
+        self,
+        method: str,
+        path: str,
+        stream: StreamMode,
+        params: Optional[ParamsType],
+        headers: Optional[HeadersType],
+        request_timeout: Optional[float],
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         ...
 
     @final
@@ -394,11 +480,11 @@ class EBResource(object):
         self,
         method: str,
         path: str,
-        stream: bool,
+        stream: StreamMode,
         params: Optional[ParamsType],
         headers: Optional[HeadersType],
         request_timeout: Optional[float],
-    ) -> Union[EBResponse, AsyncIterator[EBResponse]]:
+    ) -> Union[EBResponse, AsyncIterator[EBResponse], AsyncIterator[bytes]]:
         resp = await self._backend.arequest(
             method,
             path,
@@ -415,6 +501,13 @@ class EBResource(object):
                 raise RuntimeError("Expected a response object")
         return resp
 
+    def _get_scheduling_key(self, params: Optional[ParamsType]) -> Tuple[str, str]:
+        priority = self._cfg.get("request_priority", None) or "interactive"
+        tenant = self._cfg.get("tenant", None)
+        if tenant is None and params is not None:
+            tenant = params.get("user_id", None)
+        return priority, str(tenant or "")
+
     def _create_config_dict(self, overrides: Any) -> ConfigDictType:
         cfg_dict = GlobalConfig().create_dict(**overrides)
         api_type_str = cfg_dict["api_type"]
@@ -0,0 +1,291 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import heapq
+import itertools
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from .streaming import AsyncResponseStream, ResponseStream
+from .utils.misc import SingletonMeta
+
+__all__ = ["PRIORITY_CLASSES", "RequestScheduler", "get_scheduler"]
+
+# Requests of a class are always dispatched before those of the classes that
+# follow it.
+PRIORITY_CLASSES = ("interactive", "batch")
+
+_ResponseT = TypeVar("_ResponseT")
+
+
+@dataclass(order=True)
+class _Waiter(object):
+    priority: int
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    event: Optional[threading.Event] = field(default=None, compare=False)
+    future: Optional[asyncio.Future] = field(default=None, compare=False)
+    loop: Optional[asyncio.AbstractEventLoop] = field(default=None, compare=False)
+    granted: bool = field(default=False, compare=False)
+    abandoned: bool = field(default=False, compare=False)
+
+
+class RequestScheduler(object):
+    """Limits the number of in-flight requests and decides which waiting
+    request to send next.
+
+    Waiting requests are dispatched by priority class first. Within a class,
+    tenants share the capacity by weighted fair queuing: each tenant gets a
+    share proportional to its weight, regardless of how many requests it
+    has queued. Both threads and coroutines can wait on the same scheduler.
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        super().__init__()
+        self._max_concurrency = max_concurrency
+        self._num_in_flight = 0
+        self._queue: List[_Waiter] = []
+        self._weights: Dict[str, float] = {}
+        self._last_finish_tags: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    @max_concurrency.setter
+    def max_concurrency(self, value: int) -> None:
+        with self._lock:
+            self._max_concurrency = value
+            self._dispatch_locked()
+
+    @property
+    def num_in_flight(self) -> int:
+        return self._num_in_flight
+
+    @property
+    def num_waiting(self) -> int:
+        with self._lock:
+            return sum(1 for waiter in self._queue if not waiter.abandoned)
+
+    def set_tenant_weight(self, tenant: str, weight: float) -> None:
+        """Sets the share of capacity of a tenant. The default weight is 1."""
+        if weight <= 0:
+            raise ValueError(f"Invalid weight ({weight}), which should be positive.")
+        with self._lock:
+            self._weights[tenant] = weight
+
+    def acquire(self, priority: Union[str, int] = "interactive", tenant: str = "") -> None:
+        """Waits until a request can be sent."""
+        level = _get_priority_level(priority)
+        event = threading.Event()
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            self._enqueue_locked(level, tenant, event=event)
+        event.wait()
+
+    async def aacquire(self, priority: Union[str, int] = "interactive", tenant: str = "") -> None:
+        """Asynchronous version of `acquire`."""
+        level = _get_priority_level(priority)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            waiter = self._enqueue_locked(level, tenant, future=future, loop=loop)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked()
+                else:
+                    waiter.abandoned = True
+            raise
+
+    def release(self) -> None:
+        """Marks a request as finished."""
+        with self._lock:
+            self._release_locked()
+
+    def hold_until_done(self, resp: _ResponseT) -> _ResponseT:
+        """Releases the capacity taken by `acquire` or `aacquire` once the
+        response is complete.
+
+        A response object is complete at once, and a streamed response is
+        complete when it is exhausted, closed, cancelled, or garbage
+        collected.
+        """
+        lock = threading.Lock()
+        released = False
+
+        def _release_once() -> None:
+            nonlocal released
+            with lock:
+                if released:
+                    return
+                released = True
+            self.release()
+
+        if isinstance(resp, Iterator):
+            stream = resp
+
+            def _gen() -> Iterator[Any]:
+                try:
+                    yield from stream
+                finally:
+                    _release_once()
+
+            def _cancel() -> None:
+                if isinstance(stream, ResponseStream):
+                    stream.cancel()
+                _release_once()
+
+            wrapped_stream = ResponseStream(_gen(), on_cancel=_cancel)
+            # A stream that is dropped without being closed is cancelled.
+            weakref.finalize(wrapped_stream, _cancel).atexit = False
+            return cast(_ResponseT, wrapped_stream)
+        elif isinstance(resp, AsyncIterator):
+            astream = resp
+
+            async def _agen() -> AsyncIterator[Any]:
+                try:
+                    async for item in astream:
+                        yield item
+                finally:
+                    _release_once()
+
+            def _acancel() -> None:
+                if isinstance(astream, AsyncResponseStream):
+                    astream.cancel()
+                _release_once()
+
+            wrapped_astream = AsyncResponseStream(_agen(), on_cancel=_acancel)
+            weakref.finalize(wrapped_astream, _acancel).atexit = False
+            return cast(_ResponseT, wrapped_astream)
+        else:
+            _release_once()
+            return resp
+
+    def _try_acquire_locked(self) -> bool:
+        if self._num_in_flight < self._max_concurrency and not self._queue:
+            self._num_in_flight += 1
+            return True
+        return False
+
+    def _enqueue_locked(
+        self,
+        priority: int,
+        tenant: str,
+        *,
+        event: Optional[threading.Event] = None,
+        future: Optional[asyncio.Future] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> _Waiter:
+        # Start-time fair queuing: the tags advance by 1/weight per request of
+        # the tenant, and a tenant that has been idle starts from the current
+        # virtual time instead of its stale tag.
+        start_tag = max(self._virtual_time, self._last_finish_tags.get(tenant, 0.0))
+        finish_tag = start_tag + 1.0 / self._weights.get(tenant, 1.0)
+        self._last_finish_tags[tenant] = finish_tag
+        waiter = _Waiter(
+            priority=priority,
+            finish_tag=finish_tag,
+            seq=next(self._counter),
+            start_tag=start_tag,
+            event=event,
+            future=future,
+            loop=loop,
+        )
+        heapq.heappush(self._queue, waiter)
+        # Waiters that were abandoned may have left capacity unused.
+        self._dispatch_locked()
+        return waiter
+
+    def _release_locked(self) -> None:
+        self._num_in_flight -= 1
+        self._dispatch_locked()
+
+    def _dispatch_locked(self) -> None:
+        while self._queue and self._num_in_flight < self._max_concurrency:
+            waiter = heapq.heappop(self._queue)
+            if waiter.abandoned:
+                continue
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            self._num_in_flight += 1
+            waiter.granted = True
+            if waiter.event is not None:
+                waiter.event.set()
+            else:
+                assert waiter.future is not None and waiter.loop is not None
+                waiter.loop.call_soon_threadsafe(_set_future_result, waiter.future)
+        if not self._queue:
+            # Tags of idle tenants are no longer needed.
+            self._last_finish_tags.clear()
+
+
+def _get_priority_level(priority: Union[str, int]) -> int:
+    if isinstance(priority, int):
+        return priority
+    try:
+        return PRIORITY_CLASSES.index(priority)
+    except ValueError:
+        raise ValueError(f"Unknown priority class: {repr(priority)}") from None
+
+
+def _set_future_result(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _SchedulerRegistry(metaclass=SingletonMeta):
+    def __init__(self) -> None:
+        super().__init__()
+        self.scheduler: Optional[RequestScheduler] = None
+        self.lock = threading.Lock()
+
+
+def get_scheduler(max_concurrency: Optional[int] = None) -> Optional[RequestScheduler]:
+    """Returns the global scheduler.
+
+    The scheduler is created on first use. If `max_concurrency` is given, the
+    capacity of the scheduler is updated to it. Returns None if the
+    scheduler has not been created and `max_concurrency` is not given.
+    """
+    registry = _SchedulerRegistry()
+    with registry.lock:
+        scheduler = registry.scheduler
+        if max_concurrency is not None:
+            if scheduler is None:
+                scheduler = registry.scheduler = RequestScheduler(max_concurrency)
+            elif scheduler.max_concurrency != max_concurrency:
+                scheduler.max_concurrency = max_concurrency
+    return scheduler
@@ -0,0 +1,165 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from typing_extensions import Self
+
+__all__ = ["ResponseStream", "AsyncResponseStream"]
+
+_T = TypeVar("_T")
+_U = TypeVar("_U")
+
+
+class ResponseStream(Iterator[_T]):
+    """An iterator over a streamed response that can be cancelled.
+
+    Cancelling the stream closes the underlying HTTP connection at once, so
+    that no more data is received, and ends the iteration. `cancel` can be
+    called from another thread. `close` also releases the resources held by
+    the stream and should be called from the consuming thread. The stream
+    can be used as a context manager, which closes it on exit.
+    """
+
+    def __init__(self, iterator: Iterator[_T], on_cancel: Optional[Callable[[], Any]] = None) -> None:
+        super().__init__()
+        self._iterator = iterator
+        self._on_cancel = on_cancel
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def __iter__(self) -> Self:
+        return self
+
+    def __next__(self) -> _T:
+        if self._cancelled:
+            raise StopIteration
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise
+        except Exception:
+            # Reading from a closed connection fails in a library-specific way.
+            if self._cancelled:
+                raise StopIteration from None
+            raise
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def cancel(self) -> None:
+        """Stops receiving the response."""
+        if not self._cancelled:
+            self._cancelled = True
+            if self._on_cancel is not None:
+                self._on_cancel()
+
+    def close(self) -> None:
+        """Cancels the stream and releases its resources."""
+        self.cancel()
+        close = getattr(self._iterator, "close", None)
+        if close is not None:
+            close()
+
+    def map(self, func: Callable[[_T], _U]) -> "ResponseStream[_U]":
+        """Returns a stream that applies `func` to each item of this stream.
+
+        Cancelling or closing the returned stream also cancels or closes this
+        stream.
+        """
+
+        def _map() -> Iterator[_U]:
+            try:
+                for item in self:
+                    yield func(item)
+            finally:
+                self.close()
+
+        return ResponseStream(_map(), on_cancel=self.cancel)
+
+
+class AsyncResponseStream(AsyncIterator[_T]):
+    """An asynchronous iterator over a streamed response that can be
+    cancelled.
+
+    See `ResponseStream` for details. The stream can be used as an
+    asynchronous context manager, which closes it on exit.
+    """
+
+    def __init__(self, iterator: AsyncIterator[_T], on_cancel: Optional[Callable[[], Any]] = None) -> None:
+        super().__init__()
+        self._iterator = iterator
+        self._on_cancel = on_cancel
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def __aiter__(self) -> Self:
+        return self
+
+    async def __anext__(self) -> _T:
+        if self._cancelled:
+            raise StopAsyncIteration
+        try:
+            return await self._iterator.__anext__()
+        except StopAsyncIteration:
+            raise
+        except Exception:
+            if self._cancelled:
+                raise StopAsyncIteration from None
+            raise
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
+
+    def cancel(self) -> None:
+        """Stops receiving the response."""
+        if not self._cancelled:
+            self._cancelled = True
+            if self._on_cancel is not None:
+                self._on_cancel()
+
+    async def aclose(self) -> None:
+        """Cancels the stream and releases its resources."""
+        self.cancel()
+        aclose = getattr(self._iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    def map(self, func: Callable[[_T], _U]) -> "AsyncResponseStream[_U]":
+        """Returns a stream that applies `func` to each item of this stream.
+
+        Cancelling or closing the returned stream also cancels or closes this
+        stream.
+        """
+
+        async def _map() -> AsyncIterator[_U]:
+            try:
+                async for item in self:
+                    yield func(item)
+            finally:
+                await self.aclose()
+
+        return AsyncResponseStream(_map(), on_cancel=self.cancel)
@@ -15,7 +15,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, AsyncIterator, Dict, Iterator, Optional, TypeVar
+from typing import Any, AsyncIterator, Dict, Iterator, Literal, Optional, TypeVar, Union
 
 from typing_extensions import TypeAlias
 
@@ -28,6 +28,7 @@ __all__ = [
     "Request",
     "RequestWithStream",
     "ResponseT",
+    "StreamMode",
 ]
 
 ConfigDictType: TypeAlias = Dict[str, Optional[Any]]
@@ -35,6 +36,11 @@ ConfigDictType: TypeAlias = Dict[str, Optional[Any]]
 HeadersType: TypeAlias = Dict[str, str]
 ParamsType: TypeAlias = Dict[str, Any]
 
+# `True` and `False` enable and disable response streaming respectively.
+# `"raw"` enables streaming and yields the undecoded payloads of server-sent
+# events.
+StreamMode: TypeAlias = Union[bool, Literal["raw"]]
+
 ResponseT = TypeVar("ResponseT", EBResponse, Iterator[EBResponse], AsyncIterator[EBResponse])
 
 
@@ -49,4 +55,4 @@ class Request(object):
 
 @dataclass
 class RequestWithStream(Request):
-    stream: bool = False
+    stream: StreamMode = False
@@ -34,7 +34,7 @@ def upload_file_to_bos(
         credentials=BceCredentials(access_key_id, secret_access_key), endpoint=bos_host
     )
     bos_client = BosClient(b_config)
-    with open(origin_file, "rb") as f:
-        bos_client.put_object_from_string(bos_bucket, f"{category_dir}/{upload_file_name}", f.read())
+    # The file is streamed rather than read into memory, as it may be large.
+    bos_client.put_object_from_file(bos_bucket, f"{category_dir}/{upload_file_name}", origin_file)
     url = f"https://bj.bcebos.com/{bos_bucket}/{category_dir}/{upload_file_name}"
     return url
@@ -0,0 +1,275 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Deque, Iterator, List, Optional, Tuple
+
+from . import logging
+from .token_helper import approx_num_tokens_batch
+
+__all__ = ["DatasetStats", "validate_sample", "prepare_fine_tuning_dataset"]
+
+# Only the first errors are kept in the stats.
+_MAX_RECORDED_ERRORS = 100
+
+
+@dataclass
+class DatasetStats(object):
+    """Statistics collected while preparing a dataset."""
+
+    num_samples: int = 0
+    num_invalid_samples: int = 0
+    num_tokens: int = 0
+    max_sample_tokens: int = 0
+    shard_paths: List[str] = field(default_factory=list)
+    uploaded_urls: List[str] = field(default_factory=list)
+    # Pairs of the line number (1-based) and the error message.
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def num_valid_samples(self) -> int:
+        return self.num_samples - self.num_invalid_samples
+
+
+def validate_sample(sample: Any) -> Optional[str]:
+    """Checks the structure of a fine-tuning sample.
+
+    A sample is a dict that contains `messages`, a list of chat messages
+    in which user and assistant messages alternate, starting with a user
+    message and ending with an assistant message. An optional `system` is
+    a string.
+
+    Returns:
+        The error message, or None if the sample is valid.
+    """
+    if not isinstance(sample, dict):
+        return "A sample should be a JSON object."
+    messages = sample.get("messages", None)
+    if not isinstance(messages, list) or not messages:
+        return "`messages` should be a non-empty list."
+    if len(messages) % 2 != 0:
+        return "The number of messages should be even."
+    for i, message in enumerate(messages):
+        if not isinstance(message, dict):
+            return f"Message {i} should be a JSON object."
+        expected_role = "user" if i % 2 == 0 else "assistant"
+        if message.get("role", None) != expected_role:
+            return f"The role of message {i} should be {repr(expected_role)}."
+        content = message.get("content", None)
+        if not isinstance(content, str) or not content:
+            return f"The content of message {i} should be a non-empty string."
+    system = sample.get("system", None)
+    if system is not None and not isinstance(system, str):
+        return "`system` should be a string."
+    return None
+
+
+def prepare_fine_tuning_dataset(
+    input_path: str,
+    output_dir: str,
+    *,
+    shard_size: int = 256 * 1024 * 1024,
+    max_sample_tokens: Optional[int] = None,
+    batch_size: int = 1000,
+    num_workers: Optional[int] = None,
+    upload_func: Optional[Callable[[str], str]] = None,
+) -> DatasetStats:
+    """Validates a JSONL dataset and splits it into shards for fine-tuning.
+
+    The dataset is read line by line and samples are validated and counted
+    in a process pool, so memory usage does not grow with the size of the
+    dataset. Valid samples are written unchanged to shards under
+    `output_dir`, and invalid ones are skipped and reported in the stats.
+    If `upload_func` is given, each shard is uploaded as soon as it is
+    complete, in parallel with the processing of the rest of the dataset.
+
+    Tokens are counted with `token_helper.approx_num_tokens_batch`. A
+    tokenizer set with `token_helper.set_tokenizer` is only used in the
+    worker processes if they are forked; set `num_workers` to 0 to process
+    in the current process.
+
+    Args:
+        input_path: Path to the JSONL dataset. Each line is a sample as
+            described in `validate_sample`.
+        output_dir: Directory to write the shards to.
+        shard_size: Approximate maximum size of a shard in bytes.
+        max_sample_tokens: If given, samples with more tokens are invalid.
+        batch_size: Number of lines sent to a worker at a time.
+        num_workers: Number of worker processes. Defaults to the number of
+            CPUs.
+        upload_func: Function that uploads a shard and returns its URL,
+            e.g., one that calls `bos.upload_file_to_bos`.
+
+    Returns:
+        The stats of the dataset.
+    """
+    if shard_size <= 0:
+        raise ValueError(f"Invalid shard size ({shard_size}), which should be positive.")
+    if batch_size <= 0:
+        raise ValueError(f"Invalid batch size ({batch_size}), which should be positive.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    stats = DatasetStats()
+    writer = _ShardWriter(output_dir, os.path.splitext(os.path.basename(input_path))[0], shard_size)
+    upload_executor = (
+        concurrent.futures.ThreadPoolExecutor(max_workers=1) if upload_func is not None else None
+    )
+    upload_futures: List[concurrent.futures.Future] = []
+
+    def _on_shard_closed(path: str) -> None:
+        stats.shard_paths.append(path)
+        logging.debug("Shard written: %s", path)
+        if upload_executor is not None:
+            assert upload_func is not None
+            upload_futures.append(upload_executor.submit(upload_func, path))
+
+    writer.on_shard_closed = _on_shard_closed
+
+    try:
+        with open(input_path, "r", encoding="utf-8") as f:
+            batches = _iter_batches(f, batch_size)
+            for start_line, lines, results in _map_batches(batches, max_sample_tokens, num_workers):
+                for offset, (line, (error, num_tokens)) in enumerate(zip(lines, results)):
+                    if error is None and not line.strip():
+                        # Blank lines are ignored.
+                        continue
+                    stats.num_samples += 1
+                    if error is not None:
+                        stats.num_invalid_samples += 1
+                        if len(stats.errors) < _MAX_RECORDED_ERRORS:
+                            stats.errors.append((start_line + offset, error))
+                        continue
+                    stats.num_tokens += num_tokens
+                    stats.max_sample_tokens = max(stats.max_sample_tokens, num_tokens)
+                    writer.write(line if line.endswith("\n") else line + "\n")
+        writer.close()
+        stats.uploaded_urls.extend(future.result() for future in upload_futures)
+    finally:
+        writer.on_shard_closed = None
+        writer.close()
+        if upload_executor is not None:
+            upload_executor.shutdown(wait=True)
+
+    logging.info(
+        "%d samples processed (%d invalid, %d tokens), %d shards written.",
+        stats.num_samples,
+        stats.num_invalid_samples,
+        stats.num_tokens,
+        len(stats.shard_paths),
+    )
+    return stats
+
+
+class _ShardWriter(object):
+    def __init__(self, output_dir: str, prefix: str, shard_size: int) -> None:
+        super().__init__()
+        self.on_shard_closed: Optional[Callable[[str], None]] = None
+        self._output_dir = output_dir
+        self._prefix = prefix
+        self._shard_size = shard_size
+        self._file: Optional[IO[bytes]] = None
+        self._path = ""
+        self._size = 0
+        self._index = 0
+
+    def write(self, line: str) -> None:
+        data = line.encode("utf-8")
+        if self._file is not None and self._size + len(data) > self._shard_size:
+            self.close()
+        if self._file is None:
+            self._path = os.path.join(self._output_dir, f"{self._prefix}-{self._index:05d}.jsonl")
+            self._file = open(self._path, "wb")
+            self._size = 0
+            self._index += 1
+        self._file.write(data)
+        self._size += len(data)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if self.on_shard_closed is not None:
+                self.on_shard_closed(self._path)
+
+
+def _iter_batches(f: IO[str], batch_size: int) -> Iterator[Tuple[int, List[str]]]:
+    start_line = 1
+    while True:
+        lines = list(itertools.islice(f, batch_size))
+        if not lines:
+            break
+        yield start_line, lines
+        start_line += len(lines)
+
+
+def _map_batches(
+    batches: Iterator[Tuple[int, List[str]]], max_sample_tokens: Optional[int], num_workers: Optional[int]
+) -> Iterator[Tuple[int, List[str], List[Tuple[Optional[str], int]]]]:
+    if num_workers == 0:
+        for start_line, lines in batches:
+            yield start_line, lines, _process_batch(lines, max_sample_tokens)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+        # Bound the number of pending batches so that reading does not get
+        # ahead of processing.
+        max_pending = 2 * getattr(executor, "_max_workers", os.cpu_count() or 1)
+        pending: Deque[Tuple[int, List[str], concurrent.futures.Future]] = collections.deque()
+        for start_line, lines in batches:
+            pending.append((start_line, lines, executor.submit(_process_batch, lines, max_sample_tokens)))
+            if len(pending) >= max_pending:
+                start_line, lines, future = pending.popleft()
+                yield start_line, lines, future.result()
+        while pending:
+            start_line, lines, future = pending.popleft()
+            yield start_line, lines, future.result()
+
+
+def _process_batch(lines: List[str], max_sample_tokens: Optional[int]) -> List[Tuple[Optional[str], int]]:
+    results: List[Tuple[Optional[str], int]] = []
+    texts: List[str] = []
+    valid_indices: List[int] = []
+    for line in lines:
+        if not line.strip():
+            results.append((None, 0))
+            continue
+        try:
+            sample = json.loads(line)
+        except ValueError as e:
+            results.append((f"Invalid JSON: {e}", 0))
+            continue
+        error = validate_sample(sample)
+        if error is not None:
+            results.append((error, 0))
+            continue
+        valid_indices.append(len(results))
+        results.append((None, 0))
+        parts = [message["content"] for message in sample["messages"]]
+        if sample.get("system", None):
+            parts.insert(0, sample["system"])
+        texts.append("\n".join(parts))
+    for idx, num_tokens in zip(valid_indices, approx_num_tokens_batch(texts)):
+        if max_sample_tokens is not None and num_tokens > max_sample_tokens:
+            results[idx] = (
+                f"The sample has {num_tokens} tokens, more than {max_sample_tokens}.",
+                num_tokens,
+            )
+        else:
+            results[idx] = (None, num_tokens)
+    return results
@@ -16,6 +16,8 @@ import threading
 from collections.abc import AsyncIterator, Iterator
 from typing import ClassVar
 
+from erniebot.streaming import AsyncResponseStream, ResponseStream
+
 __all__ = ["Constant", "SingletonMeta", "NOT_GIVEN", "NotGiven", "filter_args", "transform"]
 
 
@@ -60,7 +62,10 @@ def filter_args(**kwargs):
 
 
 def transform(func, data):
-    if isinstance(data, Iterator):
+    if isinstance(data, (ResponseStream, AsyncResponseStream)):
+        # Keep the stream cancellable.
+        return data.map(func)
+    elif isinstance(data, Iterator):
         return (func(d) for d in data)
     elif isinstance(data, AsyncIterator):
         return (func(d) async for d in data)
@@ -0,0 +1,132 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import requests
+import requests.adapters
+
+from . import errors
+from .api_types import APIType, convert_str_to_api_type
+from .backends import build_backend
+from .config import GlobalConfig
+from .http_client import get_loop_aiohttp_session
+from .intro import Model
+from .types import ConfigDictType
+from .utils import logging
+
+__all__ = ["warmup", "awarmup"]
+
+
+def warmup(
+    api_types: Optional[Sequence[str]] = None,
+    models: Optional[Sequence[str]] = None,
+    *,
+    num_connections: int = 1,
+    _config_: Optional[ConfigDictType] = None,
+) -> None:
+    """Warms up the SDK to reduce the latency of the first requests.
+
+    For each API type, the access token is fetched and cached if needed, and
+    keep-alive connections to the backend are opened. If `requests_session`
+    is not configured, a shared session is created and set as the global
+    `requests_session`, so that later requests reuse the connections.
+
+    Args:
+        api_types: API types to warm up. Defaults to the configured one.
+        models: Models that will be used. An error is raised if any of them
+            is not served by the API types.
+        num_connections: Number of connections to open for each API type.
+        _config_: Overrides the global settings.
+    """
+    config = dict(_config_ or {})
+    if config.get("requests_session", None) is None:
+        config["requests_session"] = _get_or_create_global_requests_session(num_connections)
+    for api_type, cfg_dict in _resolve_config_dicts(api_types, models, config):
+        start = time.monotonic()
+        backend = build_backend(api_type, cfg_dict)
+        backend.warm_up(num_connections)
+        logging.debug("%s backend warmed up in %.3f seconds.", api_type.name, time.monotonic() - start)
+
+
+async def awarmup(
+    api_types: Optional[Sequence[str]] = None,
+    models: Optional[Sequence[str]] = None,
+    *,
+    num_connections: int = 1,
+    _config_: Optional[ConfigDictType] = None,
+) -> None:
+    """Asynchronous version of `warmup`.
+
+    If `aiohttp_session` is not configured, the connections are opened in a
+    session shared by the requests sent in the running event loop. The
+    session is closed when the event loop is closed, so requests sent in
+    other event loops are not affected.
+    """
+    config = dict(_config_ or {})
+    if config.get("aiohttp_session", None) is None and GlobalConfig().get_value("aiohttp_session") is None:
+        config["aiohttp_session"] = get_loop_aiohttp_session(create=True)
+
+    async def _warm_up_backend(api_type: APIType, cfg_dict: ConfigDictType) -> None:
+        start = time.monotonic()
+        backend = build_backend(api_type, cfg_dict)
+        await backend.awarm_up(num_connections)
+        logging.debug("%s backend warmed up in %.3f seconds.", api_type.name, time.monotonic() - start)
+
+    await asyncio.gather(
+        *(
+            _warm_up_backend(api_type, cfg_dict)
+            for api_type, cfg_dict in _resolve_config_dicts(api_types, models, config)
+        )
+    )
+
+
+def _resolve_config_dicts(
+    api_types: Optional[Sequence[str]], models: Optional[Sequence[str]], config: ConfigDictType
+) -> List[Tuple[APIType, ConfigDictType]]:
+    cfg = GlobalConfig()
+    if api_types is None:
+        api_type_str = config.get("api_type", None) or cfg.get_value("api_type")
+        api_types = [api_type_str]
+    resolved = []
+    for api_type_str in api_types:
+        api_type = convert_str_to_api_type(api_type_str)
+        for model in models or []:
+            info = Model.get(model)
+            if info is None:
+                logging.warning("Capabilities of %s are unknown.", repr(model))
+            elif all(convert_str_to_api_type(s) is not api_type for s in info.api_types):
+                raise errors.InvalidArgumentError(
+                    f"{repr(model)} is not served by the {repr(api_type_str)} API type."
+                )
+        # Invalid settings are reported here rather than in the first request.
+        cfg_dict = cfg.create_dict(**{**config, "api_type": api_type_str})
+        resolved.append((api_type, cfg_dict))
+    return resolved
+
+
+def _get_or_create_global_requests_session(num_connections: int) -> requests.Session:
+    cfg = GlobalConfig()
+    session = cfg.get_value("requests_session")
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=max(num_connections, requests.adapters.DEFAULT_POOLSIZE)
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        cfg.set_value("requests_session", session)
+    return session
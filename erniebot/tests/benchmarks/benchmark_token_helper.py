@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks `erniebot.utils.token_helper` against the per-character
+implementation it replaced.
+
+Example:
+    python tests/benchmarks/benchmark_token_helper.py --sizes 100000 1000000
+"""
+
+import argparse
+import math
+import random
+import re
+import time
+from typing import Callable, List
+
+from erniebot.utils.token_helper import approx_num_tokens, approx_num_tokens_batch
+
+_SENTENCES = [
+    "深圳是中国南部的一座现代化城市，以科技创新闻名。",
+    "The quick brown fox jumps over the lazy dog.",
+    "请问明天北京的天气怎么样？",
+    "ERNIE Bot supports function calling, streaming, and embeddings!",
+    "数据集包含 12,345 条样本（train/dev/test）。",
+]
+
+
+def _reference_approx_num_tokens(text: str) -> int:
+    cnt_han = 0
+    cnt_word = 0
+
+    res = []
+    for char in text:
+        if re.match(r"[\u4e00-\u9fff]", char):
+            cnt_han += 1
+            res.append(" ")
+        elif re.match(r"[^\w\s]", char):
+            res.append(" ")
+        else:
+            res.append(char)
+
+    res_text = "".join(res)
+    cnt_word = len(res_text.split())
+
+    return cnt_han + int(math.floor(cnt_word * 1.3))
+
+
+def _make_text(size: int, rng: random.Random) -> str:
+    parts: List[str] = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(_SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:size]
+
+
+def _time(func: Callable[[], object], repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="Text sizes in chars."
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Number of short texts in a batch.")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs is reported.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print(f"{'workload':<24}{'reference (s)':>16}{'current (s)':>16}{'speedup':>10}")
+    for size in args.sizes:
+        text = _make_text(size, rng)
+        assert _reference_approx_num_tokens(text) == approx_num_tokens(text)
+        ref = _time(lambda: _reference_approx_num_tokens(text), args.repeat)
+        cur = _time(lambda: approx_num_tokens(text), args.repeat)
+        print(f"{f'single, {size} chars':<24}{ref:>16.4f}{cur:>16.4f}{ref / cur:>9.1f}x")
+
+    texts = [_make_text(rng.randint(10, 200), rng) for _ in range(args.batch_size)]
+    assert [_reference_approx_num_tokens(t) for t in texts] == approx_num_tokens_batch(texts)
+    ref = _time(lambda: [_reference_approx_num_tokens(t) for t in texts], args.repeat)
+    cur = _time(lambda: approx_num_tokens_batch(texts), args.repeat)
+    print(f"{f'batch, {args.batch_size} texts':<24}{ref:>16.4f}{cur:>16.4f}{ref / cur:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the SDK transport against a local mock server.
+
+Example:
+    python tests/benchmarks/benchmark_transport.py --requests 500 --concurrency 16 \
+        --output benchmark_results.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+import requests
+from mock_server import add_server_arguments, config_from_args, start_server_process
+
+import erniebot
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore
+
+_MODES = ("sync", "mt", "async")
+_WORKLOADS = ("chat", "chat_stream", "embedding")
+
+_MESSAGES = [{"role": "user", "content": "请问你是谁？"}]
+_EMBEDDING_INPUT = ["我是百度公司开发的人工智能语言模型。", "2018年深圳市各区GDP"]
+
+
+@dataclass
+class _Sample(object):
+    latency: float
+    first_chunk_latency: Optional[float] = None
+    error: bool = False
+
+
+@dataclass
+class BenchmarkResult(object):
+    mode: str
+    workload: str
+    num_requests: int
+    concurrency: int
+    num_errors: int
+    wall_time: float
+    throughput: float
+    latency_p50: float
+    latency_p90: float
+    latency_p99: float
+    first_chunk_latency_p50: Optional[float]
+    cpu_time_per_request: float
+    peak_rss_mb: Optional[float]
+    traced_peak_mb: Optional[float]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(q / 100 * (len(values) - 1)))))
+    return values[idx]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # `ru_maxrss` is in bytes on macOS and in kilobytes elsewhere.
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def _make_config(args: argparse.Namespace, base_url: str, **extra: Any) -> Dict[str, Any]:
+    config = dict(
+        api_type="qianfan",
+        api_base_url=base_url,
+        # The mock server does not check tokens, and providing one avoids the
+        # OAuth round trip.
+        access_token="benchmark",
+        max_retries=args.max_retries,
+        min_retry_delay=0,
+        max_retry_delay=0,
+    )
+    config.update(extra)
+    return config
+
+
+def _sync_call(workload: str, config: Dict[str, Any]) -> _Sample:
+    st = time.perf_counter()
+    first_chunk_latency = None
+    try:
+        if workload == "chat":
+            erniebot.ChatCompletion.create(model="ernie-3.5", messages=_MESSAGES, _config_=config)
+        elif workload == "chat_stream":
+            for _ in erniebot.ChatCompletion.create(
+                model="ernie-3.5", messages=_MESSAGES, stream=True, _config_=config
+            ):
+                if first_chunk_latency is None:
+                    first_chunk_latency = time.perf_counter() - st
+        elif workload == "embedding":
+            erniebot.Embedding.create(model="ernie-text-embedding", input=_EMBEDDING_INPUT, _config_=config)
+        else:
+            raise ValueError(f"Unknown workload: {workload}")
+    except erniebot.errors.EBError:
+        return _Sample(latency=time.perf_counter() - st, error=True)
+    return _Sample(latency=time.perf_counter() - st, first_chunk_latency=first_chunk_latency)
+
+
+async def _async_call(workload: str, config: Dict[str, Any]) -> _Sample:
+    st = time.perf_counter()
+    first_chunk_latency = None
+    try:
+        if workload == "chat":
+            await erniebot.ChatCompletion.acreate(model="ernie-3.5", messages=_MESSAGES, _config_=config)
+        elif workload == "chat_stream":
+            resp = await erniebot.ChatCompletion.acreate(
+                model="ernie-3.5", messages=_MESSAGES, stream=True, _config_=config
+            )
+            async for _ in resp:
+                if first_chunk_latency is None:
+                    first_chunk_latency = time.perf_counter() - st
+        elif workload == "embedding":
+            await erniebot.Embedding.acreate(
+                model="ernie-text-embedding", input=_EMBEDDING_INPUT, _config_=config
+            )
+        else:
+            raise ValueError(f"Unknown workload: {workload}")
+    except erniebot.errors.EBError:
+        return _Sample(latency=time.perf_counter() - st, error=True)
+    return _Sample(latency=time.perf_counter() - st, first_chunk_latency=first_chunk_latency)
+
+
+def _run_sync(args: argparse.Namespace, workload: str, base_url: str) -> List[_Sample]:
+    extra = {}
+    session = None
+    if args.reuse_session:
+        session = requests.Session()
+        extra["requests_session"] = session
+    config = _make_config(args, base_url, **extra)
+    try:
+        return [_sync_call(workload, config) for _ in range(args.requests)]
+    finally:
+        if session is not None:
+            session.close()
+
+
+def _run_mt(args: argparse.Namespace, workload: str, base_url: str) -> List[_Sample]:
+    local = threading.local()
+    sessions: List[requests.Session] = []
+    lock = threading.Lock()
+
+    def _get_config() -> Dict[str, Any]:
+        if not args.reuse_session:
+            return _make_config(args, base_url)
+        if not hasattr(local, "config"):
+            session = requests.Session()
+            with lock:
+                sessions.append(session)
+            local.config = _make_config(args, base_url, requests_session=session)
+        return local.config
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            return list(executor.map(lambda _: _sync_call(workload, _get_config()), range(args.requests)))
+    finally:
+        for session in sessions:
+            session.close()
+
+
+def _run_async(args: argparse.Namespace, workload: str, base_url: str) -> List[_Sample]:
+    async def _main() -> List[_Sample]:
+        extra = {}
+        session = None
+        if args.reuse_session:
+            session = aiohttp.ClientSession()
+            extra["aiohttp_session"] = session
+        config = _make_config(args, base_url, **extra)
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def _bounded_call() -> _Sample:
+            async with sem:
+                return await _async_call(workload, config)
+
+        try:
+            return await asyncio.gather(*(_bounded_call() for _ in range(args.requests)))
+        finally:
+            if session is not None:
+                await session.close()
+
+    return asyncio.run(_main())
+
+
+def run_benchmark(args: argparse.Namespace, mode: str, workload: str, base_url: str) -> BenchmarkResult:
+    runners: Dict[str, Callable[[argparse.Namespace, str, str], List[_Sample]]] = {
+        "sync": _run_sync,
+        "mt": _run_mt,
+        "async": _run_async,
+    }
+    runner = runners[mode]
+
+    # Warm up the code paths (imports, connection setup, etc.).
+    warmup_args = argparse.Namespace(**{**vars(args), "requests": min(args.warmup, args.requests)})
+    if warmup_args.requests > 0:
+        runner(warmup_args, workload, base_url)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    cpu_st = time.process_time()
+    wall_st = time.perf_counter()
+    samples = runner(args, workload, base_url)
+    wall_time = time.perf_counter() - wall_st
+    cpu_time = time.process_time() - cpu_st
+    traced_peak_mb = None
+    if args.trace_memory:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        traced_peak_mb = traced_peak / (1024 * 1024)
+
+    latencies = [s.latency for s in samples if not s.error]
+    first_chunk_latencies = [s.first_chunk_latency for s in samples if s.first_chunk_latency is not None]
+    return BenchmarkResult(
+        mode=mode,
+        workload=workload,
+        num_requests=len(samples),
+        concurrency=1 if mode == "sync" else args.concurrency,
+        num_errors=sum(s.error for s in samples),
+        wall_time=wall_time,
+        throughput=len(samples) / wall_time,
+        latency_p50=_percentile(latencies, 50),
+        latency_p90=_percentile(latencies, 90),
+        latency_p99=_percentile(latencies, 99),
+        first_chunk_latency_p50=(
+            statistics.median(first_chunk_latencies) if first_chunk_latencies else None
+        ),
+        cpu_time_per_request=cpu_time / len(samples),
+        peak_rss_mb=_peak_rss_mb(),
+        traced_peak_mb=traced_peak_mb,
+    )
+
+
+def _format_ms(val: Optional[float]) -> str:
+    return "-" if val is None else f"{val * 1000:.2f}"
+
+
+def print_results(results: List[BenchmarkResult]) -> None:
+    header = (
+        f"{'mode':<6} {'workload':<12} {'reqs':>6} {'errs':>5} {'req/s':>9} {'p50 ms':>9} "
+        f"{'p90 ms':>9} {'p99 ms':>9} {'ttfc ms':>9} {'cpu ms/req':>11} {'rss MB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rss = "-" if r.peak_rss_mb is None else f"{r.peak_rss_mb:.1f}"
+        print(
+            f"{r.mode:<6} {r.workload:<12} {r.num_requests:>6} {r.num_errors:>5} {r.throughput:>9.1f} "
+            f"{_format_ms(r.latency_p50):>9} {_format_ms(r.latency_p90):>9} {_format_ms(r.latency_p99):>9} "
+            f"{_format_ms(r.first_chunk_latency_p50):>9} {_format_ms(r.cpu_time_per_request):>11} {rss:>8}"
+        )
+
+
+def save_results(results: List[BenchmarkResult], path: str, args: argparse.Namespace) -> None:
+    meta = {
+        "timestamp": time.time(),
+        "erniebot_version": erniebot.__version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "args": vars(args),
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        for r in results:
+            f.write(json.dumps({**meta, **asdict(r)}, ensure_ascii=False) + "\n")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the SDK transport against a mock server.")
+    parser.add_argument("--modes", type=str, nargs="+", choices=_MODES, default=list(_MODES))
+    parser.add_argument("--workloads", type=str, nargs="+", choices=_WORKLOADS, default=list(_WORKLOADS))
+    parser.add_argument("--requests", type=int, default=200, help="Number of requests per benchmark.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrency of the mt and async modes.")
+    parser.add_argument("--warmup", type=int, default=10, help="Number of warm-up requests.")
+    parser.add_argument("--max-retries", type=int, default=0, help="Maximum number of retries.")
+    parser.add_argument(
+        "--reuse-session",
+        action="store_true",
+        help="Share a `requests`/`aiohttp` session between requests instead of creating one per request.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Report the peak of traced Python allocations. Note that this inflates the CPU time.",
+    )
+    parser.add_argument(
+        "--server-url",
+        type=str,
+        help="Use an already running mock server instead of starting one.",
+    )
+    parser.add_argument("--output", type=str, help="Append results as JSON lines to this file.")
+    add_server_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    server_proc = None
+    if args.server_url:
+        base_url = args.server_url
+    else:
+        server_config = config_from_args(args)
+        server_proc = start_server_process(server_config)
+        base_url = server_config.base_url
+
+    try:
+        results = [
+            run_benchmark(args, mode, workload, base_url)
+            for mode in args.modes
+            for workload in args.workloads
+        ]
+    finally:
+        if server_proc is not None:
+            server_proc.terminate()
+            server_proc.join()
+
+    print_results(results)
+    if args.output:
+        save_results(results, args.output, args)
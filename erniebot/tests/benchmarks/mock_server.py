@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A local mock of the ERNIE Bot service for benchmarking.
+
+The server mimics the Qianfan API: `POST /chat/{model_id}` returns either a JSON
+response or a `text/event-stream` response (when the request body contains
+`"stream": true`), and `POST /embeddings/{model_id}` returns embeddings. Latency,
+the number of stream chunks, and error injection are configurable.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+# An error code that the Qianfan backend interprets as `TryAgain`.
+_INJECTED_ERROR_CODE = 336100
+
+
+@dataclass
+class MockServerConfig(object):
+    host: str = "127.0.0.1"
+    port: int = 8765
+    # Seconds to wait before sending response headers.
+    latency: float = 0.0
+    # Number of chunks in a streamed response.
+    num_chunks: int = 16
+    # Seconds to wait between two chunks.
+    chunk_interval: float = 0.0
+    # Number of characters in each chunk (or in the whole non-streamed result).
+    chunk_size: int = 32
+    # Dimension of each embedding vector.
+    embedding_dim: int = 384
+    # Probability that a request fails with an API error.
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+
+def create_app(config: MockServerConfig) -> web.Application:
+    rng = random.Random(config.seed)
+    chunk_text = ("文" * (config.chunk_size // 2)) + ("x" * (config.chunk_size - config.chunk_size // 2))
+
+    def _make_body(
+        result: str, *, sentence_id: Optional[int] = None, is_end: bool = False
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "id": "as-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "result": result,
+            "is_truncated": False,
+            "need_clear_history": False,
+            "usage": {"prompt_tokens": 16, "completion_tokens": 16, "total_tokens": 32},
+        }
+        if sentence_id is not None:
+            body["sentence_id"] = sentence_id
+            body["is_end"] = is_end
+        return body
+
+    def _should_fail() -> bool:
+        return config.error_rate > 0 and rng.random() < config.error_rate
+
+    def _error_response() -> web.Response:
+        return web.json_response({"error_code": _INJECTED_ERROR_CODE, "error_msg": "Injected error"})
+
+    async def chat(request: web.Request) -> web.StreamResponse:
+        params = await request.json()
+        if config.latency > 0:
+            await asyncio.sleep(config.latency)
+        if _should_fail():
+            return _error_response()
+        if not params.get("stream", False):
+            return web.json_response(_make_body(chunk_text * config.num_chunks))
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for idx in range(config.num_chunks):
+            if idx > 0 and config.chunk_interval > 0:
+                await asyncio.sleep(config.chunk_interval)
+            body = _make_body(chunk_text, sentence_id=idx, is_end=idx == config.num_chunks - 1)
+            await resp.write(b"data: " + json.dumps(body).encode() + b"\n\n")
+        await resp.write_eof()
+        return resp
+
+    async def embeddings(request: web.Request) -> web.Response:
+        params = await request.json()
+        if config.latency > 0:
+            await asyncio.sleep(config.latency)
+        if _should_fail():
+            return _error_response()
+        data = [
+            {"object": "embedding", "embedding": [0.1] * config.embedding_dim, "index": idx}
+            for idx in range(len(params["input"]))
+        ]
+        return web.json_response(
+            {
+                "id": "as-mock",
+                "object": "embedding_list",
+                "created": int(time.time()),
+                "data": data,
+                "usage": {"prompt_tokens": 16, "total_tokens": 16},
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/chat/{model_id}", chat)
+    app.router.add_post("/embeddings/{model_id}", embeddings)
+    return app
+
+
+def run_server(config: MockServerConfig) -> None:
+    web.run_app(create_app(config), host=config.host, port=config.port, print=None)
+
+
+def start_server_process(config: MockServerConfig, timeout: float = 10) -> multiprocessing.Process:
+    """Starts the mock server in a child process and waits until it accepts
+    connections.
+
+    Running the server in a separate process keeps its CPU time out of the
+    measurements taken in the benchmarking process.
+    """
+    proc = multiprocessing.Process(target=run_server, args=(config,), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((config.host, config.port), timeout=0.1):
+                break
+        except OSError:
+            if time.monotonic() > deadline or not proc.is_alive():
+                proc.terminate()
+                raise RuntimeError("The mock server failed to start.") from None
+            time.sleep(0.05)
+    return proc
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    defaults = MockServerConfig()
+    parser.add_argument("--host", type=str, default=defaults.host, help="Host to bind.")
+    parser.add_argument("--port", type=int, default=defaults.port, help="Port to bind.")
+    parser.add_argument(
+        "--latency", type=float, default=defaults.latency, help="Seconds to wait before responding."
+    )
+    parser.add_argument(
+        "--num-chunks", type=int, default=defaults.num_chunks, help="Number of chunks in a stream."
+    )
+    parser.add_argument(
+        "--chunk-interval", type=float, default=defaults.chunk_interval, help="Seconds between chunks."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=defaults.chunk_size, help="Number of characters in a chunk."
+    )
+    parser.add_argument(
+        "--embedding-dim", type=int, default=defaults.embedding_dim, help="Dimension of embeddings."
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=defaults.error_rate, help="Probability of injected errors."
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed.")
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> MockServerConfig:
+    return MockServerConfig(
+        **{k: getattr(args, k) for k in asdict(MockServerConfig()).keys() if hasattr(args, k)}
+    )
+
+
+if __name__ == "__main__":
+    parser = add_server_arguments(argparse.ArgumentParser(description="Mock ERNIE Bot server."))
+    config = config_from_args(parser.parse_args())
+    print(f"Serving on {config.base_url}")
+    run_server(config)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+from unittest import mock
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+import erniebot
+from erniebot.gateway import GatewayConfig, create_app
+from erniebot.resources.chat_completion import ChatCompletionResponse
+
+
+def test_client_disconnect_closes_upstream_stream():
+    upstream_closed = asyncio.Event()
+
+    async def _upstream_stream():
+        # Produce chunks faster than the client reads them, so that the
+        # disconnection is noticed by the gateway while writing.
+        try:
+            for _ in range(100000):
+                yield ChatCompletionResponse(200, {"result": "x" * 1024, "is_end": False}, {})
+        finally:
+            upstream_closed.set()
+
+    # Keep the upstream streams alive so that they are not closed when
+    # garbage collected.
+    upstream_streams = []
+
+    async def _acreate(**kwargs):
+        upstream_streams.append(_upstream_stream())
+        return upstream_streams[-1]
+
+    async def _main():
+        server = TestServer(create_app(GatewayConfig()))
+        await server.start_server()
+        try:
+            async with aiohttp.ClientSession() as session:
+                resp = await session.post(
+                    server.make_url("/v1/chat/completions"),
+                    json={
+                        "model": "ernie-turbo",
+                        "messages": [{"role": "user", "content": "你好"}],
+                        "stream": True,
+                    },
+                )
+                assert resp.headers["Content-Type"] == "text/event-stream; charset=utf-8"
+                assert (await resp.content.readline()).startswith(b"data: ")
+                # Disconnect in the middle of the stream.
+                resp.close()
+            await asyncio.wait_for(upstream_closed.wait(), timeout=5)
+        finally:
+            await server.close()
+
+    with mock.patch.object(erniebot.ChatCompletion, "acreate", _acreate):
+        asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    test_client_disconnect_closes_upstream_stream()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import json
+import logging
+
+from erniebot.api_types import convert_str_to_api_type
+from erniebot.backends import build_backend
+from erniebot.config import GlobalConfig
+
+
+def prepare_chat_request(api_type, content="你好", **config):
+    cfg_dict = GlobalConfig().create_dict(
+        api_type=api_type,
+        api_base_url="http://127.0.0.1:8766",
+        access_token="test",
+        **config,
+    )
+    backend = build_backend(convert_str_to_api_type(api_type), cfg_dict)
+    params = {"messages": [{"role": "user", "content": content}]}
+    _, headers, data = backend._client.prepare_request("POST", "/chat/completions", None, params)
+    return params, headers, data
+
+
+def test_request_compression():
+    # Compression is off by default for backends that are not known to
+    # support it, and can be turned on per backend.
+    _, headers, _ = prepare_chat_request("qianfan", request_compression_threshold=1)
+    assert "Content-Encoding" not in headers
+    params, headers, data = prepare_chat_request(
+        "qianfan", request_compression=True, request_compression_threshold=1
+    )
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(data)) == params
+
+    _, headers, _ = prepare_chat_request("custom", request_compression_threshold=1)
+    assert headers["Content-Encoding"] == "gzip"
+    _, headers, _ = prepare_chat_request(
+        "custom", request_compression=False, request_compression_threshold=1
+    )
+    assert "Content-Encoding" not in headers
+
+
+def test_default_compression_threshold():
+    # Compression is turned on, but the threshold is not set. Only request
+    # bodies that are large enough are compressed.
+    _, headers, _ = prepare_chat_request("qianfan", request_compression=True)
+    assert "Content-Encoding" not in headers
+    params, headers, data = prepare_chat_request("qianfan", content="你好" * 1024, request_compression=True)
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(data)) == params
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    test_request_compression()
+    test_default_compression_threshold()
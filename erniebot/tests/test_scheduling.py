@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import gc
+import logging
+
+from erniebot.scheduling import RequestScheduler
+from erniebot.streaming import AsyncResponseStream, ResponseStream
+
+
+async def _run_in_order(scheduler, requests):
+    # Queues `requests` (pairs of priority and tenant) behind a request that
+    # holds the only slot, and returns the order in which they are served.
+    order = []
+
+    async def _request(idx, priority, tenant):
+        await scheduler.aacquire(priority, tenant)
+        order.append(idx)
+        scheduler.release()
+
+    await scheduler.aacquire()
+    tasks = []
+    for idx, (priority, tenant) in enumerate(requests):
+        tasks.append(asyncio.create_task(_request(idx, priority, tenant)))
+        # Let the request join the queue.
+        await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_priority_ordering():
+    scheduler = RequestScheduler(1)
+    order = asyncio.run(
+        _run_in_order(
+            scheduler, [("batch", "a"), ("interactive", "a"), ("batch", "b"), ("interactive", "b")]
+        )
+    )
+    assert order == [1, 3, 0, 2]
+
+
+def test_fair_queuing():
+    scheduler = RequestScheduler(1)
+    # Tenant a queues many requests before tenant b, but they alternate.
+    order = asyncio.run(_run_in_order(scheduler, [("batch", "a")] * 4 + [("batch", "b")] * 2))
+    assert order[:4] == [0, 4, 1, 5]
+
+    # A tenant with twice the weight gets twice the share.
+    scheduler = RequestScheduler(1)
+    scheduler.set_tenant_weight("a", 2)
+    order = asyncio.run(_run_in_order(scheduler, [("batch", "a")] * 4 + [("batch", "b")] * 2))
+    assert order[:3] == [0, 1, 4]
+
+
+def _make_stream(scheduler, num_items=3):
+    scheduler.acquire()
+    return scheduler.hold_until_done(ResponseStream(iter(range(num_items))))
+
+
+def test_release_on_exhaust_cancel_close_and_drop():
+    scheduler = RequestScheduler(1)
+
+    stream = _make_stream(scheduler)
+    assert scheduler.num_in_flight == 1
+    assert list(stream) == [0, 1, 2]
+    assert scheduler.num_in_flight == 0
+
+    stream = _make_stream(scheduler)
+    next(stream)
+    stream.cancel()
+    assert scheduler.num_in_flight == 0
+
+    stream = _make_stream(scheduler)
+    stream.close()
+    assert scheduler.num_in_flight == 0
+
+    # A stream that is never iterated nor closed.
+    stream = _make_stream(scheduler)
+    del stream
+    gc.collect()
+    assert scheduler.num_in_flight == 0
+
+    # The slot is released only once.
+    stream = _make_stream(scheduler)
+    list(stream)
+    stream.close()
+    del stream
+    gc.collect()
+    assert scheduler.num_in_flight == 0
+
+
+def test_async_release_on_exhaust_and_drop():
+    async def _agen():
+        for i in range(3):
+            yield i
+
+    async def _main():
+        scheduler = RequestScheduler(1)
+        await scheduler.aacquire()
+        stream = scheduler.hold_until_done(AsyncResponseStream(_agen()))
+        assert [item async for item in stream] == [0, 1, 2]
+        assert scheduler.num_in_flight == 0
+
+        await scheduler.aacquire()
+        stream = scheduler.hold_until_done(AsyncResponseStream(_agen()))
+        del stream
+        gc.collect()
+        assert scheduler.num_in_flight == 0
+        await asyncio.wait_for(scheduler.aacquire(), timeout=1)
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    test_priority_ordering()
+    test_fair_queuing()
+    test_release_on_exhaust_cancel_close_and_drop()
+    test_async_release_on_exhaust_and_drop()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+
+from erniebot.resources.chat_completion import (
+    ChatCompletionResponse,
+    _apply_stop_sequences,
+    _StopSequenceMatcher,
+)
+from erniebot.streaming import AsyncResponseStream, ResponseStream
+
+STOP = ["Observation:"]
+
+
+def _make_chunk(result, is_end=False):
+    return ChatCompletionResponse(200, {"result": result, "is_end": is_end}, {})
+
+
+def _make_chunks(texts, is_end=True):
+    return [_make_chunk(text, is_end=is_end and i == len(texts) - 1) for i, text in enumerate(texts)]
+
+
+def _join(chunks):
+    return "".join(chunk.result for chunk in chunks)
+
+
+def test_stop_sequence_matcher():
+    matcher = _StopSequenceMatcher(STOP)
+    assert matcher.feed("Answer is 42.\nObs") == ("Answer is 42.\n", False)
+    assert matcher.feed("erv") == ("", False)
+    assert matcher.feed("ation: x") == ("", True)
+
+    matcher = _StopSequenceMatcher(STOP)
+    assert matcher.feed("Answer is 42.\nO") == ("Answer is 42.\n", False)
+    assert matcher.feed("K") == ("OK", False)
+    assert matcher.feed("\nO") == ("\n", False)
+    assert matcher.flush() == "O"
+    assert matcher.flush() == ""
+
+
+def test_non_stream_response():
+    resp = _apply_stop_sequences(_make_chunk("Answer is 42.\nO"), STOP)
+    assert resp.result == "Answer is 42.\nO"
+    resp = _apply_stop_sequences(_make_chunk("Answer is 42.\nObservation: 43"), STOP)
+    assert resp.result == "Answer is 42.\n"
+    assert resp.finish_reason == "stop"
+
+
+def test_stream_response():
+    chunks = list(
+        _apply_stop_sequences(iter(_make_chunks(["Answer ", "is 42.\nO", "bservation: 43", "!"])), STOP)
+    )
+    assert _join(chunks) == "Answer is 42.\n"
+    assert chunks[-1].is_end
+
+    chunks = list(_apply_stop_sequences(iter(_make_chunks(["Answer ", "is 42.\nO"])), STOP))
+    assert _join(chunks) == "Answer is 42.\nO"
+
+    # The stream ends without an `is_end` chunk.
+    chunks = list(_apply_stop_sequences(iter(_make_chunks(["Answer ", "is 42.\nO"], is_end=False)), STOP))
+    assert _join(chunks) == "Answer is 42.\nO"
+
+
+def test_async_stream_response():
+    async def _agen(chunks):
+        for chunk in chunks:
+            yield chunk
+
+    async def _collect(chunks):
+        return [chunk async for chunk in _apply_stop_sequences(_agen(chunks), STOP)]
+
+    chunks = asyncio.run(_collect(_make_chunks(["Answer ", "is 42.\nObservation:", " 43"])))
+    assert _join(chunks) == "Answer is 42.\n"
+    chunks = asyncio.run(_collect(_make_chunks(["Answer ", "is 42.\nO"], is_end=False)))
+    assert _join(chunks) == "Answer is 42.\nO"
+
+
+def test_stream_cancel():
+    cancelled = []
+    stream = ResponseStream(iter(range(10)), on_cancel=lambda: cancelled.append(True))
+    assert next(stream) == 0
+    stream.cancel()
+    stream.cancel()
+    assert stream.cancelled
+    assert list(stream) == []
+    assert cancelled == [True]
+
+    # Cancelling a stream stops receiving the stream that it wraps.
+    source = ResponseStream(iter(_make_chunks(["a", "b", "c"])))
+    stream = _apply_stop_sequences(source, STOP)
+    assert next(stream).result == "a"
+    stream.cancel()
+    assert source.cancelled
+    assert list(stream) == []
+
+    async def _acancel():
+        async def _agen():
+            for i in range(10):
+                yield i
+
+        astream = AsyncResponseStream(_agen())
+        assert await astream.__anext__() == 0
+        astream.cancel()
+        assert [item async for item in astream] == []
+
+    asyncio.run(_acancel())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    test_stop_sequence_matcher()
+    test_non_stream_response()
+    test_stream_response()
+    test_async_stream_response()
+    test_stream_cancel()
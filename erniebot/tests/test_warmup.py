@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import http.server
+import json
+import logging
+import os
+import sys
+import threading
+
+import erniebot
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mock_server import MockServerConfig, start_server_process  # noqa: E402
+
+
+def test_awarmup_across_event_loops():
+    server_config = MockServerConfig(port=8766)
+    proc = start_server_process(server_config)
+    config = dict(api_type="qianfan", api_base_url=server_config.base_url, access_token="test")
+
+    async def acreate_chat_completion():
+        resp = await erniebot.ChatCompletion.acreate(
+            model="ernie-turbo",
+            messages=[{"role": "user", "content": "你好"}],
+            _config_=config,
+        )
+        assert resp.get_result()
+
+    async def warm_up_and_request():
+        await erniebot.awarmup(_config_=config)
+        await acreate_chat_completion()
+
+    try:
+        # The session opened by the warm-up must not be reused by requests
+        # sent in another event loop.
+        asyncio.run(warm_up_and_request())
+        asyncio.run(acreate_chat_completion())
+        asyncio.run(erniebot.awarmup(_config_=config))
+        asyncio.run(acreate_chat_completion())
+    finally:
+        proc.terminate()
+        proc.join()
+
+
+class _CountingHandler(http.server.BaseHTTPRequestHandler):
+    # Keep connections alive.
+    protocol_version = "HTTP/1.1"
+    num_connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            type(self).num_connections += 1
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps(
+            {
+                "id": "as-test",
+                "object": "chat.completion",
+                "created": 0,
+                "result": "你好",
+                "is_truncated": False,
+                "need_clear_history": False,
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_warmup_reuses_connections():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    config = dict(
+        api_type="qianfan", api_base_url=f"http://127.0.0.1:{server.server_port}", access_token="test"
+    )
+    try:
+        erniebot.warmup(num_connections=3, _config_=config)
+        assert _CountingHandler.num_connections == 3
+        for _ in range(3):
+            resp = erniebot.ChatCompletion.create(
+                model="ernie-turbo", messages=[{"role": "user", "content": "你好"}], _config_=config
+            )
+            assert resp.get_result()
+        # The requests are sent over the warm connections.
+        assert _CountingHandler.num_connections == 3
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    test_warmup_reuses_connections()
+    test_awarmup_across_event_loops()